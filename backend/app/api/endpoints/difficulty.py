@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Header
+from typing import List, Optional
 from app.models.difficulty import DifficultyLevel
+from app.api.responses import PydanticJSONResponse, cached_json_response
+from app.services.difficulty_registry import DifficultyRegistry
 
-router = APIRouter()
+router = APIRouter(default_response_class=PydanticJSONResponse)
 
 # Predefined difficulty levels based on section 2.1.2
 difficulty_levels_data = [
@@ -35,13 +37,15 @@ difficulty_levels_data = [
 ]
 difficulty_levels_objects = [DifficultyLevel(**data) for data in difficulty_levels_data]
 
+difficulty_registry = DifficultyRegistry(difficulty_levels_objects)
+
 @router.get("/levels", response_model=List[DifficultyLevel])
-async def get_difficulty_levels():
-    return difficulty_levels_objects
+async def get_difficulty_levels(if_none_match: Optional[str] = Header(None)):
+    return cached_json_response(difficulty_registry.levels_response, if_none_match)
 
 @router.get("/{level_id}", response_model=DifficultyLevel)
-async def get_difficulty_level(level_id: int):
-    for level in difficulty_levels_objects:
-        if level.id == level_id:
-            return level
-    raise HTTPException(status_code=404, detail="Difficulty level not found")
+async def get_difficulty_level(level_id: int, if_none_match: Optional[str] = Header(None)):
+    encoded = difficulty_registry.level_response(level_id)
+    if encoded is None:
+        raise HTTPException(status_code=404, detail="Difficulty level not found")
+    return cached_json_response(encoded, if_none_match)
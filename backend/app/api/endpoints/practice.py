@@ -1,29 +1,44 @@
-from fastapi import APIRouter, HTTPException, Body, Response
+from fastapi import APIRouter, HTTPException, Body, Header, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Tuple, Optional, TypeVar
 from uuid import UUID, uuid4
 from datetime import datetime
 import random
 import logging
-from app.models.practice import PracticeSession, Question
+import time
+from app.models.practice import PracticeSession, PracticeSessionStart, PracticeSessionSummary, Question, QuestionManifestEntry
 from app.models.difficulty import DifficultyLevel
-from app.api.endpoints.difficulty import difficulty_levels_objects # To get difficulty details
+from app.api.endpoints.difficulty import difficulty_registry # To get difficulty details
+from app.api.responses import PydanticJSONResponse, cached_json_response
 from app.services.columnar_practice_service import generate_columnar_question
-from app.services.llm_service import llm_service
-from app.services.tts_service import tts_service
-from pydantic import BaseModel
+from app.services.columnar_solver import solve_columnar_question
+from app.services.metrics import (
+    llm_fallbacks_total, llm_timeouts_total, question_generation_attempts, question_generation_fallbacks_total,
+    question_generation_rejections_total, sessions_active, tts_audio_bytes_total, tts_first_chunk_seconds
+)
+from app.services.operand_pair_index import enumerate_arithmetic_questions, get_operand_pair_index
+from app.services.question_pool import question_pool
+from app.services.question_signature import QuestionSignature, arithmetic_signature, question_signature, session_signatures
+from app.services.seeded_session_store import RebuiltQuestionCache, SeededSessionState, seeded_question_id
+from app.services.session_locks import session_locks
+from app.services.session_progress import session_progress
+from app.services.session_summary import SummaryCache, build_session_summary
+from app.services.session_store import SessionConflictError, create_session_store
+from app.services.providers import get_llm_service, get_tts_service
+from pydantic import BaseModel, Field, ValidationError
+from pydantic_core import from_json, to_json
 import asyncio  # Added for async timeout handling
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+T = TypeVar("T")
+
+router = APIRouter(default_response_class=PydanticJSONResponse)
 
-# In-memory storage for active sessions (replace with DB for non-MVP)
-active_sessions: Dict[UUID, PracticeSession] = {}
 
 # Helper function to get difficulty detail
 def get_difficulty_detail_by_id(level_id: int) -> Optional[DifficultyLevel]:
-    return next((level for level in difficulty_levels_objects if level.id == level_id), None)
+    return difficulty_registry.get(level_id)
 
 def _get_operation_symbol(operation_word: str) -> str:
     if operation_word == "addition":
@@ -63,233 +78,300 @@ def _generate_question_string(operands: List[int], operations: List[str]) -> str
 def _generate_single_operand_pair(
     level: DifficultyLevel,
     op_type_word: str,
-    first_operand_for_step: Optional[int] = None # Used if this is a subsequent step in multi-step
+    first_operand_for_step: Optional[int] = None, # Used if this is a subsequent step in multi-step
+    rng: Optional[random.Random] = None
 ) -> Tuple[int, int, int, bool]: # operand1, operand2, result, is_valid
     """
-    Generates two operands and their result for a single operation,
-    applying difficulty rules.
+    Draws two operands and their result for a single operation from the level's
+    precomputed table of valid steps (see operand_pair_index).
     If first_operand_for_step is provided, it's used as operand1.
+    rng is the session's generator; the global random module is used when omitted.
     Returns: (operand1, operand2, result_of_step, is_valid_step)
     """
-    operand1: int
-    operand2: int
-    result: int
-    is_valid = True
-
-    max_attempts_for_pair = 50 # Inner loop attempts
-    for _ in range(max_attempts_for_pair):
-        is_valid = True # Reset for each attempt
-
-        # Determine operand generation strategy based on level code or properties
-        is_two_one_digit_level = "within_100_two_one" in level.code
-        is_tens_level = level.code == "within_100_tens"
-
-        if first_operand_for_step is not None:
-            operand1 = first_operand_for_step
-            # Generate operand2 based on operand1 and level constraints
-            if is_tens_level:
-                if op_type_word == "addition":
-                    max_o2_val = (level.max_number - operand1)
-                    if max_o2_val < 0 : is_valid = False; continue # Should not happen if previous steps are good
-                    operand2 = random.randint(1, max_o2_val // 10 if max_o2_val // 10 > 0 else 1) * 10
-                else: # subtraction
-                    max_o2_val = operand1
-                    operand2 = random.randint(1, max_o2_val // 10 if max_o2_val // 10 > 0 else 1) * 10
-            elif is_two_one_digit_level:
-                # If op1 is 2-digit (from previous step or generated), op2 is 1-digit
-                # This might need adjustment if first_operand_for_step could be 1-digit
-                operand2 = random.randint(0, 9)
-            else: # General case
-                operand2 = random.randint(0, level.max_number) # This might need refinement for multi-step
-        else: # Generating the first pair of operands
-            if is_tens_level:
-                operand1 = random.randint(1, (level.max_number // 10) -1 if (level.max_number // 10) -1 > 0 else 1) * 10
-                if op_type_word == "addition":
-                    max_operand2_tens = (level.max_number - operand1) // 10
-                    operand2 = random.randint(1, max_operand2_tens if max_operand2_tens > 0 else 1) * 10
-                else: # subtraction
-                    max_operand2_tens = operand1 // 10
-                    operand2 = random.randint(1, max_operand2_tens if max_operand2_tens > 0 else 1) * 10
-            elif is_two_one_digit_level:
-                operand1 = random.randint(10, 99)
-                operand2 = random.randint(0, 9)
-            else: # within_10, within_20, or general
-                operand1 = random.randint(0, level.max_number)
-                operand2 = random.randint(0, level.max_number)
-
-        # Perform operation and validate
-        if op_type_word == "addition":
-            current_sum = operand1 + operand2
-            if current_sum > level.max_number:
-                is_valid = False; continue
-            if not level.allow_carry:
-                if is_two_one_digit_level: # 2-digit + 1-digit
-                    if (operand1 % 10) + operand2 >= 10: is_valid = False; continue
-                elif first_operand_for_step is not None and (operand1 >=10 and operand2 >=10): # Muli-step, both current op are 2 digits
-                     if (operand1 % 10) + (operand2 % 10) >= 10: is_valid = False; continue # unit carry
-                     if (operand1 // 10 % 10) + (operand2 // 10 % 10) >= 10: is_valid = False; continue # tens carry
-                elif first_operand_for_step is None : # Single step, general non-carry
-                    if (operand1 % 10) + (operand2 % 10) >= 10: is_valid = False; continue
-                    if level.max_number > 10 and operand1 > 9 and operand2 > 9: # Check tens carry if applicable
-                        if (operand1 // 10 % 10) + (operand2 // 10 % 10) >= 10: is_valid = False; continue
-            result = current_sum
-        else: # Subtraction
-            temp_o1, temp_o2 = operand1, operand2
-            if temp_o1 < temp_o2 and first_operand_for_step is None : # For first step, ensure o1 >= o2 by swapping
-                temp_o1, temp_o2 = temp_o2, temp_o1
-            
-            # If it's a subsequent step and o1 < o2, this subtraction is invalid as it would go negative.
-            # Or if the problem demands non-negative results always.
-            if temp_o1 < temp_o2:
-                is_valid = False; continue
+    rng = rng if rng is not None else random
+    index = get_operand_pair_index(level)
+    if first_operand_for_step is None:
+        candidates = index.single_step_triples(op_type_word)
+    else:
+        candidates = index.follow_up_triples(op_type_word, first_operand_for_step)
 
-            # Avoid X0 - X0 = 0 for tens level, unless it's the only option.
-            if is_tens_level and temp_o1 == temp_o2 and temp_o1 !=0 : # Allow 0-0 if generated, but avoid 10-10, 20-20 etc.
-                # This rule might be too restrictive or needs refinement. For now, let's keep it simple.
-                # Pass for now, can add logic to retry if 0 result is not desired.
-                pass
+    if not candidates:
+        # No valid step exists (e.g. nothing can be added to a running result of max_number)
+        return (first_operand_for_step if first_operand_for_step is not None else 0), 0, -1, False
 
+    operand1, operand2, result = rng.choice(candidates)
+    return operand1, operand2, result, True
 
-            if is_two_one_digit_level and temp_o2 == 0 and temp_o1 == 0 and first_operand_for_step is None:
-                is_valid = False; continue
-            
-            current_diff = temp_o1 - temp_o2
-            if current_diff < 0: # Should be caught by previous check for multi-step
-                is_valid = False; continue
-
-            if not level.allow_borrow:
-                # Check for borrow:
-                # (For 2-digit - 1-digit, it's operand1 % 10 < operand2)
-                # (For 2-digit - 2-digit, it's operand1 % 10 < operand2 % 10, or if equal, check tens)
-                if is_two_one_digit_level: # (e.g. 23 - 5)
-                    if (temp_o1 % 10) < temp_o2 : is_valid = False; continue # (3 < 5)
-                elif first_operand_for_step is not None and (temp_o1 >=10 and temp_o2 >=10): # Multi-step, both current op are 2 digits
-                    if (temp_o1 % 10) < (temp_o2 % 10): is_valid = False; continue
-                    if (temp_o1 % 10) == (temp_o2 % 10) and (temp_o1 // 10 % 10) < (temp_o2 // 10 % 10) : is_valid = False; continue
-                elif first_operand_for_step is None: # Single step, general non-borrow
-                    if (temp_o1 % 10) < (temp_o2 % 10): is_valid = False; continue
-                    if level.max_number > 10 and temp_o1 > 9 and temp_o2 > 9:
-                        if (temp_o1 // 10 % 10) < (temp_o2 // 10 % 10): is_valid = False; continue
-            
-            # If we swapped for the first step, ensure original operand order for the question model
-            # but the calculation uses the swapped order.
-            # This helper returns actual operands used for calculation for THIS step.
-            # The main function will store the sequence.
-            operand1, operand2 = temp_o1, temp_o2 # Use the (potentially swapped) operands for this step
-            result = current_diff
-        
-        if is_valid:
-            return operand1, operand2, result, True
+def _generate_arithmetic_attempt(level: DifficultyLevel, rng: random.Random) -> Optional[Tuple[List[int], List[str]]]:
+    """
+    Builds one candidate arithmetic question (single or two-step) for the level.
+    Returns (operands, operation_symbols), or None if the drawn operations have no valid steps.
+    """
+    is_multi_step = len(level.operation_types) > 1 and rng.random() < 0.5
+    op_type_words = [rng.choice(level.operation_types) for _ in range(2 if is_multi_step else 1)]
+
+    if is_multi_step:
+        # Only start from first steps whose result can be continued with the second operation,
+        # so the follow-up draw below never comes up empty.
+        first_steps = get_operand_pair_index(level).chainable_triples(op_type_words[0], op_type_words[1])
+        if not first_steps:
+            return None
+        o1_step, o2_step, result_step = rng.choice(first_steps)
+        final_operands = [o1_step, o2_step]
+        _, o2_step, _, is_step_valid = _generate_single_operand_pair(level, op_type_words[1], result_step, rng)
+        if not is_step_valid:
+            return None
+        final_operands.append(o2_step)
+    else:
+        o1_step, o2_step, _, is_step_valid = _generate_single_operand_pair(level, op_type_words[0], rng=rng)
+        if not is_step_valid:
+            return None
+        final_operands = [o1_step, o2_step]
 
-    return operand1, operand2, -1, False # Fallback if no valid pair found
+    return final_operands, [_get_operation_symbol(op) for op in op_type_words]
 
-def generate_question_for_session(session: PracticeSession) -> Question:
+def _build_arithmetic_question(session: PracticeSession, level: DifficultyLevel, operands: List[int], operations: List[str]) -> Question:
+    return Question(
+        session_id=session.id,
+        operands=operands,
+        operations=operations,
+        question_string=_generate_question_string(operands, operations),
+        correct_answer=_calculate_answer(operands, operations),
+        difficulty_level_id=level.id,
+        question_type="arithmetic"
+    )
+
+def _generate_fallback_question(session: PracticeSession, level: DifficultyLevel, rng: random.Random) -> Question:
+    """
+    Used when no attempt produced a candidate at all: a single-step question drawn
+    from the valid tables. Always within the level's bounds.
+    """
+    index = get_operand_pair_index(level)
+    op_type_words = [op for op in level.operation_types if index.single_step_triples(op)]
+    if not op_type_words:
+        raise HTTPException(status_code=500, detail="No valid questions exist for this difficulty level")
+
+    op_type_word = rng.choice(op_type_words)
+    o1, o2, _ = rng.choice(index.single_step_triples(op_type_word))
+    return _build_arithmetic_question(session, level, [o1, o2], [_get_operation_symbol(op_type_word)])
+
+MAX_UNIQUE_ATTEMPTS = 32 # Draws spent looking for a question the session has not seen yet
+CONTROLLED_REPEAT_CANDIDATES = 4 # Draws compared when a repeat is unavoidable
+RECENT_QUESTIONS_WINDOW = 3 # A repeat never reuses one of the last few questions if it can help it
+
+def _pick_unseen(
+    session: PracticeSession,
+    draw: Callable[[], Optional[T]],
+    signature_of: Callable[[T], QuestionSignature],
+    space_exhausted: bool,
+    question_type: str
+) -> Optional[T]:
+    """
+    Draws candidates until one has a signature the session has not issued yet (O(1) per check).
+    If the level's question space is exhausted, or every attempt collides, falls back to a
+    controlled repeat: the least recently issued of the drawn candidates.
+    Returns None only if `draw` never produced a candidate.
+    Attempts, rejections and repeats are recorded per level and question type.
+    """
+    signatures = session_signatures(session)
+    level_code = session.difficulty_level_details.code
+    recent_cutoff = len(session.questions) - RECENT_QUESTIONS_WINDOW
+    oldest: Optional[Tuple[int, T]] = None
+    drawn = 0
+    attempts = 0
+    for attempts in range(1, MAX_UNIQUE_ATTEMPTS + 1):
+        candidate = draw()
+        if candidate is None:
+            question_generation_rejections_total.inc(level_code, question_type, "no_valid_step")
+            continue
+        drawn += 1
+        last_seen = signatures.last_seen_index(signature_of(candidate))
+        if last_seen is None:
+            question_generation_attempts.observe(attempts, level_code, question_type)
+            return candidate
+        question_generation_rejections_total.inc(level_code, question_type, "repeat")
+        if oldest is None or last_seen < oldest[0]:
+            oldest = (last_seen, candidate)
+        if space_exhausted and drawn >= CONTROLLED_REPEAT_CANDIDATES and oldest[0] < recent_cutoff:
+            break
+    question_generation_attempts.observe(attempts, level_code, question_type)
+    if oldest is None:
+        return None
+    question_generation_fallbacks_total.inc(level_code, question_type, "repeat")
+    return oldest[1]
+
+def generate_question_for_session(session: PracticeSession, rng: Optional[random.Random] = None) -> Question:
+    rng = rng if rng is not None else random
     level = session.difficulty_level_details
     if not level:
         raise HTTPException(status_code=500, detail="Difficulty details missing in session")
 
-    max_generation_attempts = 100 # Overall attempts for a full question
-    for attempt_num in range(max_generation_attempts):
-        final_operands: List[int] = []
-        final_operations_words: List[str] = [] # "addition", "subtraction"
-        final_operations_symbols: List[str] = [] # "+", "-"
-        
-        is_multi_step = len(level.operation_types) > 1 and random.random() < 0.5
-        num_operations = 2 if is_multi_step else 1
-        
-        current_val_for_next_step: Optional[int] = None
-        valid_question_generated = True
+    signatures = session_signatures(session)
+    question_space = get_operand_pair_index(level).question_space
+    unseen_left = question_space - signatures.distinct_count("arithmetic")
+
+    if 0 < unseen_left and unseen_left * 4 < question_space:
+        # Nearly exhausted: random draws would mostly collide, so pick from what is left directly
+        unseen = []
+        for operands, op_words in enumerate_arithmetic_questions(level):
+            symbols = [_get_operation_symbol(op) for op in op_words]
+            if signatures.last_seen_index(arithmetic_signature(list(operands), symbols)) is None:
+                unseen.append((list(operands), symbols))
+        if unseen:
+            question_generation_attempts.observe(1, level.code, "arithmetic")
+            final_operands, final_operations_symbols = rng.choice(unseen)
+            return _build_arithmetic_question(session, level, final_operands, final_operations_symbols)
+
+    candidate = _pick_unseen(
+        session,
+        lambda: _generate_arithmetic_attempt(level, rng),
+        lambda c: arithmetic_signature(*c),
+        space_exhausted=unseen_left <= 0,
+        question_type="arithmetic"
+    )
+    if candidate is None:
+        question_generation_fallbacks_total.inc(level.code, "arithmetic", "single_step")
+        return _generate_fallback_question(session, level, rng)
+
+    final_operands, final_operations_symbols = candidate
+    return _build_arithmetic_question(session, level, final_operands, final_operations_symbols)
+
+
+def _generate_next_question(session: PracticeSession, rng: Optional[random.Random] = None) -> Question:
+    """Generates the next question for a session, choosing between columnar and arithmetic."""
+    rng = rng if rng is not None else random
+    difficulty_detail = session.difficulty_level_details
+    can_be_columnar = False
+    if difficulty_detail:
+        allowed_symbols_for_difficulty = [_get_operation_symbol(op) for op in difficulty_detail.operation_types]
+        # Columnar questions can be generated if either '+' or '-' is allowed by the difficulty level.
+        # Add other symbols here if more columnar types are supported in the future (e.g., '*')
+        if "+" in allowed_symbols_for_difficulty or "-" in allowed_symbols_for_difficulty:
+            # Additional suitability checks (e.g., max_number)
+            if difficulty_detail.max_number > 9: # Ensure numbers are large enough for meaningful columnar display
+                can_be_columnar = True
+
+    if can_be_columnar and rng.random() < 0.5: # 50% chance to generate columnar if eligible
+        # The columnar space (numbers x blank layouts) is far larger than any session,
+        # so repeats only happen after MAX_UNIQUE_ATTEMPTS collisions.
+        return _pick_unseen(
+            session,
+            lambda: generate_columnar_question(difficulty_detail, session.id, rng),
+            question_signature,
+            space_exhausted=False,
+            question_type="columnar"
+        )
 
-        for i in range(num_operations):
-            op_type_word = random.choice(level.operation_types)
-            
-            o1_step, o2_step, result_step, is_step_valid = _generate_single_operand_pair(
-                level, op_type_word, current_val_for_next_step
-            )
+    new_question = generate_question_for_session(session, rng) # Existing arithmetic question
+    # Ensure question_type is set for non-columnar questions if not already.
+    # The Question model has a default, but explicit here is fine.
+    if not new_question.question_type: # Check if it was set by the generator
+        new_question.question_type = "arithmetic"
+    return new_question
+
+def _question_rng(session: PracticeSession, index: int) -> random.Random:
+    """Per-session generator for the index-th question, so questions are reproducible from the seed."""
+    return random.Random(f"{session.seed}:{index}")
+
+def _issue_next_question(session: PracticeSession) -> Question:
+    """Generates the session's next question from its seed (does not append it)."""
+    index = len(session.questions)
+    new_question = _generate_next_question(session, _question_rng(session, index))
+    new_question.id = seeded_question_id(session.seed, index)
+    return new_question
+
+def _pregenerate_session_questions(session: PracticeSession) -> None:
+    """
+    Generates all planned questions up front. Duplicate avoidance is session-wide already,
+    so this issues exactly the questions /question would have issued one by one.
+    """
+    while len(session.questions) < session.total_questions_planned:
+        session.questions.append(_issue_next_question(session))
+    session.current_question_index = 0
 
-            if not is_step_valid:
-                valid_question_generated = False; break
-            
-            if i == 0: # First operation
-                final_operands.extend([o1_step, o2_step])
-            else: # Subsequent operations in multi-step
-                final_operands.append(o2_step)
-            
-            final_operations_words.append(op_type_word)
-            final_operations_symbols.append(_get_operation_symbol(op_type_word))
-            current_val_for_next_step = result_step
-
-            # Additional checks for multi-step intermediate results (optional for now, focus on final)
-            # if is_multi_step and i == 0:
-            # if current_val_for_next_step < 0 or current_val_for_next_step > level.max_number :
-            # valid_question_generated = False; break
-        
-        if not valid_question_generated:
-            continue # Try generating the whole question again
-
-        final_answer = _calculate_answer(final_operands, final_operations_symbols)
-
-        # Validate final answer (redundant if _calculate_answer is correct and steps are fine)
-        if not (0 <= final_answer <= level.max_number):
-             # For subtraction, a negative final answer is possible if not handled earlier.
-             # _generate_single_operand_pair tries to ensure op1 >= op2 for subtraction steps
-             # or that the intermediate result doesn't lead to a negative.
-            continue # Try again
-
-        question_str = _generate_question_string(final_operands, final_operations_symbols)
-
-        # Prevent immediate repetition
-        if session.questions:
-            last_few_qs = session.questions[-min(3, len(session.questions)):]
-            if any(q.question_string == question_str for q in last_few_qs):
-                # Simple way to try to avoid direct repetition without complex recursion depth tracking here
-                # If it happens too often, might get stuck, but max_generation_attempts should save it.
-                continue 
-        
-        # If all checks pass
-        return Question(
-            session_id=session.id,
-            operands=final_operands,
-            operations=final_operations_symbols,
-            question_string=question_str,
-            correct_answer=final_answer,
-            difficulty_level_id=level.id,
-            question_type="arithmetic"
-        )
+def _rebuild_questions(session: PracticeSession, count: int) -> None:
+    """Regenerates a compact session's questions from its seed, after those it already holds, up to `count`."""
+    while len(session.questions) < count:
+        session.questions.append(_issue_next_question(session))
 
-    # Fallback if all attempts fail (simplistic)
-    # This part should ideally generate a guaranteed valid, simple question
-    # For now, it's a simplified version of the single-step logic without strict validation.
-    op_type_word = random.choice(level.operation_types)
-    op_symbol = _get_operation_symbol(op_type_word)
-    o1 = random.randint(0, level.max_number // 2 if op_symbol == "+" else level.max_number)
-    o2 = random.randint(0, level.max_number // 2)
-    if op_symbol == "-" and o1 < o2: o1, o2 = o2, o1
-    
-    fallback_operands = [o1, o2]
-    fallback_operations = [op_symbol]
-    fallback_answer = _calculate_answer(fallback_operands, fallback_operations)
-    fallback_q_string = _generate_question_string(fallback_operands, fallback_operations)
+# Questions of recently loaded compact sessions, so a load only generates the new ones
+compact_questions = RebuiltQuestionCache()
 
-    # Ensure fallback answer is within bounds, adjust if necessary (crude)
-    if not (0 <= fallback_answer <= level.max_number):
-        if fallback_answer < 0: fallback_answer = 0
-        if fallback_answer > level.max_number: fallback_answer = level.max_number
-        # Note: operands/string might not match this adjusted answer. This is a last resort.
+def _rebuild_compact_session(state: SeededSessionState) -> PracticeSession:
+    return state.to_session(get_difficulty_detail_by_id(state.difficulty_level_id), _rebuild_questions, compact_questions)
 
-    return Question(
-        session_id=session.id,
-        operands=fallback_operands,
-        operations=fallback_operations,
-        question_string=fallback_q_string, # Might not match fallback_answer if adjusted
-        correct_answer=fallback_answer,
-        difficulty_level_id=level.id,
-        question_type="arithmetic"
+# Session storage (in-memory by default, SQLite with SESSION_STORE=sqlite, shared between
+# worker processes with SESSION_STORE=shared; see services.session_store).
+# Sessions started with compact_storage=True keep only their seed and answer state, questions rebuilt on demand.
+session_store = create_session_store(_rebuild_compact_session)
+sessions_active.set_function(lambda: len(session_store))
+# Encoded /summary/stats responses, valid until the session's store version changes
+summary_cache = SummaryCache()
+
+def _load_session(session_id: UUID) -> Optional[PracticeSession]:
+    return session_store.get(session_id)
+
+def _save_session(session: PracticeSession, answered: Iterable[int] = ()) -> None:
+    """
+    Writes a mutated session back to the session store. `answered` are the positions
+    answered by this request; questions it issued are picked up by the store itself.
+    """
+    session_store.save(session, answered)
+
+SESSION_UPDATE_ATTEMPTS = 5
+
+async def _update_session(session_id: UUID, update: Callable[[], T]) -> T:
+    """
+    Runs a load-modify-save handler while holding the session's lock, so two requests
+    for one session (a double-tapped answer, a retry) run one after the other in this
+    process. The handler itself is synchronous, so it never gives up the event loop
+    halfway through. When another worker saved the session in between (SessionConflictError
+    from a shared store), the handler runs again on a fresh copy, so its checks
+    (already answered, session ended, ...) see the other worker's change.
+    """
+    for _ in range(SESSION_UPDATE_ATTEMPTS):
+        try:
+            async with session_locks.hold(session_id):
+                return update()
+        except SessionConflictError:
+            continue
+    raise HTTPException(status_code=409, detail="Practice session is being updated by another request, please retry")
+
+def _to_manifest_entry(question: Question) -> QuestionManifestEntry:
+    # Fields of a validated Question, so skip validating them again
+    return QuestionManifestEntry.model_construct(
+        id=question.id,
+        question_type=question.question_type,
+        operands=question.operands,
+        operations=question.operations,
+        question_string=question.question_string,
+        columnar_operands=question.columnar_operands,
+        columnar_result_placeholders=question.columnar_result_placeholders,
+        columnar_operation=question.columnar_operation
     )
 
+# Pregenerated sessions build every question in /start; lazy sessions have no cap
+MAX_PREGENERATED_QUESTIONS = 100
 
-@router.post("/start", response_model=PracticeSession)
-async def start_practice_session(difficulty_level_id: int = Body(..., embed=True), total_questions: int = Body(10, embed=True)):
+@router.post("/start", response_model=PracticeSessionStart)
+async def start_practice_session(
+    difficulty_level_id: int = Body(..., embed=True),
+    total_questions: int = Body(10, embed=True, ge=1),
+    pregenerate_questions: bool = Body(False, embed=True),
+    compact_storage: bool = Body(False, embed=True)
+):
+    """
+    Starts a practice session. With pregenerate_questions=True every planned question is
+    generated here, in a worker thread, and returned as `question_manifest`; /question then
+    only looks them up. Such sessions are limited to MAX_PREGENERATED_QUESTIONS questions.
+    With compact_storage=True only the session's seed and answer state are kept in memory
+    and its questions are regenerated from the seed when needed.
+    """
+    if pregenerate_questions and total_questions > MAX_PREGENERATED_QUESTIONS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"total_questions must be at most {MAX_PREGENERATED_QUESTIONS} with pregenerate_questions"
+        )
     difficulty_detail = get_difficulty_detail_by_id(difficulty_level_id)
     if not difficulty_detail:
         raise HTTPException(status_code=404, detail="Difficulty level not found")
@@ -299,67 +381,80 @@ async def start_practice_session(difficulty_level_id: int = Body(..., embed=True
         total_questions_planned=total_questions,
         difficulty_level_details=difficulty_detail
     )
-    active_sessions[session.id] = session
-    return session
+    if pregenerate_questions:
+        # The session is not in the store yet, so nothing else can touch it meanwhile
+        await asyncio.get_running_loop().run_in_executor(None, _pregenerate_session_questions, session)
+    session_store.add(session, compact=compact_storage)
+    if not pregenerate_questions:
+        return PydanticJSONResponse(session)
+
+    fields = {name: getattr(session, name) for name in PracticeSession.model_fields}
+    fields["questions"] = []
+    fields["question_manifest"] = [_to_manifest_entry(q) for q in session.questions]
+    return PydanticJSONResponse(PracticeSessionStart.model_construct(**fields))
+
+def _take_pooled_question(session: PracticeSession) -> Optional[Question]:
+    """
+    Pops a ready-made question the session has not seen from the level's background pool.
+    Compact sessions always generate from their seed, since they are rebuilt by replaying it.
+    """
+    if session_store.is_compact(session.id):
+        return None
+    signatures = session_signatures(session)
+    return question_pool.take(
+        session.difficulty_level_id,
+        session.id,
+        lambda q: signatures.last_seen_index(question_signature(q)) is None
+    )
 
-@router.get("/question", response_model=Question)
-async def get_next_question(session_id: UUID):
-    session = active_sessions.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Practice session not found")
-    if session.end_time:
-        raise HTTPException(status_code=400, detail="Session has already ended")
-    
-    answered_questions_count = sum(1 for q in session.questions if q.user_answer is not None)
-    if len(session.questions) == session.total_questions_planned and answered_questions_count == session.total_questions_planned:
+def _select_next_question(session: PracticeSession) -> Question:
+    """Returns the current unanswered question, or issues a new one, updating the session."""
+    progress = session_progress(session)
+    if len(session.questions) == session.total_questions_planned and progress.answered_count == session.total_questions_planned:
          raise HTTPException(status_code=400, detail="All planned questions have been answered.")
 
     if session.current_question_index < len(session.questions) and \
-       session.questions[session.current_question_index].user_answer is None:
+       not progress.answered[session.current_question_index]:
         return session.questions[session.current_question_index]
 
     if len(session.questions) == session.total_questions_planned:
-        for i in range(len(session.questions)):
-            if session.questions[i].user_answer is None:
-                session.current_question_index = i
-                return session.questions[i]
+        next_unanswered_idx = progress.next_unanswered()
+        if next_unanswered_idx is not None:
+            session.current_question_index = next_unanswered_idx
+            return session.questions[next_unanswered_idx]
         raise HTTPException(status_code=400, detail="All questions answered, session should be ending.")
 
     if len(session.questions) < session.total_questions_planned:
-        # Clear recursion depth attribute if it exists from a previous version
-        if hasattr(generate_question_for_session, "recursion_depth"):
-            delattr(generate_question_for_session, "recursion_depth")
-        
-        difficulty_detail = session.difficulty_level_details
-        can_be_columnar = False
-        if difficulty_detail:
-            allowed_symbols_for_difficulty = [_get_operation_symbol(op) for op in difficulty_detail.operation_types]
-            # Columnar questions can be generated if either '+' or '-' is allowed by the difficulty level.
-            # Add other symbols here if more columnar types are supported in the future (e.g., '*')
-            if "+" in allowed_symbols_for_difficulty or "-" in allowed_symbols_for_difficulty:
-                # Additional suitability checks (e.g., max_number)
-                if difficulty_detail.max_number > 9: # Ensure numbers are large enough for meaningful columnar display
-                    can_be_columnar = True
-
-        if can_be_columnar and random.random() < 0.5: # 50% chance to generate columnar if eligible
-            new_question = generate_columnar_question(difficulty_detail, session.id)
-        else:
-            new_question = generate_question_for_session(session) # Existing arithmetic question
-            # Ensure question_type is set for non-columnar questions if not already.
-            # The Question model has a default, but explicit here is fine.
-            if not new_question.question_type: # Check if it was set by the generator
-                new_question.question_type = "arithmetic"
-
-
+        new_question = _take_pooled_question(session) or _issue_next_question(session)
         session.questions.append(new_question)
         session.current_question_index = len(session.questions) - 1
         return new_question
     else:
         raise HTTPException(status_code=400, detail="No more new questions to generate.")
 
+@router.get("/question", response_model=Question)
+async def get_next_question(session_id: UUID):
+    return PydanticJSONResponse(await _update_session(session_id, lambda: _next_question(session_id)))
 
-class AnswerPayload(BaseModel):
-    session_id: UUID
+def _next_question(session_id: UUID) -> Question:
+    session = _load_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Practice session not found")
+    if session.end_time:
+        raise HTTPException(status_code=400, detail="Session has already ended")
+
+    question = _select_next_question(session)
+    _save_session(session)
+    return question
+
+
+@router.get("/pool/stats")
+async def get_question_pool_stats():
+    """Depth and refill rate of each difficulty level's pre-generated question pool."""
+    return {"running": question_pool.running, "ready": question_pool.ready, "levels": question_pool.stats()}
+
+
+class AnswerItem(BaseModel):
     question_id: UUID
     user_answer: Optional[int] = None # For arithmetic questions
     time_spent: Optional[float] = None
@@ -367,111 +462,395 @@ class AnswerPayload(BaseModel):
     user_filled_operands: Optional[List[List[int]]] = None
     user_filled_result: Optional[List[int]] = None
 
+class AnswerPayload(AnswerItem):
+    session_id: UUID
+
+MAX_BATCH_ANSWERS = 500
+
+class BatchAnswerPayload(BaseModel):
+    session_id: UUID
+    answers: List[AnswerItem] = Field(..., min_length=1, max_length=MAX_BATCH_ANSWERS)
+
+class BatchAnswerResult(BaseModel):
+    question_id: UUID
+    status_code: int # 200 if the answer was graded, otherwise what /answer would have returned
+    detail: Optional[str] = None
+    question: Optional[Question] = None # The graded question, when the batch was applied
+
+class BatchAnswerResponse(BaseModel):
+    session_id: UUID
+    applied: bool # False if any answer was rejected; then none of them were recorded
+    score: int
+    current_question_index: int
+    end_time: Optional[datetime] = None
+    results: List[BatchAnswerResult]
+
 def _digits_to_int(digits: List[int]) -> int:
     """Converts a list of non-null digits to an integer."""
     if not digits: return 0 # Or raise error, depending on desired handling for empty
     return int("".join(map(str, digits)))
 
-@router.post("/answer", response_model=Question)
-async def submit_answer(payload: AnswerPayload):
-    session = active_sessions.get(payload.session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Practice session not found")
-    if session.end_time:
-        raise HTTPException(status_code=400, detail="Session has already ended")
+def _matches_columnar_layout(question: Question, filled_grid: Tuple[Tuple[int, ...], ...]) -> bool:
+    """True if a filled grid has the question's two operand rows and result row, digit for digit."""
+    if not question.columnar_operands or question.columnar_result_placeholders is None:
+        return False
+    layout = list(question.columnar_operands) + [question.columnar_result_placeholders]
+    return len(layout) == 3 and len(filled_grid) == 3 and all(
+        len(filled_row) == len(layout_row) for filled_row, layout_row in zip(filled_grid, layout)
+    )
 
-    question_to_answer: Optional[Question] = None
-    question_index = -1
-    for idx, q_iter in enumerate(session.questions):
-        if q_iter.id == payload.question_id:
-            question_to_answer = q_iter
-            question_index = idx
-            break
-    
-    if not question_to_answer:
-        raise HTTPException(status_code=404, detail="Question not found in this session")
-    
+def _find_question(session: PracticeSession, question_id: UUID, not_found_detail: str = "Question not found") -> Tuple[int, Question]:
+    """Looks a question up through the session's id index; raises 404 if it is not in the session."""
+    position = session.question_position(question_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail=not_found_detail)
+    return position, session.questions[position]
+
+async def _question_snapshot(session_id: UUID, question_id: UUID) -> Question:
+    """
+    Copy of a session's question taken under the session lock, so it can be handed to
+    executor threads (LLM, TTS) while /answer keeps updating the session.
+    """
+    async with session_locks.hold(session_id):
+        session = _load_session(session_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Practice session not found")
+        _, question = _find_question(session, question_id)
+        return question.model_copy(deep=True)
+
+def _check_not_answered(question: Question) -> None:
     # Check if already answered (user_answer for arithmetic, or is_correct for columnar)
     # For columnar, if is_correct is set, it means it has been processed.
-    if question_to_answer.question_type == "arithmetic" and question_to_answer.user_answer is not None:
+    if question.question_type == "arithmetic" and question.user_answer is not None:
          raise HTTPException(status_code=400, detail="Arithmetic question already answered")
-    if question_to_answer.question_type == "columnar" and question_to_answer.is_correct is not None:
+    if question.question_type == "columnar" and question.is_correct is not None:
          raise HTTPException(status_code=400, detail="Columnar question already processed")
 
-    if question_to_answer.question_type == "columnar":
-        if not payload.user_filled_operands or not payload.user_filled_result:
+def _grade_answer(question: Question, answer: AnswerItem) -> Tuple[int, bool]:
+    """
+    Grades an answer without changing the question: returns (user_answer, is_correct),
+    or raises HTTPException if the answer cannot be graded.
+    """
+    if question.question_type == "columnar":
+        if not answer.user_filled_operands or not answer.user_filled_result:
             raise HTTPException(status_code=400, detail="Missing user_filled_operands or user_filled_result for columnar question")
-        if not all(isinstance(op_row, list) for op_row in payload.user_filled_operands) or \
-           not all(isinstance(digit, int) for op_row in payload.user_filled_operands for digit in op_row) or \
-           not all(isinstance(digit, int) for digit in payload.user_filled_result):
+        if not all(isinstance(op_row, list) for op_row in answer.user_filled_operands) or \
+           not all(isinstance(digit, int) for op_row in answer.user_filled_operands for digit in op_row) or \
+           not all(isinstance(digit, int) for digit in answer.user_filled_result):
             raise HTTPException(status_code=400, detail="Invalid format for user_filled_operands or user_filled_result")
 
         # Convert user-filled digits to numbers
-        user_operand_numbers = [_digits_to_int(op_row) for op_row in payload.user_filled_operands]
-        user_result_number = _digits_to_int(payload.user_filled_result)
-
-        question_to_answer.user_answer = user_result_number # Store the integer result for record
+        user_operand_numbers = [_digits_to_int(op_row) for op_row in answer.user_filled_operands]
+        user_result_number = _digits_to_int(answer.user_filled_result) # Stored as user_answer for record
 
         # Perform mathematical validation
         expected_result_calculated = 0
-        if question_to_answer.columnar_operation == "+" and len(user_operand_numbers) >= 2:
+        if question.columnar_operation == "+" and len(user_operand_numbers) >= 2:
             expected_result_calculated = sum(user_operand_numbers)
-        elif question_to_answer.columnar_operation == "-" and len(user_operand_numbers) == 2:
+        elif question.columnar_operation == "-" and len(user_operand_numbers) == 2:
             expected_result_calculated = user_operand_numbers[0] - user_operand_numbers[1]
         # Add other operations like multiplication/division if supported
         else:
             # Fallback or error if operation/operands are not as expected
             # For now, assume addition if columnar_operation is missing, or error out
-            if question_to_answer.columnar_operation is None and len(user_operand_numbers) >=2:
+            if question.columnar_operation is None and len(user_operand_numbers) >=2:
                  expected_result_calculated = sum(user_operand_numbers) # Default to sum
             else:
                  raise HTTPException(status_code=500, detail="Unsupported columnar operation or operand count for validation")
 
-        question_to_answer.is_correct = (user_result_number == expected_result_calculated)
-    
-    elif question_to_answer.question_type == "arithmetic":
-        if payload.user_answer is None:
-            raise HTTPException(status_code=400, detail="Missing user_answer for arithmetic question")
-        question_to_answer.user_answer = payload.user_answer
-        question_to_answer.is_correct = (payload.user_answer == question_to_answer.correct_answer)
-    else:
-        raise HTTPException(status_code=500, detail=f"Unknown question type: {question_to_answer.question_type}")
+        is_correct = (user_result_number == expected_result_calculated)
 
-    question_to_answer.time_spent = payload.time_spent
-    question_to_answer.answered_at = datetime.utcnow()
+        # When the grid matches the puzzle's layout, it must also be one of the puzzle's
+        # completions, i.e. keep every given digit (the arithmetic check alone accepts any sum)
+        filled_grid = tuple(tuple(row) for row in answer.user_filled_operands) + (tuple(answer.user_filled_result),)
+        if _matches_columnar_layout(question, filled_grid):
+            is_correct = filled_grid in solve_columnar_question(question)
+        return user_result_number, is_correct
 
-    if question_to_answer.is_correct:
+    elif question.question_type == "arithmetic":
+        if answer.user_answer is None:
+            raise HTTPException(status_code=400, detail="Missing user_answer for arithmetic question")
+        return answer.user_answer, (answer.user_answer == question.correct_answer)
+    else:
+        raise HTTPException(status_code=500, detail=f"Unknown question type: {question.question_type}")
+
+def _record_answer(
+    session: PracticeSession,
+    question_index: int,
+    graded: Tuple[int, bool],
+    time_spent: Optional[float],
+    answered_at: datetime
+) -> Question:
+    """Stores a graded answer and moves the session's score, progress and end time along."""
+    question = session.questions[question_index]
+    question.user_answer, question.is_correct = graded
+    question.time_spent = time_spent
+    question.answered_at = answered_at
+
+    progress = session_progress(session)
+    if question.is_correct:
         session.score += 1
-    
-    answered_all = all(q.user_answer is not None or q.is_correct is not None for q in session.questions)
-    if answered_all and len(session.questions) == session.total_questions_planned:
+    progress.record_answer(question_index)
+
+    if progress.all_answered() and len(session.questions) == session.total_questions_planned:
         if not session.end_time:
             session.end_time = datetime.utcnow()
             
     if question_index == session.current_question_index :
-        next_unanswered_idx = -1
-        for i in range(len(session.questions)): 
-            if session.questions[i].user_answer is None and session.questions[i].is_correct is None:
-                next_unanswered_idx = i
-                break
-        if next_unanswered_idx != -1:
+        next_unanswered_idx = progress.next_unanswered()
+        if next_unanswered_idx is not None:
             session.current_question_index = next_unanswered_idx
+    return question
 
+def _load_open_session(session_id: UUID) -> PracticeSession:
+    session = _load_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Practice session not found")
+    if session.end_time:
+        raise HTTPException(status_code=400, detail="Session has already ended")
+    return session
+
+@router.post("/answer", response_model=Question)
+async def submit_answer(payload: AnswerPayload):
+    return PydanticJSONResponse(await _update_session(payload.session_id, lambda: _submit_answer(payload)))
+
+def _submit_answer(payload: AnswerPayload) -> Question:
+    session = _load_open_session(payload.session_id)
+    question_index, question_to_answer = _answer_question(session, payload)
+    _save_session(session, (question_index,))
     return question_to_answer
 
+def _answer_question(session: PracticeSession, answer: AnswerItem) -> Tuple[int, Question]:
+    """Finds, checks, grades and records one answer in a loaded session (not saved); returns its position and question."""
+    session_progress(session) # Synced before the answer is applied
+
+    question_index, question_to_answer = _find_question(session, answer.question_id, "Question not found in this session")
+    _check_not_answered(question_to_answer)
+    graded = _grade_answer(question_to_answer, answer)
+    return question_index, _record_answer(session, question_index, graded, answer.time_spent, datetime.utcnow())
+
+@router.post("/answers:batch", response_model=BatchAnswerResponse)
+async def submit_answers_batch(payload: BatchAnswerPayload):
+    """
+    Submits many answers for one session in one request, e.g. answers queued by an
+    offline client. Every answer is checked and graded first, exactly as /answer would;
+    only if all of them pass are they recorded, in order, with a single save. Otherwise
+    nothing is recorded and the response (status 400) says which answers were rejected.
+    """
+    response = await _update_session(payload.session_id, lambda: _submit_answers_batch(payload))
+    return PydanticJSONResponse(response, status_code=200 if response.applied else 400)
+
+def _submit_answers_batch(payload: BatchAnswerPayload) -> BatchAnswerResponse:
+    session = _load_open_session(payload.session_id)
+    session_progress(session) # Synced before any answer is applied
+
+    # Pass 1: find, check and grade every answer without touching the session
+    graded: List[Optional[Tuple[int, Tuple[int, bool]]]] = []
+    results: List[BatchAnswerResult] = []
+    seen = set()
+    for answer in payload.answers:
+        try:
+            question_index, question = _find_question(session, answer.question_id, "Question not found in this session")
+            if question_index in seen:
+                raise HTTPException(status_code=400, detail="Question is answered more than once in this batch")
+            _check_not_answered(question)
+            graded.append((question_index, _grade_answer(question, answer)))
+            seen.add(question_index)
+            results.append(BatchAnswerResult(question_id=answer.question_id, status_code=200))
+        except HTTPException as exc:
+            graded.append(None)
+            results.append(BatchAnswerResult(question_id=answer.question_id, status_code=exc.status_code, detail=exc.detail))
+
+    applied = all(item is not None for item in graded)
+    if applied:
+        # Pass 2: record them all, then save once
+        answered_at = datetime.utcnow()
+        for answer, (question_index, grade), result in zip(payload.answers, graded, results):
+            result.question = _record_answer(session, question_index, grade, answer.time_spent, answered_at)
+        _save_session(session, seen)
+
+    return BatchAnswerResponse(
+        session_id=session.id,
+        applied=applied,
+        score=session.score,
+        current_question_index=session.current_question_index,
+        end_time=session.end_time,
+        results=results
+    )
+
 @router.get("/summary", response_model=PracticeSession)
 async def get_practice_summary(session_id: UUID):
-    session = active_sessions.get(session_id)
+    return PydanticJSONResponse(await _update_session(session_id, lambda: _practice_summary(session_id)))
+
+def _practice_summary(session_id: UUID) -> PracticeSession:
+    session = _load_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Practice session not found")
 
-    answered_all = all(q.user_answer is not None for q in session.questions)
+    answered_all = session_progress(session).all_answered()
     if answered_all and len(session.questions) >= session.total_questions_planned: 
        if not session.end_time:
            session.end_time = datetime.utcnow()
+           _save_session(session)
            
     return session
 
+@router.get("/summary/stats", response_model=PracticeSessionSummary)
+async def get_practice_summary_stats(session_id: UUID, if_none_match: Optional[str] = Header(None)):
+    """
+    Score, accuracy and time_spent aggregates of a session, without the questions, for
+    polling from the results page. The encoded response is reused until the session
+    changes, and a matching If-None-Match is answered with 304.
+    """
+    async with session_locks.hold(session_id):
+        version = session_store.version(session_id)
+        encoded = summary_cache.get(session_id, version) if version is not None else None
+        if encoded is None:
+            session = _load_session(session_id)
+            if not session:
+                raise HTTPException(status_code=404, detail="Practice session not found")
+            encoded = summary_cache.put(session_id, version, build_session_summary(session))
+    return cached_json_response(encoded, if_none_match)
+
+# --- WebSocket practice channel ---
+
+WS_CLOSE_SESSION_NOT_FOUND = 4404
+
+def _answer_and_advance(session_id: UUID, answer: AnswerItem) -> Tuple[Question, Optional[Question], Optional[PracticeSessionSummary]]:
+    """
+    /answer followed by /question in one load and one save: returns the graded question
+    and the next one to answer, or the session's summary if that answer completed it.
+    """
+    session = _load_open_session(session_id)
+    question_index, graded = _answer_question(session, answer)
+    if session.end_time:
+        _save_session(session, (question_index,))
+        return graded, None, build_session_summary(session)
+    next_question = _select_next_question(session)
+    _save_session(session, (question_index,))
+    # A copy: the session stays live in the store and may change before this is sent
+    return graded, next_question.model_copy(), None
+
+def _ended_session_summary(session_id: UUID) -> Optional[PracticeSessionSummary]:
+    session = _load_session(session_id)
+    return build_session_summary(session) if session and session.end_time else None
+
+async def _send_frame(websocket: WebSocket, frame_type: str, **fields) -> None:
+    await websocket.send_text(to_json({"type": frame_type, **fields}).decode())
+
+@router.websocket("/ws/{session_id}")
+async def practice_channel(websocket: WebSocket, session_id: UUID):
+    """
+    One WebSocket per practice session instead of a /question and an /answer request per
+    question. All frames are JSON text.
+
+    Server -> client:
+      {"type": "question", "question": {...}}  the question to answer now; sent on connect
+                                               and right after each graded answer
+      {"type": "result", "question": {...}}    the graded answer
+      {"type": "completed", "summary": {...}}  every planned question is answered (as in
+                                               /summary/stats); the socket is then closed
+      {"type": "error", "status_code": ..., "detail": ...}  a frame was rejected, as the
+                                               HTTP endpoint would have rejected it
+    Client -> server:
+      {"type": "answer", "question_id": ..., ...}  the fields of an /answer payload
+      {"type": "question"}                         send the current question again
+
+    Answers go through the same grading, locking and retry path as /answer. The socket
+    holds only the session id between frames, so an idle connection costs one suspended
+    coroutine and no session memory beyond the store's.
+    """
+    await websocket.accept()
+    try:
+        await _run_practice_channel(websocket, session_id)
+    except WebSocketDisconnect:
+        pass  # the client went away mid-send; the session is already saved
+
+async def _run_practice_channel(websocket: WebSocket, session_id: UUID) -> None:
+    if not await _push_current_question(websocket, session_id):
+        return
+
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        try:
+            frame = from_json(message.get("text") or message.get("bytes") or b"")
+        except ValueError:
+            await _send_frame(websocket, "error", status_code=400, detail="Frames must be JSON objects")
+            continue
+        frame_type = frame.get("type") if isinstance(frame, dict) else None
+
+        if frame_type == "question":
+            if not await _push_current_question(websocket, session_id):
+                return
+        elif frame_type == "answer":
+            try:
+                answer = AnswerItem.model_validate(frame)
+            except ValidationError as exc:
+                await _send_frame(websocket, "error", status_code=422, detail=str(exc))
+                continue
+            try:
+                graded, next_question, summary = await _update_session(session_id, lambda: _answer_and_advance(session_id, answer))
+            except HTTPException as exc:
+                if exc.status_code == 404 and exc.detail == "Practice session not found":
+                    await _close_not_found(websocket)
+                    return
+                await _send_frame(websocket, "error", status_code=exc.status_code, detail=exc.detail)
+                continue
+            await _send_frame(websocket, "result", question=graded)
+            if summary is not None:
+                await _send_frame(websocket, "completed", summary=summary)
+                await websocket.close()
+                return
+            await _send_frame(websocket, "question", question=next_question)
+        else:
+            await _send_frame(websocket, "error", status_code=400, detail="Unknown frame type; expected 'answer' or 'question'")
+
+async def _push_current_question(websocket: WebSocket, session_id: UUID) -> bool:
+    """Sends the question to answer now (as GET /question); False if the socket was closed instead."""
+    try:
+        question = await _update_session(session_id, lambda: _next_question(session_id))
+    except HTTPException as exc:
+        if exc.status_code == 404:
+            await _close_not_found(websocket)
+            return False
+        summary = _ended_session_summary(session_id)
+        if summary is not None:
+            await _send_frame(websocket, "completed", summary=summary)
+            await websocket.close()
+            return False
+        await _send_frame(websocket, "error", status_code=exc.status_code, detail=exc.detail)
+        return True
+    await _send_frame(websocket, "question", question=question)
+    return True
+
+async def _close_not_found(websocket: WebSocket) -> None:
+    await _send_frame(websocket, "error", status_code=404, detail="Practice session not found")
+    await websocket.close(code=WS_CLOSE_SESSION_NOT_FOUND)
+
+def _count_help_failure(endpoint: str, error: BaseException) -> None:
+    if isinstance(error, asyncio.TimeoutError):
+        llm_timeouts_total.inc(endpoint)
+
+def _metered_audio(endpoint: str, chunks: Iterable[bytes], started: Optional[float]) -> Iterator[bytes]:
+    """Pass audio chunks through, recording the time to the first one (unless started is None) and the bytes sent."""
+    first = started is not None
+    for chunk in chunks:
+        if first:
+            tts_first_chunk_seconds.observe(time.perf_counter() - started, endpoint)
+            first = False
+        tts_audio_bytes_total.inc(endpoint, amount=len(chunk))
+        yield chunk
+
+async def _voice_help_service():
+    """The TTS service (built off the event loop on first use), or 503 when Azure Speech is not configured."""
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, get_tts_service)
+    except ValueError as e:
+        logger.error(f"Voice help unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Voice help is not available")
+
 class HelpRequest(BaseModel):
     session_id: UUID
     question_id: UUID
@@ -486,21 +865,8 @@ async def get_question_help(request: HelpRequest):
     """
     Provide help and thinking process for a specific question using LLM.
     """
-    # Validate session exists
-    if request.session_id not in active_sessions:
-        raise HTTPException(status_code=404, detail="Practice session not found")
-    
-    session = active_sessions[request.session_id]
-    
-    # Find the specific question
-    question = None
-    for q in session.questions:
-        if q.id == request.question_id:
-            question = q
-            break
-    
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
+    # Validate session exists and find the specific question
+    question = await _question_snapshot(request.session_id, request.question_id)
     
     # ---- BEGIN FIX FOR HANGING SERVER ON LLM TIMEOUT ----
     # Call the potentially blocking LLM request in a background thread and apply an
@@ -512,7 +878,8 @@ async def get_question_help(request: HelpRequest):
     try:
         loop = asyncio.get_running_loop()
         help_response = await asyncio.wait_for(
-            loop.run_in_executor(None, llm_service.generate_help_response, question),
+            # The first call also builds the service (and imports its SDK), so it runs in the thread too
+            loop.run_in_executor(None, lambda: get_llm_service().generate_help_response(question)),
             timeout=LLM_TIMEOUT_SECONDS
         )
         return HelpResponse(
@@ -524,6 +891,8 @@ async def get_question_help(request: HelpRequest):
         # Log the timeout or error and fall back to mock responses so the server
         # remains responsive instead of hanging indefinitely.
         logger.error(f"LLM generation failed or timed out: {e}. Falling back to mock help.")
+        _count_help_failure("help", e)
+        llm_fallbacks_total.inc("help")
         if question.question_type == "columnar":
             help_content = generate_columnar_help_mock(question)
             thinking_process = generate_columnar_thinking_mock(question)
@@ -545,25 +914,14 @@ async def get_question_voice_help(request: HelpRequest):
     Provide voice help for a specific question using Azure TTS.
     Returns audio data as MP3.
     """
-    # Validate session exists
-    if request.session_id not in active_sessions:
-        raise HTTPException(status_code=404, detail="Practice session not found")
-    
-    session = active_sessions[request.session_id]
-    
-    # Find the specific question
-    question = None
-    for q in session.questions:
-        if q.id == request.question_id:
-            question = q
-            break
-    
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
+    # Validate session exists and find the specific question
+    question = await _question_snapshot(request.session_id, request.question_id)
+    tts_service = await _voice_help_service()
     
     # ---- BEGIN FIX FOR HANGING SERVER ON TTS/LLM TIMEOUT ----
     # Apply timeout protection similar to text help to prevent server hanging
     TTS_TIMEOUT_SECONDS = 45  # Slightly longer than text help since TTS generation takes more time
+    started = time.perf_counter()
     
     try:
         loop = asyncio.get_running_loop()
@@ -571,6 +929,10 @@ async def get_question_voice_help(request: HelpRequest):
             loop.run_in_executor(None, tts_service.generate_voice_help, question),
             timeout=TTS_TIMEOUT_SECONDS
         )
+        # This endpoint is not streamed: the "first chunk" is the whole MP3, so this
+        # measures the time to the full audio, not to the first audible bytes
+        tts_first_chunk_seconds.observe(time.perf_counter() - started, "voice_help")
+        tts_audio_bytes_total.inc("voice_help", amount=len(audio_bytes))
         
         # Return audio as MP3
         return Response(
@@ -583,6 +945,7 @@ async def get_question_voice_help(request: HelpRequest):
         )
     except (asyncio.TimeoutError, Exception) as e:
         logger.error(f"TTS generation failed or timed out: {e}. Falling back to error response.")
+        _count_help_failure("voice_help", e)
         raise HTTPException(status_code=500, detail="Voice help generation timed out or failed")
     # ---- END FIX ----
 
@@ -592,25 +955,14 @@ async def get_question_voice_help_stream(request: HelpRequest):
     Provide streaming voice help for a specific question using Azure TTS.
     Returns streaming audio data as MP3 for reduced latency.
     """
-    # Validate session exists
-    if request.session_id not in active_sessions:
-        raise HTTPException(status_code=404, detail="Practice session not found")
-    
-    session = active_sessions[request.session_id]
-    
-    # Find the specific question
-    question = None
-    for q in session.questions:
-        if q.id == request.question_id:
-            question = q
-            break
-    
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
+    # Validate session exists and find the specific question
+    question = await _question_snapshot(request.session_id, request.question_id)
+    tts_service = await _voice_help_service()
     
     # ---- BEGIN FIX FOR HANGING SERVER ON TTS/LLM TIMEOUT ----
     # For streaming, we need to handle timeout at the generator level
     TTS_TIMEOUT_SECONDS = 45
+    started = time.perf_counter()
     
     try:
         # Generate streaming voice help using TTS service with timeout protection
@@ -624,11 +976,12 @@ async def get_question_voice_help_stream(request: HelpRequest):
                 )
                 
                 # Stream the audio chunks
-                for audio_chunk in generator:
+                for audio_chunk in _metered_audio("voice_help_stream", generator, started):
                     yield audio_chunk
                     
             except (asyncio.TimeoutError, Exception) as e:
                 logger.error(f"Error in audio stream generation: {e}")
+                _count_help_failure("voice_help_stream", e)
                 # For streaming, we can't raise HTTP exceptions mid-stream
                 # Just end the stream gracefully
                 return
@@ -656,29 +1009,19 @@ async def get_question_voice_help_stream_ultra(request: HelpRequest):
     Provide ultra-fast streaming voice help with immediate audio feedback.
     Uses optimized approach with quick intro + full content streaming.
     """
-    # Validate session exists
-    if request.session_id not in active_sessions:
-        raise HTTPException(status_code=404, detail="Practice session not found")
-    
-    session = active_sessions[request.session_id]
-    
-    # Find the specific question
-    question = None
-    for q in session.questions:
-        if q.id == request.question_id:
-            question = q
-            break
-    
-    if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
+    # Validate session exists and find the specific question
+    question = await _question_snapshot(request.session_id, request.question_id)
+    tts_service = await _voice_help_service()
     
     # ---- BEGIN FIX FOR HANGING SERVER ON TTS/LLM TIMEOUT ----
     # For ultra streaming, we need to handle timeout at the generator level
     TTS_TIMEOUT_SECONDS = 45
+    started = time.perf_counter()
     
     try:
         # Generate optimized streaming voice help using TTS service with timeout protection
         async def generate_ultra_audio_stream_with_timeout():
+            streamed = False
             try:
                 loop = asyncio.get_running_loop()
                 # Create the generator in executor to avoid blocking
@@ -688,11 +1031,13 @@ async def get_question_voice_help_stream_ultra(request: HelpRequest):
                 )
                 
                 # Stream the audio chunks
-                for audio_chunk in generator:
+                for audio_chunk in _metered_audio("voice_help_stream_ultra", generator, started):
+                    streamed = True
                     yield audio_chunk
                     
             except (asyncio.TimeoutError, Exception) as e:
                 logger.error(f"Error in ultra audio stream generation: {e}")
+                _count_help_failure("voice_help_stream_ultra", e)
                 # Fallback to regular streaming if optimized fails
                 try:
                     loop = asyncio.get_running_loop()
@@ -700,10 +1045,11 @@ async def get_question_voice_help_stream_ultra(request: HelpRequest):
                         loop.run_in_executor(None, lambda: tts_service.generate_voice_help_stream(question)),
                         timeout=TTS_TIMEOUT_SECONDS
                     )
-                    for audio_chunk in fallback_generator:
+                    for audio_chunk in _metered_audio("voice_help_stream_ultra", fallback_generator, None if streamed else started):
                         yield audio_chunk
                 except (asyncio.TimeoutError, Exception) as fallback_error:
                     logger.error(f"Fallback stream also failed: {fallback_error}")
+                    _count_help_failure("voice_help_stream_ultra", fallback_error)
                     return
         
         # Return streaming audio as MP3
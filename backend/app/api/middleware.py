@@ -0,0 +1,45 @@
+"""
+ASGI middleware shared by the app.
+
+RequestMetricsMiddleware records http_request_duration_seconds for every HTTP request.
+The route label is the matched route's path template (/api/v1/practice/question, not
+the URL with its query or path parameters), which the router leaves in the scope after
+matching, so the label set stays bounded. Requests no route matched are recorded under
+"unmatched". It is a plain ASGI middleware rather than a BaseHTTPMiddleware so it adds
+no extra task or body buffering to streamed responses.
+"""
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.services.metrics import http_request_duration_seconds
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500  # Reported when the app raises before starting a response
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_request_duration_seconds.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                str(status)
+            )
@@ -0,0 +1,33 @@
+"""
+Response classes shared by the API routers.
+
+When an endpoint returns a model, FastAPI validates it against the response_model,
+converts it to Python primitives and json.dumps the result. For models the server has
+just built (a Question, a PracticeSession) that validation is repeated work, and the
+primitive conversion of UUIDs, datetimes and nested digit lists is most of the cost.
+Endpoints on the hot path return PydanticJSONResponse(model) instead: FastAPI passes a
+Response through untouched, and pydantic-core encodes the model to JSON bytes in one
+step. response_model stays on the route for the OpenAPI schema.
+
+Bodies that are encoded once and reused (the difficulty levels, session summaries) go
+out through cached_json_response, which also answers If-None-Match with a 304.
+"""
+from typing import Any, Optional
+from fastapi.responses import JSONResponse, Response
+from pydantic_core import to_json
+from app.services.difficulty_registry import EncodedResponse, etag_matches
+
+
+class PydanticJSONResponse(JSONResponse):
+    """JSON encoded by pydantic-core; takes models, lists/dicts of models or plain data."""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def cached_json_response(encoded: EncodedResponse, if_none_match: Optional[str]) -> Response:
+    """The pre-encoded body with its ETag, or an empty 304 when the client already has it."""
+    headers = {"ETag": encoded.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, encoded.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=encoded.body, media_type="application/json", headers=headers)
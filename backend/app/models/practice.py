@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from pydantic.json_schema import SkipJsonSchema
+from typing import Any, Dict, List, Optional
 from uuid import UUID, uuid4
 from datetime import datetime
+import secrets
 from app.models.difficulty import DifficultyLevel # Assuming this is where DifficultyLevel is
 
 class Question(BaseModel):
@@ -34,3 +36,86 @@ class PracticeSession(BaseModel):
     end_time: Optional[datetime] = None
     # To avoid loading all levels for each session, store only necessary info
     difficulty_level_details: Optional[DifficultyLevel] = None
+    # Questions are generated from (seed, question index, level), so they can be rebuilt on demand.
+    # Server-side only: it would let a client compute the answers, so it is left out of API
+    # responses and the schema; the stores keep it (see seeded_session_store.dump_session_json)
+    seed: SkipJsonSchema[int] = Field(default_factory=lambda: secrets.randbits(63), exclude=True)
+    # Question signature index for duplicate avoidance (see services.question_signature), rebuilt lazily
+    _signatures: Optional[Any] = PrivateAttr(default=None)
+    # Answered count and open positions (see services.session_progress), caught up lazily
+    _progress: Optional[Any] = PrivateAttr(default=None)
+    # question id -> position in `questions`, caught up lazily as questions are appended
+    _question_positions: Dict[UUID, int] = PrivateAttr(default_factory=dict)
+    _positions_covered: int = PrivateAttr(default=0)
+    # Row version the session was loaded at, for optimistic writes to a shared store
+    _store_version: int = PrivateAttr(default=0)
+    # Storage mode (compact or not) of the row the session was loaded from, so a SQLite
+    # store can save it back without looking the mode up again; None when not known
+    _store_compact: Optional[bool] = PrivateAttr(default=None)
+
+    def question_position(self, question_id: UUID) -> Optional[int]:
+        """Position of a question in `questions` (O(1) amortized), or None if it is not in the session."""
+        positions = self._question_positions
+        if self._positions_covered > len(self.questions):  # questions were replaced; start over
+            positions.clear()
+            self._positions_covered = 0
+        for i in range(self._positions_covered, len(self.questions)):
+            positions[self.questions[i].id] = i
+        self._positions_covered = len(self.questions)
+
+        position = positions.get(question_id)
+        if position is None or self.questions[position].id != question_id:
+            # A miss or a stale entry means `questions` was edited other than by appending
+            # (or the id is unknown, the rare 404 path); rebuild the map once to be sure
+            positions.clear()
+            positions.update((q.id, i) for i, q in enumerate(self.questions))
+            position = positions.get(question_id)
+        return position
+
+class QuestionManifestEntry(BaseModel):
+    """Compact, answer-free view of a pre-generated question for client-side caching."""
+    id: UUID
+    question_type: str
+    operands: List[int]
+    operations: List[str]
+    question_string: str
+    columnar_operands: Optional[List[List[Optional[int]]]] = None
+    columnar_result_placeholders: Optional[List[Optional[int]]] = None
+    columnar_operation: Optional[str] = None
+
+class PracticeSessionStart(PracticeSession):
+    # Only present when the session was started with pregenerate_questions=True (otherwise
+    # the field is left out of the response). In that mode `questions` is left empty in the
+    # response; the manifest lists them in order.
+    question_manifest: Optional[List[QuestionManifestEntry]] = None
+
+class AccuracyStats(BaseModel):
+    answered: int = 0
+    correct: int = 0
+    accuracy: Optional[float] = None # correct / answered, None until something is answered
+
+class TimeSpentStats(BaseModel):
+    """time_spent (seconds) over the answered questions that reported it."""
+    count: int = 0
+    mean: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    max: Optional[float] = None
+
+class PracticeSessionSummary(BaseModel):
+    """Aggregates of a session for the results page, without the questions themselves."""
+    session_id: UUID
+    difficulty_level_id: int
+    total_questions_planned: int
+    questions_issued: int
+    answered: int
+    score: int
+    accuracy: Optional[float] = None
+    accuracy_by_operation: Dict[str, AccuracyStats] = {} # "addition", "subtraction" or "mixed"
+    accuracy_by_question_type: Dict[str, AccuracyStats] = {}
+    time_spent: TimeSpentStats = TimeSpentStats()
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    # Until the session ends: time from the start to the latest answer
+    duration_seconds: Optional[float] = None
+    completed: bool = False
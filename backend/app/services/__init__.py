@@ -1,5 +1,2 @@
-# This file can remain largely empty or be used to directly expose functions
-# from its submodules if desired. For now, just importing the new service
-# to ensure it's recognized as part of the package.
-from . import columnar_practice_service
-from . import tts_service
+# Left empty on purpose: importing one service must not import the others (numpy, the
+# session stores, sqlite3, the provider SDKs). Import the submodules you use directly.
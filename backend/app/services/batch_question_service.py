@@ -0,0 +1,349 @@
+"""
+Vectorized batch question generation.
+
+generate_questions_batch() produces tens of thousands of questions per call as NumPy
+arrays (operands, operations, answers, columnar digit grids and blank masks) instead of
+building one pydantic Question at a time. It follows the same rules as the per-request
+generators: arithmetic steps are drawn from the precomputed operand tables and columnar
+questions mirror generate_columnar_question, including its rejection of blank layouts
+with more than one valid completion: an ambiguous layout is redrawn, up to the same
+MAX_BLANK_ATTEMPTS, before the question falls back to a single blank. Use QuestionBatch.to_questions() to
+materialize pydantic Questions for a slice of the batch when they are needed.
+
+Unlike the per-session generators, a batch does not avoid repeats; it is meant for
+question banks, worksheets and pools where uniqueness is handled by the consumer.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+from uuid import UUID
+import numpy as np
+from app.models.difficulty import DifficultyLevel
+from app.models.practice import Question
+from app.services.columnar_practice_service import MAX_BLANK_ATTEMPTS
+from app.services.columnar_solver import is_unambiguous
+from app.services.operand_pair_index import SUPPORTED_OPERATIONS, get_operand_pair_index, operand_index_key
+
+ARITHMETIC = 0
+COLUMNAR = 1
+
+OPERATION_SYMBOLS = ("+", "-")  # operation codes index into this tuple
+_OPERATION_CODES = {"addition": 0, "subtraction": 1}
+
+RngLike = Union[None, int, np.random.Generator]
+
+
+@dataclass(frozen=True)
+class _OperandArrays:
+    """NumPy views of an OperandPairIndex for one difficulty level."""
+    single_step: Dict[str, np.ndarray]                 # op word -> (k, 3) triples
+    follow_up: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]  # op word -> (triples, offsets, counts)
+    chainable: Dict[Tuple[str, str], np.ndarray]       # (first op, second op) -> (k, 3) triples
+
+
+_operand_arrays_cache: Dict[Tuple, _OperandArrays] = {}
+
+
+def _build_operand_arrays(level: DifficultyLevel) -> _OperandArrays:
+    index = get_operand_pair_index(level)
+    max_number = level.max_number
+
+    def as_array(triples) -> np.ndarray:
+        return np.asarray(triples, dtype=np.int32).reshape(-1, 3)
+
+    follow_up = {}
+    for op_word, by_first_operand in index.follow_up.items():
+        # CSR layout: triples sorted by first operand, offsets/counts indexed by it
+        counts = np.zeros(max_number + 1, dtype=np.int64)
+        rows = []
+        for first_operand in range(max_number + 1):
+            triples = by_first_operand.get(first_operand, ())
+            counts[first_operand] = len(triples)
+            rows.extend(triples)
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        follow_up[op_word] = (as_array(rows), offsets, counts)
+
+    return _OperandArrays(
+        single_step={op: as_array(t) for op, t in index.single_step.items()},
+        follow_up=follow_up,
+        chainable={ops: as_array(t) for ops, t in index.chainable.items()}
+    )
+
+
+def _operand_arrays(level: DifficultyLevel) -> _OperandArrays:
+    key = operand_index_key(level)
+    arrays = _operand_arrays_cache.get(key)
+    if arrays is None:
+        arrays = _operand_arrays_cache[key] = _build_operand_arrays(level)
+    return arrays
+
+
+def _digit_count(values: np.ndarray) -> np.ndarray:
+    counts = np.ones(values.shape, dtype=np.int64)
+    threshold = 10
+    while threshold <= max(int(values.max(initial=0)), 0):
+        counts += values >= threshold
+        threshold *= 10
+    return counts
+
+
+@dataclass
+class QuestionBatch:
+    """
+    Column-oriented batch of generated questions. Row i describes question i.
+
+    operands:        (n, 3) int32, unused third operand is -1
+    operations:      (n, 2) int8 codes into OPERATION_SYMBOLS, unused second op is -1
+    answers:         (n,) int32 correct result
+    question_type:   (n,) uint8, ARITHMETIC or COLUMNAR
+    columnar_width:  (n,) uint8 digits per row of the columnar layout (0 for arithmetic)
+    columnar_digits: (n, 3, W) int8 operand/operand/result digits, right-aligned in W columns
+    blank_mask:      (n,) uint32, bit row * W + column set for every blanked digit
+    """
+    level_id: int
+    operands: np.ndarray
+    operations: np.ndarray
+    answers: np.ndarray
+    question_type: np.ndarray
+    columnar_width: np.ndarray
+    columnar_digits: np.ndarray
+    blank_mask: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.answers.shape[0])
+
+    @property
+    def grid_width(self) -> int:
+        return int(self.columnar_digits.shape[2])
+
+    def to_questions(self, session_id: UUID, start: int = 0, stop: Optional[int] = None) -> List[Question]:
+        """Materializes pydantic Questions for rows [start, stop)."""
+        stop = len(self) if stop is None else stop
+        return [self._to_question(i, session_id) for i in range(start, stop)]
+
+    def _to_question(self, i: int, session_id: UUID) -> Question:
+        operations = [OPERATION_SYMBOLS[code] for code in self.operations[i].tolist() if code >= 0]
+        operands = [value for value in self.operands[i].tolist() if value >= 0][:len(operations) + 1]
+
+        if self.question_type[i] == ARITHMETIC:
+            question_str = str(operands[0])
+            for op_symbol, operand in zip(operations, operands[1:]):
+                question_str += f" {op_symbol} {operand}"
+            return Question(
+                session_id=session_id,
+                operands=operands,
+                operations=operations,
+                question_string=question_str,
+                correct_answer=int(self.answers[i]),
+                difficulty_level_id=self.level_id,
+                question_type="arithmetic"
+            )
+
+        width, grid_width = int(self.columnar_width[i]), self.grid_width
+        mask = int(self.blank_mask[i])
+        rows: List[List[Optional[int]]] = []
+        for row in range(3):
+            digits = self.columnar_digits[i, row, grid_width - width:].tolist()
+            for col in range(width):
+                if mask >> (row * grid_width + grid_width - width + col) & 1:
+                    digits[col] = None
+            rows.append(digits)
+        templates = ["".join(str(d) if d is not None else "?" for d in row) for row in rows]
+        return Question(
+            session_id=session_id,
+            operands=operands,
+            operations=operations,
+            question_string=f"{templates[0]} {operations[0]} {templates[1]} = {templates[2]}",
+            correct_answer=None,
+            difficulty_level_id=self.level_id,
+            question_type="columnar",
+            columnar_operands=rows[:2],
+            columnar_result_placeholders=rows[2],
+            columnar_operation=operations[0]
+        )
+
+
+def _draw_arithmetic(level: DifficultyLevel, n: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    tables = _operand_arrays(level)
+    op_words = [op for op in level.operation_types if op in SUPPORTED_OPERATIONS]
+    if not op_words:
+        raise ValueError(f"Difficulty level {level.code} has no supported operations")
+
+    operands = np.full((n, 3), -1, dtype=np.int32)
+    operations = np.full((n, 2), -1, dtype=np.int8)
+    answers = np.zeros(n, dtype=np.int32)
+
+    # Same choices as _generate_arithmetic_attempt: 50% two-step when mixing operations
+    is_multi_step = (rng.random(n) < 0.5) if len(level.operation_types) > 1 else np.zeros(n, dtype=bool)
+    first_op = rng.integers(0, len(op_words), size=n)
+    second_op = rng.integers(0, len(op_words), size=n)
+
+    for a, first_word in enumerate(op_words):
+        for b, second_word in enumerate(op_words):
+            rows = np.flatnonzero(is_multi_step & (first_op == a) & (second_op == b))
+            first_steps = tables.chainable[(first_word, second_word)]
+            if rows.size == 0:
+                continue
+            if first_steps.shape[0] == 0:
+                is_multi_step[rows] = False  # cannot chain these operations, degrade to one step
+                continue
+            first = first_steps[rng.integers(0, first_steps.shape[0], size=rows.size)]
+            triples, offsets, counts = tables.follow_up[second_word]
+            picks = offsets[first[:, 2]] + (rng.random(rows.size) * counts[first[:, 2]]).astype(np.int64)
+            second = triples[picks]
+            operands[rows] = np.stack([first[:, 0], first[:, 1], second[:, 1]], axis=1)
+            operations[rows, 0] = _OPERATION_CODES[first_word]
+            operations[rows, 1] = _OPERATION_CODES[second_word]
+            answers[rows] = second[:, 2]
+
+    for a, op_word in enumerate(op_words):
+        rows = np.flatnonzero(~is_multi_step & (first_op == a))
+        steps = tables.single_step[op_word]
+        if rows.size == 0:
+            continue
+        if steps.shape[0] == 0:
+            raise ValueError(f"Difficulty level {level.code} has no valid {op_word} questions")
+        drawn = steps[rng.integers(0, steps.shape[0], size=rows.size)]
+        operands[rows, :2] = drawn[:, :2]
+        operations[rows, 0] = _OPERATION_CODES[op_word]
+        answers[rows] = drawn[:, 2]
+
+    return operands, operations, answers
+
+
+def _draw_blanks(width: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Blank count (1 or 2) and two distinct cells, as row * width + column, per layout."""
+    cells = 3 * width
+    num_blanks = rng.integers(1, np.minimum(2, cells) + 1)
+    first_cell = (rng.random(width.size) * cells).astype(np.int64)
+    second_cell = (rng.random(width.size) * (cells - 1)).astype(np.int64)
+    second_cell += second_cell >= first_cell
+    return num_blanks, first_cell, second_cell
+
+
+def _blanks_unambiguous(digits: np.ndarray, width: int, grid_width: int, cells: Tuple[int, int], operation: str) -> bool:
+    grid = [[int(d) for d in digits[row, grid_width - width:]] for row in range(3)]
+    for cell in cells:
+        grid[cell // width][cell % width] = None
+    return is_unambiguous(grid[0], grid[1], grid[2], operation)
+
+
+def _draw_columnar(level: DifficultyLevel, n: int, grid_width: int, rng: np.random.Generator):
+    possible_ops = [op for op in ("addition", "subtraction") if op in level.operation_types] or ["addition"]
+    op_codes = np.asarray([_OPERATION_CODES[op] for op in possible_ops], dtype=np.int8)[
+        rng.integers(0, len(possible_ops), size=n)
+    ]
+    is_subtraction = op_codes == _OPERATION_CODES["subtraction"]
+
+    num1 = rng.integers(0, level.max_number + 1, size=n)
+    num2 = rng.integers(0, level.max_number + 1, size=n)
+
+    # Subtraction: swap so the result is non-negative
+    swap = is_subtraction & (num1 < num2)
+    num1[swap], num2[swap] = num2[swap], num1[swap]
+    # Addition: redraw num2 so the sum stays within max_number
+    too_big = ~is_subtraction & (num1 + num2 > level.max_number)
+    num2[too_big] = (rng.random(int(too_big.sum())) * (level.max_number - num1[too_big] + 1)).astype(np.int64)
+    result = np.where(is_subtraction, num1 - num2, num1 + num2)
+
+    width = np.maximum.reduce([_digit_count(num1), _digit_count(num2), _digit_count(result)])
+
+    values = np.stack([num1, num2, result], axis=1)
+    powers = 10 ** np.arange(grid_width - 1, -1, -1)
+    digits = (values[:, :, None] // powers[None, None, :]) % 10
+
+    # Blank one or two distinct digit positions among the 3 * width layout cells
+    num_blanks, first_cell, second_cell = _draw_blanks(width, rng)
+
+    def to_bit(cell: np.ndarray) -> np.ndarray:
+        row, col = cell // width, cell % width
+        return np.left_shift(np.uint32(1), (row * grid_width + grid_width - width + col).astype(np.uint32))
+
+    # Two blanks in different columns always have a single completion. A layout with two
+    # blanks in the same column is checked with the solver and, when ambiguous, redrawn
+    # like generate_columnar_question does; after MAX_BLANK_ATTEMPTS only the first blank
+    # of the last draw is kept
+    pending = np.arange(n)
+    for attempt in range(MAX_BLANK_ATTEMPTS):
+        if attempt:
+            num_blanks[pending], first_cell[pending], second_cell[pending] = _draw_blanks(width[pending], rng)
+        same_column = pending[(num_blanks[pending] > 1) & (first_cell[pending] % width[pending] == second_cell[pending] % width[pending])]
+        pending = np.asarray([i for i in same_column if not _blanks_unambiguous(
+            digits[i], int(width[i]), grid_width, (first_cell[i], second_cell[i]), OPERATION_SYMBOLS[op_codes[i]]
+        )], dtype=np.int64)
+        if not pending.size:
+            break
+    else:
+        num_blanks[pending] = 1
+
+    blank_mask = to_bit(first_cell) | np.where(num_blanks > 1, to_bit(second_cell), np.uint32(0))
+
+    operands = np.full((n, 3), -1, dtype=np.int32)
+    operands[:, 0], operands[:, 1] = num1, num2
+    operations = np.full((n, 2), -1, dtype=np.int8)
+    operations[:, 0] = op_codes
+    return operands, operations, result.astype(np.int32), width.astype(np.uint8), digits.astype(np.int8), blank_mask.astype(np.uint32)
+
+
+def generate_questions_batch(
+    level: DifficultyLevel,
+    n: int,
+    rng: RngLike = None,
+    columnar_ratio: Optional[float] = None
+) -> QuestionBatch:
+    """
+    Generates n questions for a difficulty level in one vectorized pass.
+
+    Args:
+        level: Difficulty level to follow
+        n: Number of questions
+        rng: NumPy Generator or seed (fixed seeds give reproducible batches)
+        columnar_ratio: Share of columnar questions; defaults to the 50% the session
+            endpoints use when the level is eligible for columnar questions
+
+    Returns:
+        QuestionBatch holding the questions as NumPy arrays
+    """
+    rng = np.random.default_rng(rng)
+    can_be_columnar = level.max_number > 9 and any(op in level.operation_types for op in ("addition", "subtraction"))
+    if columnar_ratio is None:
+        columnar_ratio = 0.5 if can_be_columnar else 0.0
+
+    grid_width = len(str(level.max_number))
+    is_columnar = rng.random(n) < columnar_ratio
+    columnar_rows = np.flatnonzero(is_columnar)
+    arithmetic_rows = np.flatnonzero(~is_columnar)
+
+    operands = np.full((n, 3), -1, dtype=np.int32)
+    operations = np.full((n, 2), -1, dtype=np.int8)
+    answers = np.zeros(n, dtype=np.int32)
+    columnar_width = np.zeros(n, dtype=np.uint8)
+    columnar_digits = np.zeros((n, 3, grid_width), dtype=np.int8)
+    blank_mask = np.zeros(n, dtype=np.uint32)
+
+    if arithmetic_rows.size:
+        a_operands, a_operations, a_answers = _draw_arithmetic(level, arithmetic_rows.size, rng)
+        operands[arithmetic_rows] = a_operands
+        operations[arithmetic_rows] = a_operations
+        answers[arithmetic_rows] = a_answers
+
+    if columnar_rows.size:
+        c_operands, c_operations, c_answers, c_width, c_digits, c_mask = _draw_columnar(
+            level, columnar_rows.size, grid_width, rng
+        )
+        operands[columnar_rows] = c_operands
+        operations[columnar_rows] = c_operations
+        answers[columnar_rows] = c_answers
+        columnar_width[columnar_rows] = c_width
+        columnar_digits[columnar_rows] = c_digits
+        blank_mask[columnar_rows] = c_mask
+
+    return QuestionBatch(
+        level_id=level.id,
+        operands=operands,
+        operations=operations,
+        answers=answers,
+        question_type=is_columnar.astype(np.uint8),
+        columnar_width=columnar_width,
+        columnar_digits=columnar_digits,
+        blank_mask=blank_mask
+    )
@@ -3,6 +3,11 @@ from typing import List, Optional, Tuple
 from uuid import UUID
 from app.models.practice import Question
 from app.models.difficulty import DifficultyLevel
+from app.services.columnar_solver import is_unambiguous
+from app.services.metrics import question_generation_fallbacks_total, question_generation_rejections_total
+
+# Blank layouts drawn before settling for a single blank (which is always unambiguous)
+MAX_BLANK_ATTEMPTS = 10
 
 def _get_operation_symbol_from_difficulty(op_type_word: str) -> str:
     if op_type_word == "addition": return "+"
@@ -28,8 +33,27 @@ def _digits_to_number(digits: List[Optional[int]]) -> int:
     """Converts a list of digits (some can be None) to a number, treating None as 0 for calculation if necessary."""
     return int("".join(map(str, [d if d is not None else 0 for d in digits])))
 
-def generate_columnar_question(difficulty_level: DifficultyLevel, session_id: UUID) -> Question:
-    """Generates a columnar question (addition or subtraction) with blanks."""
+def _apply_blanks(
+    operand_rows: List[List[Optional[int]]],
+    result_row: List[Optional[int]],
+    blank_selections: List[Tuple[str, int, int]]
+) -> Tuple[List[List[Optional[int]]], List[Optional[int]]]:
+    """Returns copies of the rows with the selected ('operand' | 'result', row, digit) positions blanked."""
+    blanked_operands = [list(row) for row in operand_rows]
+    blanked_result = list(result_row)
+    for pos_type, r_idx, d_idx in blank_selections:
+        if pos_type == 'operand':
+            blanked_operands[r_idx][d_idx] = None
+        elif pos_type == 'result':
+            blanked_result[d_idx] = None
+    return blanked_operands, blanked_result
+
+def generate_columnar_question(difficulty_level: DifficultyLevel, session_id: UUID, rng: Optional[random.Random] = None) -> Question:
+    """
+    Generates a columnar question (addition or subtraction) with blanks.
+    Pass a per-session random.Random as rng for reproducible questions; defaults to the global generator.
+    """
+    rng = rng if rng is not None else random
     
     # Determine available operations for columnar based on difficulty level
     # For now, let's assume columnar questions will only use one operation type per question.
@@ -45,12 +69,12 @@ def generate_columnar_question(difficulty_level: DifficultyLevel, session_id: UU
         # For now, default to addition if somehow empty but shouldn't happen with proper config
         selected_op_word = "addition"
     else:
-        selected_op_word = random.choice(possible_ops_words)
+        selected_op_word = rng.choice(possible_ops_words)
     
     operation_symbol = _get_operation_symbol_from_difficulty(selected_op_word)
 
-    num1 = random.randint(0, difficulty_level.max_number) # Allow 0 for subtraction e.g. 10 - 0
-    num2 = random.randint(0, difficulty_level.max_number)
+    num1 = rng.randint(0, difficulty_level.max_number) # Allow 0 for subtraction e.g. 10 - 0
+    num2 = rng.randint(0, difficulty_level.max_number)
 
     if operation_symbol == "-":
         # Ensure num1 >= num2 for subtraction to keep results non-negative for typical columnar display
@@ -65,7 +89,7 @@ def generate_columnar_question(difficulty_level: DifficultyLevel, session_id: UU
         # For simplicity, let's try to cap. A better approach might be to generate num2 based on num1 and max_number.
         if num1 + num2 > difficulty_level.max_number:
             if difficulty_level.max_number - num1 >= 0:
-                 num2 = random.randint(0, difficulty_level.max_number - num1)
+                 num2 = rng.randint(0, difficulty_level.max_number - num1)
             else: # num1 is already max_number or very close, make num2 zero
                  num2 = 0 
         calculated_actual_result = num1 + num2
@@ -105,13 +129,23 @@ def generate_columnar_question(difficulty_level: DifficultyLevel, session_id: UU
         elif columnar_operands_with_blanks and columnar_operands_with_blanks[0]:
              columnar_operands_with_blanks[0][0] = None
     else:
-        num_blanks = random.randint(1, min(2, len(all_eligible_positions)))
-        blank_selections = random.sample(all_eligible_positions, num_blanks)
-        for pos_type, r_idx, d_idx in blank_selections:
-            if pos_type == 'operand':
-                columnar_operands_with_blanks[r_idx][d_idx] = None
-            elif pos_type == 'result':
-                columnar_result_placeholders_with_blanks[d_idx] = None
+        # Only keep blank layouts with exactly one valid completion, so grading and hints
+        # can rely on a single answer. A single blank is always unambiguous.
+        for _ in range(MAX_BLANK_ATTEMPTS):
+            num_blanks = rng.randint(1, min(2, len(all_eligible_positions)))
+            blank_selections = rng.sample(all_eligible_positions, num_blanks)
+            candidate_operands, candidate_result = _apply_blanks(
+                columnar_operands_with_blanks, columnar_result_placeholders_with_blanks, blank_selections
+            )
+            if is_unambiguous(candidate_operands[0], candidate_operands[1], candidate_result, operation_symbol):
+                break
+            question_generation_rejections_total.inc(difficulty_level.code, "columnar", "ambiguous")
+        else:
+            question_generation_fallbacks_total.inc(difficulty_level.code, "columnar", "single_blank")
+            candidate_operands, candidate_result = _apply_blanks(
+                columnar_operands_with_blanks, columnar_result_placeholders_with_blanks, blank_selections[:1]
+            )
+        columnar_operands_with_blanks, columnar_result_placeholders_with_blanks = candidate_operands, candidate_result
 
     op1_str_template = "".join([str(d) if d is not None else '?' for d in columnar_operands_with_blanks[0]])
     op2_str_template = "".join([str(d) if d is not None else '?' for d in columnar_operands_with_blanks[1]])
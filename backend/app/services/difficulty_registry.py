@@ -0,0 +1,65 @@
+"""
+Immutable registry of the built-in difficulty levels.
+
+The levels never change while the app runs, so the registry indexes them by id and
+code once and keeps the JSON bytes of the level list and of every level, each with a
+strong ETag. The difficulty endpoints send the stored bytes as-is and answer a
+matching If-None-Match with 304 Not Modified.
+"""
+import hashlib
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, NamedTuple, Optional
+from pydantic import TypeAdapter
+from app.models.difficulty import DifficultyLevel
+
+
+class EncodedResponse(NamedTuple):
+    body: bytes
+    etag: str  # quoted strong validator, e.g. '"3f2a..."'
+
+
+def encode_response(body: bytes) -> EncodedResponse:
+    """JSON bytes with a strong ETag derived from their content."""
+    return EncodedResponse(body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for this header)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class DifficultyRegistry:
+    """Levels indexed by id and code, with pre-encoded JSON responses."""
+    __slots__ = ("levels", "by_id", "by_code", "levels_response", "_level_responses")
+
+    def __init__(self, levels: Iterable[DifficultyLevel]):
+        self.levels = tuple(levels)
+        self.by_id: Mapping[int, DifficultyLevel] = MappingProxyType({level.id: level for level in self.levels})
+        self.by_code: Mapping[str, DifficultyLevel] = MappingProxyType({level.code: level for level in self.levels})
+        if len(self.by_id) != len(self.levels) or len(self.by_code) != len(self.levels):
+            raise ValueError("Difficulty level ids and codes must be unique")
+
+        self.levels_response = encode_response(TypeAdapter(List[DifficultyLevel]).dump_json(list(self.levels)))
+        self._level_responses: Mapping[int, EncodedResponse] = MappingProxyType(
+            {level.id: encode_response(level.model_dump_json().encode()) for level in self.levels}
+        )
+
+    def get(self, level_id: int) -> Optional[DifficultyLevel]:
+        return self.by_id.get(level_id)
+
+    def get_by_code(self, code: str) -> Optional[DifficultyLevel]:
+        return self.by_code.get(code)
+
+    def level_response(self, level_id: int) -> Optional[EncodedResponse]:
+        return self._level_responses.get(level_id)
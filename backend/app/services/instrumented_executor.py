@@ -0,0 +1,47 @@
+"""
+Thread pool that reports its queue depth and busy threads.
+
+The help endpoints hand blocking LLM and TTS calls to the event loop's default executor
+through run_in_executor, and asyncio.to_thread uses the same pool. When every thread is
+stuck on a slow LLM call, further help requests queue up behind them without any sign
+of it in the logs. The lifespan installs an InstrumentedThreadPoolExecutor as the
+loop's default executor; its queue depth and busy thread count are gauges read when
+/metrics is scraped, so submitting work only adds a wrapper call and two locked
+increments.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from app.services.metrics import executor_busy_threads, executor_max_threads, executor_queue_depth
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor exposing executor_queue_depth / executor_busy_threads for `name`."""
+
+    def __init__(self, name: str, max_workers: Optional[int] = None):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+        # A new pool with the same name (e.g. after a restart of the lifespan) takes over its series
+        executor_queue_depth.set_function(self.queue_depth, name)
+        executor_busy_threads.set_function(self.busy_threads, name)
+        executor_max_threads.set(self._max_workers, name)
+
+    def queue_depth(self) -> int:
+        return self._work_queue.qsize()
+
+    def busy_threads(self) -> int:
+        return self._busy
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        return super().submit(self._run, fn, args, kwargs)
+
+    def _run(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        with self._busy_lock:
+            self._busy += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._busy_lock:
+                self._busy -= 1
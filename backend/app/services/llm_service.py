@@ -1,25 +1,51 @@
 import os
+import time
 from typing import List, Dict, Any
-from openai import OpenAI
+from openai import APITimeoutError, OpenAI
 from app.models.practice import Question
+from app.services.metrics import llm_call_seconds, llm_calls_total, llm_fallbacks_total
 import logging
-from dotenv import load_dotenv, find_dotenv
 
-_ = load_dotenv(find_dotenv())
 logger = logging.getLogger(__name__)
 
-api_base = os.getenv("QWEN_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1")
-api_key = os.getenv("QWEN_API_KEY")
+DEFAULT_API_BASE = "https://dashscope.aliyuncs.com/compatible-mode/v1"
 
 class LLMService:
     """Service for generating AI-powered help responses for math questions"""
     
     def __init__(self):
+        # Read when the service is created (see services.providers), after main has loaded .env
         self.client = OpenAI(
-            api_key=api_key,
-            base_url=api_base
+            api_key=os.getenv("QWEN_API_KEY"),
+            base_url=os.getenv("QWEN_BASE_URL", DEFAULT_API_BASE)
         )
         self.model = os.getenv("QWEN_MODEL", "qwen-turbo")
+
+    def complete(self, purpose: str, messages: List[Dict[str, str]], **kwargs):
+        """
+        Run a chat completion, counting it in llm_calls_total / llm_call_seconds under `purpose`.
+
+        Args:
+            purpose: Metrics label for the caller (help, oral_help)
+            messages: Chat messages for the model
+            **kwargs: Passed through to chat.completions.create (temperature, max_tokens, ...)
+
+        Returns:
+            The chat completion response
+        """
+        started = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+        except APITimeoutError:
+            llm_calls_total.inc(purpose, "timeout")
+            raise
+        except Exception:
+            llm_calls_total.inc(purpose, "error")
+            raise
+        finally:
+            llm_call_seconds.observe(time.perf_counter() - started, purpose)
+        llm_calls_total.inc(purpose, "ok")
+        return response
         
     def generate_help_response(self, question: Question) -> Dict[str, Any]:
         """
@@ -39,6 +65,7 @@ class LLMService:
         except Exception as e:
             logger.error(f"Error generating LLM help response: {e}")
             # Fallback to mock responses if LLM fails
+            llm_fallbacks_total.inc("help")
             return self._generate_fallback_response(question)
     
     def _generate_arithmetic_help(self, question: Question) -> Dict[str, Any]:
@@ -46,9 +73,9 @@ class LLMService:
         prompt = self._build_arithmetic_prompt(question)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            response = self.complete(
+                "help",
+                [
                     {
                         "role": "system",
                         "content": "你是一个专门为小学生提供数学帮助的AI助手。你的回答要简单易懂，适合小学生理解。请严格按照要求的格式回答。"
@@ -74,9 +101,9 @@ class LLMService:
         prompt = self._build_columnar_prompt(question)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            response = self.complete(
+                "help",
+                [
                     {
                         "role": "system",
                         "content": "你是一个专门为小学生提供数学帮助的AI助手。你擅长解释竖式计算。你的回答要简单易懂，适合小学生理解。请严格按照要求的格式回答。"
@@ -230,6 +257,3 @@ class LLMService:
                     "第三步：得出答案"
                 ]
             }
-
-# Global instance
-llm_service = LLMService() 
\ No newline at end of file
@@ -0,0 +1,296 @@
+"""
+Lightweight in-process metrics rendered in the Prometheus text format.
+
+Counters and histograms keep one value slot per label-value tuple in a plain dict, so
+recording a sample on the hot path is a dict lookup and an addition. Requests are
+served on a single event loop, so no locking is done. The LLM and TTS metrics, and the
+generation metrics of questions pregenerated by /start, are recorded from executor
+threads; an increment lost to a thread switch there is accepted rather than putting a
+lock on every hot-path sample.
+Gauges can read their value from a callback at scrape time (session count, executor
+queue depth), which costs nothing between scrapes. GET /metrics renders everything
+registered in `registry`.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+
+    def register(self, metric: "_Metric") -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> "_Metric":
+        return self._metrics[name]
+
+    def render(self) -> str:
+        """All registered metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), registry: MetricsRegistry = registry):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        registry.register(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def _check_labels(self, label_values: LabelValues) -> None:
+        if len(label_values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {label_values}")
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+    metric_type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        values = self._values
+        if label_values not in values:
+            self._check_labels(label_values)
+            values[label_values] = 0
+        values[label_values] += amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down per label set, set directly or read from a callback."""
+    metric_type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, *label_values: str) -> None:
+        if label_values not in self._values:
+            self._check_labels(label_values)
+        self._values[label_values] = value
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        values = self._values
+        if label_values not in values:
+            self._check_labels(label_values)
+            values[label_values] = 0
+        values[label_values] += amount
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set_function(self, function: Callable[[], float], *label_values: str) -> None:
+        """Read the value from `function` whenever it is rendered (replaces any earlier one)."""
+        self._check_labels(label_values)
+        self._functions[label_values] = function
+
+    def value(self, *label_values: str) -> float:
+        function = self._functions.get(label_values)
+        return function() if function is not None else self._values.get(label_values, 0)
+
+    def samples(self) -> List[str]:
+        labels = sorted(set(self._values) | set(self._functions))
+        return [
+            f"{self.name}{_format_labels(self.label_names, values)} {_format_number(self.value(*values))}"
+            for values in labels
+        ]
+
+
+class Histogram(_Metric):
+    """Bucketed distribution per label set, with a running sum and count."""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = (), registry: MetricsRegistry = registry):
+        super().__init__(name, documentation, label_names, registry)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket (non-cumulative) counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        slot = self._values.get(label_values)
+        if slot is None:
+            self._check_labels(label_values)
+            slot = self._values[label_values] = [0] * (len(self.buckets) + 2)
+        slot[bisect_left(self.buckets, value)] += 1
+        slot[-2] += value
+        slot[-1] += 1
+
+    def count(self, *label_values: str) -> int:
+        slot = self._values.get(label_values)
+        return int(slot[-1]) if slot else 0
+
+    def bucket_counts(self, *label_values: str) -> Dict[float, int]:
+        """Non-cumulative count per bucket upper bound."""
+        slot = self._values.get(label_values)
+        return {bound: int(slot[i]) if slot else 0 for i, bound in enumerate(self.buckets)}
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, slot in sorted(self._values.items()):
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += slot[i]
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {_format_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_number(slot[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {_format_number(slot[-1])}")
+        return lines
+
+
+# --- Question generation ---
+
+question_generation_attempts = Histogram(
+    "question_generation_attempts",
+    "Candidates drawn per issued question.",
+    ("level", "question_type"),
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+)
+question_generation_rejections_total = Counter(
+    "question_generation_rejections_total",
+    "Candidates rejected while generating a question, by reason (repeat, no_valid_step, ambiguous).",
+    ("level", "question_type", "reason")
+)
+question_generation_fallbacks_total = Counter(
+    "question_generation_fallbacks_total",
+    "Questions issued through a fallback path (repeat, single_step, single_blank).",
+    ("level", "question_type", "path")
+)
+operand_table_rejections_total = Counter(
+    "operand_table_rejections_total",
+    "Operand pairs excluded from a level's precomputed tables, by rule (carry, borrow, range).",
+    ("level", "operation", "reason")
+)
+
+# --- Sessions ---
+
+session_evictions_total = Counter(
+    "session_evictions_total",
+    "In-memory practice sessions evicted, by reason (ttl, lru).",
+    ("reason",)
+)
+session_write_conflicts_total = Counter(
+    "session_write_conflicts_total",
+    "Session saves rejected because another worker saved the session first."
+)
+session_summary_cache_total = Counter(
+    "session_summary_cache_total",
+    "Session summary lookups, by result (hit, miss).",
+    ("result",)
+)
+session_lock_wait_seconds = Histogram(
+    "session_lock_wait_seconds",
+    "Time spent waiting for a practice session's lock (about 0 when it was free).",
+    buckets=(0.00001, 0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+)
+sessions_active = Gauge(
+    "sessions_active",
+    "Practice sessions currently held by the session store."
+)
+
+# --- HTTP ---
+
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, by method, route template and status code.",
+    ("method", "route", "status"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+# --- LLM and TTS ---
+
+llm_calls_total = Counter(
+    "llm_calls_total",
+    "Chat completion calls, by purpose (help, oral_help) and outcome (ok, error, timeout).",
+    ("purpose", "outcome")
+)
+llm_call_seconds = Histogram(
+    "llm_call_seconds",
+    "Duration of a chat completion call, by purpose.",
+    ("purpose",),
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+)
+llm_timeouts_total = Counter(
+    "llm_timeouts_total",
+    "Help requests that hit the endpoint's timeout while waiting on the LLM or TTS, by endpoint.",
+    ("endpoint",)
+)
+llm_fallbacks_total = Counter(
+    "llm_fallbacks_total",
+    "Help content served from the canned fallback instead of the LLM, by purpose.",
+    ("purpose",)
+)
+tts_first_chunk_seconds = Histogram(
+    "tts_first_chunk_seconds",
+    "Time from a voice help request to its first audio chunk, by endpoint.",
+    ("endpoint",),
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 45)
+)
+tts_audio_bytes_total = Counter(
+    "tts_audio_bytes_total",
+    "Audio bytes sent by the voice help endpoints, by endpoint.",
+    ("endpoint",)
+)
+
+# --- Executors ---
+
+executor_queue_depth = Gauge(
+    "executor_queue_depth",
+    "Work items submitted to a thread pool but not yet picked up by a thread.",
+    ("executor",)
+)
+executor_busy_threads = Gauge(
+    "executor_busy_threads",
+    "Threads of a thread pool currently running a work item.",
+    ("executor",)
+)
+executor_max_threads = Gauge(
+    "executor_max_threads",
+    "Size of a thread pool.",
+    ("executor",)
+)
@@ -0,0 +1,251 @@
+"""
+Precomputed operand-pair tables for arithmetic question generation.
+
+Every difficulty level lives in a tiny operand domain (at most ~100 x 100), so
+instead of drawing random operands and rejecting the ones that break the
+carry/borrow/max_number rules we enumerate every valid (operand1, operand2, result)
+triple once per level and operation. Drawing a step is then a single random.choice.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+from app.models.difficulty import DifficultyLevel
+from app.services.metrics import operand_table_rejections_total
+
+OperandTriple = Tuple[int, int, int]  # (operand1, operand2, result)
+
+SUPPORTED_OPERATIONS = ("addition", "subtraction")
+
+
+@dataclass(frozen=True)
+class OperandPairIndex:
+    """All valid operand triples for one difficulty level, split by step kind."""
+    # op word -> triples valid as the first (or only) step of a question
+    single_step: Dict[str, Tuple[OperandTriple, ...]]
+    # op word -> operand1 (the running result) -> triples valid as a follow-up step
+    follow_up: Dict[str, Dict[int, Tuple[OperandTriple, ...]]]
+    # (first op word, second op word) -> first-step triples whose result has at least
+    # one valid follow-up step, so a two-step question can always be completed
+    chainable: Dict[Tuple[str, str], Tuple[OperandTriple, ...]]
+    # Number of distinct arithmetic questions (single and two-step) the level can produce
+    question_space: int
+
+    def single_step_triples(self, op_type_word: str) -> Tuple[OperandTriple, ...]:
+        return self.single_step.get(op_type_word, ())
+
+    def follow_up_triples(self, op_type_word: str, first_operand: int) -> Tuple[OperandTriple, ...]:
+        return self.follow_up.get(op_type_word, {}).get(first_operand, ())
+
+    def chainable_triples(self, first_op_word: str, second_op_word: str) -> Tuple[OperandTriple, ...]:
+        return self.chainable.get((first_op_word, second_op_word), ())
+
+
+def _is_two_one_digit_level(code: str) -> bool:
+    return "within_100_two_one" in code
+
+
+def _is_tens_level(code: str) -> bool:
+    return code == "within_100_tens"
+
+
+def _tens_multiples(max_tens: int) -> range:
+    # Mirrors random.randint(1, max_tens if max_tens > 0 else 1) * 10
+    return range(10, (max_tens if max_tens > 0 else 1) * 10 + 1, 10)
+
+
+def _candidate_pairs(
+    code: str,
+    max_number: int,
+    op_type_word: str,
+    first_operand: Optional[int]
+) -> Iterator[Tuple[int, int]]:
+    """Yields every (operand1, operand2) pair the level's operand strategy can produce."""
+    if first_operand is not None:
+        operand1 = first_operand
+        if _is_tens_level(code):
+            if op_type_word == "addition":
+                if max_number - operand1 < 0:
+                    return
+                operand2_values = _tens_multiples((max_number - operand1) // 10)
+            else:
+                operand2_values = _tens_multiples(operand1 // 10)
+        elif _is_two_one_digit_level(code):
+            operand2_values = range(0, 10)
+        else:
+            operand2_values = range(0, max_number + 1)
+        for operand2 in operand2_values:
+            yield operand1, operand2
+        return
+
+    if _is_tens_level(code):
+        max_first_tens = (max_number // 10) - 1
+        for operand1 in _tens_multiples(max_first_tens):
+            if op_type_word == "addition":
+                operand2_values = _tens_multiples((max_number - operand1) // 10)
+            else:
+                operand2_values = _tens_multiples(operand1 // 10)
+            for operand2 in operand2_values:
+                yield operand1, operand2
+    elif _is_two_one_digit_level(code):
+        for operand1 in range(10, 100):
+            for operand2 in range(0, 10):
+                yield operand1, operand2
+    else:
+        for operand1 in range(0, max_number + 1):
+            for operand2 in range(0, max_number + 1):
+                yield operand1, operand2
+
+
+def _has_carry(operand1: int, operand2: int) -> bool:
+    if (operand1 % 10) + (operand2 % 10) >= 10:
+        return True  # unit carry
+    if operand1 >= 10 and operand2 >= 10:
+        return (operand1 // 10 % 10) + (operand2 // 10 % 10) >= 10  # tens carry
+    return False
+
+
+def _has_borrow(operand1: int, operand2: int) -> bool:
+    if (operand1 % 10) < (operand2 % 10):
+        return True  # unit borrow
+    if operand1 >= 10 and operand2 >= 10:
+        return (operand1 // 10 % 10) < (operand2 // 10 % 10)  # tens borrow
+    return False
+
+
+def _validate_step(
+    max_number: int,
+    allow_carry: bool,
+    allow_borrow: bool,
+    op_type_word: str,
+    operand1: int,
+    operand2: int,
+    is_follow_up: bool
+) -> Tuple[Optional[OperandTriple], Optional[str]]:
+    """
+    Applies the difficulty rules to a single step.
+    Returns ((possibly swapped) triple, None), or (None, reason) if the step is not
+    allowed, where reason is "range", "carry" or "borrow".
+    """
+    if op_type_word == "addition":
+        result = operand1 + operand2
+        if result > max_number:
+            return None, "range"
+        if not allow_carry and _has_carry(operand1, operand2):
+            return None, "carry"
+        return (operand1, operand2, result), None
+
+    # Subtraction: a first step is swapped so it never goes negative,
+    # a follow-up step that would go negative is simply invalid.
+    if operand1 < operand2:
+        if is_follow_up:
+            return None, "range"
+        operand1, operand2 = operand2, operand1
+    if not allow_borrow and _has_borrow(operand1, operand2):
+        return None, "borrow"
+    return (operand1, operand2, operand1 - operand2), None
+
+
+def _collect_triples(
+    code: str,
+    max_number: int,
+    allow_carry: bool,
+    allow_borrow: bool,
+    op_type_word: str,
+    first_operand: Optional[int],
+    rejections: Dict[str, int]
+) -> Tuple[OperandTriple, ...]:
+    """Valid triples for one step kind; counts rejected candidate pairs by reason into `rejections`."""
+    is_follow_up = first_operand is not None
+    seen = set()
+    triples = []
+    for operand1, operand2 in _candidate_pairs(code, max_number, op_type_word, first_operand):
+        triple, reason = _validate_step(max_number, allow_carry, allow_borrow, op_type_word, operand1, operand2, is_follow_up)
+        if reason is not None:
+            rejections[reason] = rejections.get(reason, 0) + 1
+        # Swapped subtraction pairs collapse onto the same triple; keep each one once.
+        if triple is not None and triple not in seen:
+            seen.add(triple)
+            triples.append(triple)
+    return tuple(triples)
+
+
+@lru_cache(maxsize=None)
+def _build_index(
+    code: str,
+    max_number: int,
+    allow_carry: bool,
+    allow_borrow: bool,
+    operation_types: Tuple[str, ...]
+) -> OperandPairIndex:
+    op_words = [op for op in dict.fromkeys(operation_types) if op in SUPPORTED_OPERATIONS]
+
+    single_step: Dict[str, Tuple[OperandTriple, ...]] = {}
+    follow_up: Dict[str, Dict[int, Tuple[OperandTriple, ...]]] = {}
+    for op_word in op_words:
+        rejections: Dict[str, int] = {}
+        single_step[op_word] = _collect_triples(code, max_number, allow_carry, allow_borrow, op_word, None, rejections)
+        by_first_operand = {}
+        for first_operand in range(0, max_number + 1):
+            triples = _collect_triples(code, max_number, allow_carry, allow_borrow, op_word, first_operand, rejections)
+            if triples:
+                by_first_operand[first_operand] = triples
+        follow_up[op_word] = by_first_operand
+        # Rule rejections happen once here instead of on every draw; record them per level
+        for reason, count in rejections.items():
+            operand_table_rejections_total.inc(code, op_word, reason, amount=count)
+
+    chainable: Dict[Tuple[str, str], Tuple[OperandTriple, ...]] = {}
+    for first_op in op_words:
+        for second_op in op_words:
+            chainable[(first_op, second_op)] = tuple(
+                triple for triple in single_step[first_op] if triple[2] in follow_up[second_op]
+            )
+
+    question_space = sum(len(triples) for triples in single_step.values())
+    if len(operation_types) > 1:
+        for (_, second_op), first_steps in chainable.items():
+            question_space += sum(len(follow_up[second_op][result]) for _, _, result in first_steps)
+
+    return OperandPairIndex(
+        single_step=single_step,
+        follow_up=follow_up,
+        chainable=chainable,
+        question_space=question_space
+    )
+
+
+@lru_cache(maxsize=None)
+def _enumerate_questions(key: Tuple) -> Tuple[Tuple[Tuple[int, ...], Tuple[str, ...]], ...]:
+    index = _build_index(*key)
+    questions = [
+        ((o1, o2), (op_word,))
+        for op_word, triples in index.single_step.items()
+        for o1, o2, _ in triples
+    ]
+    if len(key[4]) > 1:  # two-step questions need more than one operation type
+        for (first_op, second_op), first_steps in index.chainable.items():
+            for o1, o2, result in first_steps:
+                for _, o3, _ in index.follow_up[second_op][result]:
+                    questions.append(((o1, o2, o3), (first_op, second_op)))
+    return tuple(questions)
+
+
+def enumerate_arithmetic_questions(level: DifficultyLevel) -> Tuple[Tuple[Tuple[int, ...], Tuple[str, ...]], ...]:
+    """Every distinct arithmetic question of the level as (operands, operation words); cached."""
+    return _enumerate_questions(operand_index_key(level))
+
+
+def operand_index_key(level: DifficultyLevel) -> Tuple:
+    """The level fields the operand tables depend on; usable as a cache key."""
+    return (
+        level.code,
+        level.max_number,
+        level.allow_carry,
+        level.allow_borrow,
+        tuple(level.operation_types)
+    )
+
+
+def get_operand_pair_index(level: DifficultyLevel) -> OperandPairIndex:
+    """Returns the (cached) operand-pair index for a difficulty level."""
+    return _build_index(*operand_index_key(level))
@@ -0,0 +1,295 @@
+"""
+Packed, array-backed storage form of a practice session.
+
+A pydantic Question carries a UUID object, two datetimes, the question string and
+nested lists of columnar digits, which adds up to kilobytes per question. PackedSession
+keeps each question as one fixed-size binary record (_RECORD) in a single bytearray:
+
+- the question id as 16 raw bytes,
+- operands as int32 and operations as one byte each,
+- answer state as a flag byte plus int/float/timestamp fields,
+- for columnar questions, the row width, a blank bitmask and an offset into a second
+  bytearray holding one byte per digit cell.
+
+The question string is not stored; it is rebuilt from operands or digits. A question
+that does not fit the packed layout (for example, a string that cannot be rebuilt)
+is kept as-is in a small per-session overflow dict, so packing never loses data.
+PracticeSession and Question models are only built again by to_session().
+
+A save does not repack the session: update() appends records for the questions issued
+since the last one and rewrites the answer fields of the questions answered in place,
+so its cost does not grow with the session.
+"""
+import math
+import struct
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+from app.models.difficulty import DifficultyLevel
+from app.models.practice import PracticeSession, Question
+from app.services.seeded_session_store import from_micros, to_micros
+
+MAX_OPERANDS = 3
+_OPERATION_SYMBOLS = ("+", "-")
+_OPERATION_CODES = {symbol: code for code, symbol in enumerate(_OPERATION_SYMBOLS)}
+_NO_OPERATION = 255
+_QUESTION_TYPES = ("arithmetic", "columnar")
+_MAX_COLUMNAR_WIDTH = 10  # 3 rows x 10 digits fit the 32-bit blank mask
+_INT32 = (-2**31, 2**31 - 1)
+
+# id, 3 operands, 2 operation codes, question type, flags, correct answer, user answer,
+# time spent, created_at and answered_at (microseconds), columnar width, blank mask, digit offset
+_RECORD = struct.Struct("<16s3i2BBBiqdqqBII")
+# flags through answered_at: the part of a record that changes when its question is answered
+_ANSWER_FIELDS = struct.Struct("<Biqdqq")
+_ANSWER_FIELDS_OFFSET = struct.calcsize("<16s3i2BB")
+
+# flag bits
+_HAS_CORRECT_ANSWER = 1
+_HAS_USER_ANSWER = 2
+_IS_CORRECT_SET = 4
+_IS_CORRECT = 8
+_HAS_TIME_SPENT = 16
+_HAS_ANSWERED_AT = 32
+_HAS_COLUMNAR_OPERATION = 64
+
+
+def _arithmetic_string(operands: List[int], operations: List[str]) -> str:
+    question_str = str(operands[0])
+    for op_symbol, operand in zip(operations, operands[1:]):
+        question_str += f" {op_symbol} {operand}"
+    return question_str
+
+
+def _columnar_string(rows: List[List[Optional[int]]], operation: str) -> str:
+    templates = ["".join(str(d) if d is not None else "?" for d in row) for row in rows]
+    return f"{templates[0]} {operation} {templates[1]} = {templates[2]}"
+
+
+def _is_naive(value: Optional[datetime]) -> bool:
+    return value is None or value.tzinfo is None
+
+
+def _fits_int32(value: int) -> bool:
+    return _INT32[0] <= value <= _INT32[1]
+
+
+def _flags(question: Question) -> int:
+    flags = 0
+    if question.correct_answer is not None:
+        flags |= _HAS_CORRECT_ANSWER
+    if question.user_answer is not None:
+        flags |= _HAS_USER_ANSWER
+    if question.is_correct is not None:
+        flags |= _IS_CORRECT_SET | (_IS_CORRECT if question.is_correct else 0)
+    if question.time_spent is not None:
+        flags |= _HAS_TIME_SPENT
+    if question.answered_at is not None:
+        flags |= _HAS_ANSWERED_AT
+    if question.columnar_operation is not None:
+        flags |= _HAS_COLUMNAR_OPERATION
+    return flags
+
+
+def _answer_fields(question: Question) -> tuple:
+    """Values of _ANSWER_FIELDS for a packable question."""
+    return (
+        _flags(question),
+        question.correct_answer or 0,
+        question.user_answer or 0,
+        question.time_spent if question.time_spent is not None else math.nan,
+        to_micros(question.created_at),
+        to_micros(question.answered_at) if question.answered_at else -1
+    )
+
+
+class PackedSession:
+    """One practice session as packed records; see the module docstring for the layout."""
+    __slots__ = (
+        "id", "user_id", "difficulty_level_id", "total_questions_planned", "current_question_index",
+        "score", "start_time", "end_time", "difficulty_level_details", "seed",
+        "count", "records", "columnar_digits", "overflow"
+    )
+
+    def __init__(self, session: PracticeSession):
+        self.id = session.id
+        self.difficulty_level_id = session.difficulty_level_id
+        self._copy_fields(session)
+        self._repack(session.questions)
+
+    def _copy_fields(self, session: PracticeSession) -> None:
+        self.user_id = session.user_id
+        self.total_questions_planned = session.total_questions_planned
+        self.current_question_index = session.current_question_index
+        self.score = session.score
+        self.start_time = session.start_time
+        self.end_time = session.end_time
+        self.difficulty_level_details: Optional[DifficultyLevel] = session.difficulty_level_details
+        self.seed = session.seed
+
+    def _repack(self, questions: List[Question]) -> None:
+        self.count = 0
+        self.records = bytearray()          # _RECORD.size bytes per question
+        self.columnar_digits = bytearray()  # 3 rows x width digit cells per columnar question
+        self.overflow: Optional[Dict[int, Question]] = None
+        for question in questions:
+            self._append(question)
+
+    def update(self, session: PracticeSession, answered: Optional[Iterable[int]] = None) -> None:
+        """
+        Brings the records up to date with a later state of the same session: copies its
+        fields, rewrites the answer fields of the questions at the `answered` positions
+        and appends the questions issued since. With answered=None (changes unknown) the
+        whole session is repacked.
+        """
+        self._copy_fields(session)
+        questions = session.questions
+        if answered is None or len(questions) < self.count:
+            self._repack(questions)
+            return
+        for index in answered:
+            if index < self.count:
+                self._set_answer(index, questions[index])
+        for question in questions[self.count:]:
+            self._append(question)
+
+    # --- packing ---
+
+    def _packable(self, question: Question) -> bool:
+        if question.session_id != self.id or question.difficulty_level_id != self.difficulty_level_id:
+            return False
+        if question.question_type not in _QUESTION_TYPES:
+            return False
+        if len(question.operations) > MAX_OPERANDS - 1 or len(question.operands) != len(question.operations) + 1:
+            return False
+        if any(op not in _OPERATION_CODES for op in question.operations):
+            return False
+        if not all(_fits_int32(v) for v in question.operands):
+            return False
+        for value in (question.correct_answer, question.user_answer):
+            if value is not None and not _fits_int32(value):
+                return False
+        if not (_is_naive(question.created_at) and _is_naive(question.answered_at)):
+            return False
+
+        if question.question_type == "columnar":
+            rows = (question.columnar_operands or []) + [question.columnar_result_placeholders]
+            if len(rows) != 3 or any(row is None for row in rows):
+                return False
+            width = len(rows[0])
+            if not 0 < width <= _MAX_COLUMNAR_WIDTH or any(len(row) != width for row in rows):
+                return False
+            if any(d is not None and not 0 <= d <= 9 for row in rows for d in row):
+                return False
+            if len(question.operations) != 1 or question.columnar_operation not in (None, question.operations[0]):
+                return False
+            return question.question_string == _columnar_string(rows, question.operations[0])
+        if question.columnar_operands is not None or question.columnar_result_placeholders is not None or question.columnar_operation is not None:
+            return False
+        return question.question_string == _arithmetic_string(question.operands, question.operations)
+
+    def _append(self, question: Question) -> None:
+        index = self.count
+        self.count += 1
+        if not self._packable(question):
+            if self.overflow is None:
+                self.overflow = {}
+            self.overflow[index] = question.model_copy(deep=True)
+            # Keep an id-only record so records stay aligned with question positions
+            self.records += _RECORD.pack(question.id.bytes, 0, 0, 0, _NO_OPERATION, _NO_OPERATION, 0, 0, 0, 0, math.nan, 0, -1, 0, 0, 0)
+            return
+
+        operands = question.operands + [0] * (MAX_OPERANDS - len(question.operands))
+        op_codes = [_OPERATION_CODES[op] for op in question.operations]
+        op_codes += [_NO_OPERATION] * (MAX_OPERANDS - 1 - len(op_codes))
+
+        width = mask = 0
+        offset = len(self.columnar_digits)
+        if question.question_type == "columnar":
+            rows = question.columnar_operands + [question.columnar_result_placeholders]
+            width = len(rows[0])
+            for r, row in enumerate(rows):
+                for c, digit in enumerate(row):
+                    if digit is None:
+                        mask |= 1 << (r * width + c)
+                    self.columnar_digits.append(digit or 0)
+
+        self.records += _RECORD.pack(
+            question.id.bytes, *operands, *op_codes,
+            _QUESTION_TYPES.index(question.question_type), *_answer_fields(question),
+            width, mask, offset
+        )
+
+    def _set_answer(self, index: int, question: Question) -> None:
+        """Rewrites the answer fields of the record at `index`; the rest of a question does not change once issued."""
+        if (self.overflow and index in self.overflow) or not self._packable(question):
+            if self.overflow is None:
+                self.overflow = {}
+            self.overflow[index] = question.model_copy(deep=True)
+            return
+        _ANSWER_FIELDS.pack_into(self.records, index * _RECORD.size + _ANSWER_FIELDS_OFFSET, *_answer_fields(question))
+
+    # --- unpacking ---
+
+    def question(self, index: int) -> Question:
+        """Builds the pydantic Question at `index`."""
+        if self.overflow and index in self.overflow:
+            return self.overflow[index].model_copy(deep=True)
+
+        (id_bytes, operand1, operand2, operand3, op_code1, op_code2, type_code, flags, correct_answer,
+         user_answer, time_spent, created_at, answered_at, width, mask, offset) = _RECORD.unpack_from(self.records, index * _RECORD.size)
+        operations = [_OPERATION_SYMBOLS[code] for code in (op_code1, op_code2) if code != _NO_OPERATION]
+        operands = [operand1, operand2, operand3][:len(operations) + 1]
+        question_type = _QUESTION_TYPES[type_code]
+
+        columnar_operands = columnar_result = columnar_operation = None
+        if question_type == "columnar":
+            rows = []
+            for r in range(3):
+                row = list(self.columnar_digits[offset + r * width:offset + (r + 1) * width])
+                for c in range(width):
+                    if mask >> (r * width + c) & 1:
+                        row[c] = None
+                rows.append(row)
+            columnar_operands, columnar_result = rows[:2], rows[2]
+            question_string = _columnar_string(rows, operations[0])
+            if flags & _HAS_COLUMNAR_OPERATION:
+                columnar_operation = operations[0]
+        else:
+            question_string = _arithmetic_string(operands, operations)
+
+        # Trusted data packed from valid Questions, so skip validation
+        return Question.model_construct(
+            id=UUID(bytes=id_bytes),
+            session_id=self.id,
+            operands=operands,
+            operations=operations,
+            question_string=question_string,
+            correct_answer=correct_answer if flags & _HAS_CORRECT_ANSWER else None,
+            difficulty_level_id=self.difficulty_level_id,
+            question_type=question_type,
+            columnar_operands=columnar_operands,
+            columnar_result_placeholders=columnar_result,
+            columnar_operation=columnar_operation,
+            created_at=from_micros(created_at),
+            user_answer=user_answer if flags & _HAS_USER_ANSWER else None,
+            is_correct=bool(flags & _IS_CORRECT) if flags & _IS_CORRECT_SET else None,
+            time_spent=time_spent if flags & _HAS_TIME_SPENT else None,
+            answered_at=from_micros(answered_at) if flags & _HAS_ANSWERED_AT else None
+        )
+
+    def to_session(self) -> PracticeSession:
+        """Builds the full PracticeSession model."""
+        return PracticeSession.model_construct(
+            id=self.id,
+            user_id=self.user_id,
+            difficulty_level_id=self.difficulty_level_id,
+            total_questions_planned=self.total_questions_planned,
+            questions=[self.question(i) for i in range(self.count)],
+            current_question_index=self.current_question_index,
+            score=self.score,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            difficulty_level_details=self.difficulty_level_details,
+            seed=self.seed
+        )
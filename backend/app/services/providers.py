@@ -0,0 +1,70 @@
+"""
+The LLM and TTS services, created on first use.
+
+Building them at import time meant that importing the API modules loaded the OpenAI
+and Azure Speech SDKs (most of a worker's boot time) and built clients before .env
+was loaded. It also failed the whole import when a provider was not configured. The
+endpoints call get_llm_service() / get_tts_service() instead. The SDK is imported and
+the client built once, on the first call, and a provider that is not configured only
+fails the requests that need it: /help falls back to canned help and the voice
+endpoints answer 503. warm_up() builds both at startup for workers that would rather
+pay the cost before the first request (SERVICES_WARMUP=1).
+"""
+import logging
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from app.services.llm_service import LLMService
+    from app.services.tts_service import TTSService
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()  # warm_up() runs in a thread while requests may already be arriving
+_llm_service: Optional["LLMService"] = None
+_tts_service: Optional["TTSService"] = None
+
+
+def get_llm_service() -> "LLMService":
+    """The shared LLMService; raises (e.g. openai.OpenAIError) when QWEN_API_KEY is not set."""
+    global _llm_service
+    if _llm_service is None:
+        with _lock:
+            if _llm_service is None:
+                from app.services.llm_service import LLMService
+                _llm_service = LLMService()
+    return _llm_service
+
+
+def get_tts_service() -> "TTSService":
+    """The shared TTSService; raises ValueError when the Azure Speech credentials are not set."""
+    global _tts_service
+    if _tts_service is None:
+        with _lock:
+            if _tts_service is None:
+                from app.services.tts_service import TTSService
+                _tts_service = TTSService()
+    return _tts_service
+
+
+def set_llm_service(service: Optional["LLMService"]) -> Optional["LLMService"]:
+    """Replaces the shared LLMService (stand-ins in tests and benchmarks); returns the previous one."""
+    global _llm_service
+    previous, _llm_service = _llm_service, service
+    return previous
+
+
+def set_tts_service(service: Optional["TTSService"]) -> Optional["TTSService"]:
+    """Replaces the shared TTSService (stand-ins in tests and benchmarks); returns the previous one."""
+    global _tts_service
+    previous, _tts_service = _tts_service, service
+    return previous
+
+
+def warm_up() -> None:
+    """Builds both services now; one that is not configured is logged and left for first use."""
+    for name, get_service in (("LLM", get_llm_service), ("TTS", get_tts_service)):
+        try:
+            get_service()
+        except Exception as e:
+            logger.warning(f"{name} service not available, help falls back until it is configured: {e}")
@@ -0,0 +1,173 @@
+"""
+Background pools of ready-made questions, one per difficulty level.
+
+Each level gets a bounded ring buffer of questions produced by the vectorized batch
+generator. A background asyncio task tops a buffer back up whenever it drops below its
+low-water mark, so /question only pops a question and stamps it with the session's ids
+instead of running the arithmetic or columnar generator inline. When a level's pool is
+empty, or holds nothing the session has not seen, take() returns None and the caller
+generates the question itself.
+
+start() returns at once: the first fill runs in the same background task, so the app
+starts serving while the pools fill, and /question generates inline until they do.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional
+from uuid import UUID, uuid4
+from datetime import datetime
+from app.models.difficulty import DifficultyLevel
+from app.models.practice import Question
+from app.services.batch_question_service import generate_questions_batch
+
+logger = logging.getLogger(__name__)
+
+_TEMPLATE_SESSION_ID = UUID(int=0)  # session id of pooled questions until they are taken
+
+DEFAULT_CAPACITY = 512
+DEFAULT_LOW_WATER = 128
+MAX_SCAN = 8  # pooled questions inspected per take() before giving up on this pool
+
+
+class _LevelPool:
+    __slots__ = ("level", "buffer", "refilled_total", "last_refill_count", "last_refill_seconds", "misses")
+
+    def __init__(self, level: DifficultyLevel, capacity: int):
+        self.level = level
+        self.buffer: Deque[Question] = deque(maxlen=capacity)
+        self.refilled_total = 0
+        self.last_refill_count = 0
+        self.last_refill_seconds = 0.0
+        self.misses = 0  # take() calls that fell back to inline generation
+
+
+class QuestionPool:
+    """Per-level question ring buffers kept full by a background refill task."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, low_water: int = DEFAULT_LOW_WATER):
+        if not 0 < low_water <= capacity:
+            raise ValueError("low_water must be between 1 and capacity")
+        self.capacity = capacity
+        self.low_water = low_water
+        self._pools: Dict[int, _LevelPool] = {}
+        self._refill_needed: Optional[asyncio.Event] = None
+        self._filled: Optional[asyncio.Event] = None  # set once the first fill has run
+        self._task: Optional[asyncio.Task] = None
+        self._started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the first fill of every level's pool has run."""
+        return self._filled is not None and self._filled.is_set()
+
+    def start(self, levels: Iterable[DifficultyLevel]) -> None:
+        """Starts the background task that fills every level's pool and keeps it topped up."""
+        if self.running:
+            return
+        self._pools = {level.id: _LevelPool(level, self.capacity) for level in levels}
+        self._refill_needed = asyncio.Event()
+        self._refill_needed.set()  # the first pass fills every pool
+        self._filled = asyncio.Event()
+        self._started_at = time.monotonic()
+        self._task = asyncio.create_task(self._refill_loop(), name="question-pool-refill")
+
+    async def wait_ready(self) -> None:
+        """Waits for the first fill started by start()."""
+        await self._filled.wait()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._pools = {}
+        self._filled = None
+
+    def take(self, level_id: int, session_id: UUID, accept: Callable[[Question], bool]) -> Optional[Question]:
+        """
+        Pops a pooled question that `accept` (the session's duplicate check) allows and
+        stamps it with the session's id. Rejected questions go back to the pool for other
+        sessions. Returns None if the pool is not running, empty or has nothing acceptable.
+        """
+        pool = self._pools.get(level_id)
+        if pool is None:
+            return None
+        buffer = pool.buffer
+        taken = None
+        for _ in range(min(MAX_SCAN, len(buffer))):
+            candidate = buffer.popleft()
+            if accept(candidate):
+                taken = candidate
+                break
+            buffer.append(candidate)
+
+        if len(buffer) < self.low_water and self._refill_needed is not None:
+            self._refill_needed.set()
+        if taken is None:
+            pool.misses += 1
+            return None
+
+        taken.id = uuid4()
+        taken.session_id = session_id
+        taken.created_at = datetime.utcnow()
+        return taken
+
+    def depth(self, level_id: int) -> int:
+        pool = self._pools.get(level_id)
+        return len(pool.buffer) if pool else 0
+
+    def stats(self) -> Dict[int, Dict[str, float]]:
+        """Per-level depth, refill totals and rates (questions per second)."""
+        uptime = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        stats = {}
+        for level_id, pool in self._pools.items():
+            stats[level_id] = {
+                "depth": len(pool.buffer),
+                "capacity": self.capacity,
+                "low_water": self.low_water,
+                "refilled_total": pool.refilled_total,
+                "refill_rate": pool.refilled_total / uptime if uptime > 0 else 0.0,
+                "last_refill_rate": pool.last_refill_count / pool.last_refill_seconds if pool.last_refill_seconds > 0 else 0.0,
+                "misses": pool.misses
+            }
+        return stats
+
+    async def _refill_loop(self) -> None:
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+            try:
+                await self._refill_low_pools()
+            except Exception:
+                logger.exception("Question pool refill failed")
+            self._filled.set()
+
+    async def _refill_low_pools(self) -> None:
+        for pool in list(self._pools.values()):
+            missing = self.capacity - len(pool.buffer)
+            if len(pool.buffer) >= self.low_water or missing <= 0:
+                continue
+            started = time.perf_counter()
+            # NumPy generation and pydantic materialization run off the event loop
+            questions = await asyncio.to_thread(_generate_templates, pool.level, missing)
+            pool.buffer.extend(questions)
+            pool.last_refill_count = len(questions)
+            pool.last_refill_seconds = time.perf_counter() - started
+            pool.refilled_total += len(questions)
+
+
+def _generate_templates(level: DifficultyLevel, count: int) -> List[Question]:
+    return generate_questions_batch(level, count).to_questions(_TEMPLATE_SESSION_ID)
+
+
+# Shared instance, started and stopped by the app lifespan in main.py
+question_pool = QuestionPool()
@@ -0,0 +1,73 @@
+"""
+Canonical question signatures for session-wide duplicate avoidance.
+
+A signature identifies what the student actually sees: question type, operands,
+operations and, for columnar questions, which digits are blanked. Each session keeps
+a hash map from signature to the index where it was last issued, so duplicate checks
+are O(1) across the whole session and, once a level's question space is used up,
+the generator can repeat the least recently seen question instead of spinning.
+"""
+from typing import Dict, Hashable, List, Optional, Tuple
+from app.models.practice import PracticeSession, Question
+
+QuestionSignature = Tuple[Hashable, ...]
+
+
+def arithmetic_signature(operands: List[int], operations: List[str]) -> QuestionSignature:
+    return ("arithmetic", tuple(operands), tuple(operations))
+
+
+def _blank_layout(question: Question) -> int:
+    """Bitmask of blanked cells, row by row (operands first, then the result row)."""
+    rows = list(question.columnar_operands or [])
+    rows.append(question.columnar_result_placeholders or [])
+    mask, bit = 0, 0
+    for row in rows:
+        for digit in row:
+            if digit is None:
+                mask |= 1 << bit
+            bit += 1
+    return mask
+
+
+def question_signature(question: Question) -> QuestionSignature:
+    if question.question_type == "columnar":
+        return ("columnar", tuple(question.operands), tuple(question.operations), _blank_layout(question))
+    return arithmetic_signature(question.operands, question.operations)
+
+
+class SessionSignatures:
+    """Signature -> last issued index for one session, kept in sync with session.questions."""
+    __slots__ = ("last_seen", "type_counts", "covered")
+
+    def __init__(self):
+        self.last_seen: Dict[QuestionSignature, int] = {}
+        self.type_counts: Dict[str, int] = {}
+        self.covered = 0  # number of session questions already recorded
+
+    def sync(self, questions: List[Question]) -> None:
+        if self.covered > len(questions):  # questions were replaced; start over
+            self.__init__()
+        for index in range(self.covered, len(questions)):
+            self.record(question_signature(questions[index]), index)
+        self.covered = len(questions)
+
+    def record(self, signature: QuestionSignature, index: int) -> None:
+        if signature not in self.last_seen:
+            self.type_counts[signature[0]] = self.type_counts.get(signature[0], 0) + 1
+        self.last_seen[signature] = index
+
+    def last_seen_index(self, signature: QuestionSignature) -> Optional[int]:
+        return self.last_seen.get(signature)
+
+    def distinct_count(self, question_type: str) -> int:
+        return self.type_counts.get(question_type, 0)
+
+
+def session_signatures(session: PracticeSession) -> SessionSignatures:
+    """Returns the session's signature map, building or catching it up lazily."""
+    signatures = session._signatures
+    if signatures is None:
+        signatures = session._signatures = SessionSignatures()
+    signatures.sync(session.questions)
+    return signatures
@@ -0,0 +1,281 @@
+"""
+Compact storage for seed-based practice sessions.
+
+Every PracticeSession carries an RNG seed and its questions are generated from
+(seed, question index, difficulty level) only. A session started with
+compact_storage=True therefore keeps just the seed, how many questions were issued
+and the per-question answer state in small typed arrays. The full PracticeSession,
+questions included, is rebuilt deterministically whenever an endpoint needs it.
+
+Regenerating every question on every load would make each request O(questions issued),
+so RebuiltQuestionCache keeps the questions of recently loaded sessions: a load copies
+them and only generates the questions issued since the last one. Likewise a save does
+not rebuild the arrays: update() appends the new questions and overwrites the answers
+given since the last save.
+"""
+import hashlib
+import json
+import math
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+from uuid import UUID
+from app.models.difficulty import DifficultyLevel
+from app.models.practice import PracticeSession, Question
+
+_EPOCH = datetime(1970, 1, 1)
+_HEADER_LENGTH = struct.Struct("<I")
+
+# answer_state values
+_UNANSWERED = 0
+_WRONG = 1
+_CORRECT = 2
+_GRADE = 3
+_NO_USER_ANSWER = 4  # flag: graded without a user_answer
+
+# Regenerates a session's questions from its seed until it holds `count` of them
+QuestionRebuilder = Callable[[PracticeSession, int], None]
+
+DEFAULT_REBUILT_SESSIONS = 1024
+
+
+def dump_session_json(session: PracticeSession) -> bytes:
+    """
+    A full session as JSON, seed included. The seed is left out of the model's own JSON
+    (the API responses), so stores that keep sessions as JSON use this pair instead.
+    """
+    return b'{"seed":%d,' % session.seed + session.model_dump_json().encode()[1:]
+
+
+def load_session_json(data: bytes) -> PracticeSession:
+    return PracticeSession.model_validate_json(data)
+
+
+def seeded_question_id(seed: int, index: int) -> UUID:
+    """Deterministic question id for the index-th question of a seeded session."""
+    digest = hashlib.blake2b(f"{seed}:{index}".encode(), digest_size=16).digest()
+    return UUID(bytes=digest, version=4)
+
+
+def to_micros(value: datetime) -> int:
+    """Naive UTC datetime -> microseconds since the epoch."""
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class RebuiltQuestionCache:
+    """
+    Regenerated questions of the most recently loaded compact sessions, least recently
+    used evicted first. The cached questions carry no answer state; sessions get shallow
+    copies of them, since only the answer fields and created_at are ever assigned.
+    """
+
+    def __init__(self, max_sessions: int = DEFAULT_REBUILT_SESSIONS):
+        self.max_sessions = max_sessions
+        self._entries: "OrderedDict[UUID, Tuple[int, List[Question]]]" = OrderedDict()
+        self._lock = threading.Lock()  # the event log also rebuilds sessions in a worker thread
+
+    def get(self, session_id: UUID, seed: int) -> List[Question]:
+        """The cached questions of the session, in order (empty if none are cached)."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry[0] != seed:
+                return []
+            self._entries.move_to_end(session_id)
+            return entry[1]
+
+    def put(self, session_id: UUID, seed: int, questions: List[Question]) -> None:
+        with self._lock:
+            self._entries[session_id] = (seed, questions)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SeededSessionState:
+    """Seed, progress and answer arrays of one session; questions are not stored."""
+    __slots__ = (
+        "id", "user_id", "difficulty_level_id", "total_questions_planned", "seed",
+        "current_question_index", "score", "start_time", "end_time",
+        "issued_at", "answer_state", "user_answers", "time_spent", "answered_at"
+    )
+
+    def __init__(self, session: PracticeSession):
+        self.id = session.id
+        self.difficulty_level_id = session.difficulty_level_id
+        self.seed = session.seed
+        self._copy_fields(session)
+        self._rebuild_arrays(session.questions)
+
+    def _copy_fields(self, session: PracticeSession) -> None:
+        self.user_id = session.user_id
+        self.total_questions_planned = session.total_questions_planned
+        self.current_question_index = session.current_question_index
+        self.score = session.score
+        self.start_time = session.start_time
+        self.end_time = session.end_time
+
+    def _rebuild_arrays(self, questions: List[Question]) -> None:
+        self.issued_at = array("q")       # question created_at, microseconds since epoch
+        self.answer_state = bytearray()   # _UNANSWERED / _WRONG / _CORRECT
+        self.user_answers = array("q")    # only meaningful when answered
+        self.time_spent = array("d")      # NaN when not recorded
+        self.answered_at = array("q")     # microseconds since epoch, -1 when unanswered
+        for question in questions:
+            self.append(question)
+
+    def append(self, question: Question) -> None:
+        """Records a newly issued question (and its answer, if it has one)."""
+        self.issued_at.append(to_micros(question.created_at))
+        self.answer_state.append(_UNANSWERED)
+        self.user_answers.append(0)
+        self.time_spent.append(math.nan)
+        self.answered_at.append(-1)
+        self._set_answer(len(self.answer_state) - 1, question)
+
+    def _set_answer(self, index: int, question: Question) -> None:
+        self.set_answer(index, question.user_answer, question.is_correct, question.time_spent, question.answered_at)
+
+    def set_answer(
+        self,
+        index: int,
+        user_answer: Optional[int],
+        is_correct: Optional[bool],
+        time_spent: Optional[float],
+        answered_at: Optional[datetime]
+    ) -> None:
+        """Sets the answer fields of the index-th question."""
+        if user_answer is None and is_correct is None:
+            self.answer_state[index] = _UNANSWERED
+        else:
+            self.answer_state[index] = (_CORRECT if is_correct else _WRONG) | (_NO_USER_ANSWER if user_answer is None else 0)
+        self.user_answers[index] = user_answer if user_answer is not None else 0
+        self.time_spent[index] = time_spent if time_spent is not None else math.nan
+        self.answered_at[index] = to_micros(answered_at) if answered_at else -1
+
+    def update(self, session: PracticeSession, answered: Optional[Iterable[int]] = None) -> None:
+        """
+        Brings the state up to date with a later copy of the same session: its progress
+        fields, the answers at the `answered` positions and the questions issued since.
+        With answered=None (changes unknown) every question is read again.
+        """
+        self._copy_fields(session)
+        questions = session.questions
+        issued = self.questions_issued
+        if answered is None or len(questions) < issued:
+            self._rebuild_arrays(questions)
+            return
+        for index in answered:
+            if index < issued:
+                self._set_answer(index, questions[index])
+        for question in questions[issued:]:
+            self.append(question)
+
+    @property
+    def questions_issued(self) -> int:
+        return len(self.answer_state)
+
+    def to_bytes(self) -> bytes:
+        """Serializes the state: a length-prefixed JSON header followed by the raw answer arrays."""
+        header = json.dumps({
+            "id": str(self.id),
+            "user_id": self.user_id,
+            "difficulty_level_id": self.difficulty_level_id,
+            "total_questions_planned": self.total_questions_planned,
+            "seed": self.seed,
+            "current_question_index": self.current_question_index,
+            "score": self.score,
+            "start_time": to_micros(self.start_time),
+            "end_time": to_micros(self.end_time) if self.end_time else None,
+            "questions_issued": self.questions_issued
+        }, separators=(",", ":")).encode()
+        return b"".join((
+            _HEADER_LENGTH.pack(len(header)), header,
+            self.issued_at.tobytes(), bytes(self.answer_state), self.user_answers.tobytes(),
+            self.time_spent.tobytes(), self.answered_at.tobytes()
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SeededSessionState":
+        (header_length,) = _HEADER_LENGTH.unpack_from(data)
+        offset = _HEADER_LENGTH.size
+        header = json.loads(data[offset:offset + header_length])
+        offset += header_length
+
+        state = cls.__new__(cls)
+        state.id = UUID(header["id"])
+        state.user_id = header["user_id"]
+        state.difficulty_level_id = header["difficulty_level_id"]
+        state.total_questions_planned = header["total_questions_planned"]
+        state.seed = header["seed"]
+        state.current_question_index = header["current_question_index"]
+        state.score = header["score"]
+        state.start_time = from_micros(header["start_time"])
+        state.end_time = from_micros(header["end_time"]) if header["end_time"] is not None else None
+
+        count = header["questions_issued"]
+
+        def take(typecode: str) -> array:
+            nonlocal offset
+            values = array(typecode)
+            size = values.itemsize * count
+            values.frombytes(data[offset:offset + size])
+            offset += size
+            return values
+
+        state.issued_at = take("q")
+        state.answer_state = bytearray(data[offset:offset + count])
+        offset += count
+        state.user_answers = take("q")
+        state.time_spent = take("d")
+        state.answered_at = take("q")
+        return state
+
+    def to_session(
+        self,
+        level: Optional[DifficultyLevel],
+        rebuild_questions: QuestionRebuilder,
+        cache: Optional[RebuiltQuestionCache] = None
+    ) -> PracticeSession:
+        """
+        Rebuilds the full PracticeSession. Questions held by `cache` are copied; the rest
+        are regenerated from the seed and added to the cache.
+        """
+        issued = self.questions_issued
+        cached = cache.get(self.id, self.seed)[:issued] if cache is not None else []
+        session = PracticeSession(
+            id=self.id,
+            user_id=self.user_id,
+            difficulty_level_id=self.difficulty_level_id,
+            total_questions_planned=self.total_questions_planned,
+            seed=self.seed,
+            current_question_index=self.current_question_index,
+            score=self.score,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            difficulty_level_details=level,
+            questions=[question.model_copy() for question in cached]
+        )
+        rebuild_questions(session, issued)
+        if cache is not None and issued > len(cached):
+            cache.put(self.id, self.seed, cached + [q.model_copy() for q in session.questions[len(cached):]])
+
+        for i, question in enumerate(session.questions):
+            question.created_at = from_micros(self.issued_at[i])
+            state = self.answer_state[i]
+            if state != _UNANSWERED:
+                question.user_answer = None if state & _NO_USER_ANSWER else self.user_answers[i]
+                question.is_correct = state & _GRADE == _CORRECT
+                question.answered_at = from_micros(self.answered_at[i]) if self.answered_at[i] >= 0 else None
+            if not math.isnan(self.time_spent[i]):
+                question.time_spent = self.time_spent[i]
+        return session
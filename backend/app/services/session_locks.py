@@ -0,0 +1,68 @@
+"""
+Striped locks that serialize work on one practice session.
+
+A handler that loads a session, checks it and saves it back (for example /answer
+checking "already answered" before scoring) must not interleave with another handler
+doing the same to that session, or a double-tapped answer is scored twice. A lock per
+session would need its own lifecycle, so sessions are hashed onto a fixed table of
+locks instead: requests for the same session always share a lock, and requests for
+different sessions only wait on each other when their ids land on the same stripe.
+
+The request handlers all run on the event loop thread, so the locks are asyncio
+locks: a handler waiting for a stripe suspends instead of blocking the loop, and
+because the locks are not re-entrant, two coroutines of the loop exclude each other
+even across awaits. Code in an executor thread that needs a session's lock goes
+through the loop (asyncio.run_coroutine_threadsafe on a coroutine using hold()).
+Critical sections must stay short; do the slow work (LLM, TTS) outside, on a copy of
+the data taken under the lock.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+from uuid import UUID
+from app.services.metrics import session_lock_wait_seconds
+
+DEFAULT_STRIPES = 64
+
+
+class StripedLocks:
+    """A fixed table of non-reentrant asyncio locks indexed by session id."""
+
+    def __init__(self, stripes: int = DEFAULT_STRIPES):
+        if stripes <= 0:
+            raise ValueError("stripes must be positive")
+        self._stripes = stripes
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_locks: List[asyncio.Lock] = []
+
+    def __len__(self) -> int:
+        return self._stripes
+
+    def stripe(self, session_id: UUID) -> int:
+        return session_id.int % self._stripes
+
+    def lock_for(self, session_id: UUID) -> asyncio.Lock:
+        """The session's asyncio lock on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # asyncio locks belong to one loop; the app runs on one, tests start several
+            self._loop = loop
+            self._async_locks = [asyncio.Lock() for _ in range(self._stripes)]
+        return self._async_locks[self.stripe(session_id)]
+
+    @asynccontextmanager
+    async def hold(self, session_id: UUID) -> AsyncIterator[None]:
+        """Holds the session's lock for the block (on the event loop) and records how long it took to get it."""
+        lock = self.lock_for(session_id)
+        # Timed even when the lock looks free: queued waiters may still be granted it first
+        started = time.perf_counter()
+        await lock.acquire()
+        session_lock_wait_seconds.observe(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            lock.release()
+
+
+session_locks = StripedLocks()
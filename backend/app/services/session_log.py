@@ -0,0 +1,355 @@
+"""
+Append-only event log for in-memory practice sessions.
+
+With SESSION_LOG_PATH set, the in-memory store writes every session mutation to this
+log as a small binary record, and the app rebuilds its sessions from the log at
+startup. That gives crash recovery without a database round trip on every /answer.
+
+Each record is a header (_HEADER) plus a payload:
+
+- START      the whole session: SeededSessionState bytes for compact sessions, JSON
+             otherwise (also written for every live session by compaction),
+- QUESTION   a question appended to the session, as JSON,
+- ANSWER     a question's answer fields (_ANSWER),
+- STATE      score, current question index and end time (_STATE),
+- DELETE     the session was removed or evicted.
+
+The header carries a CRC32 of the record, so a record torn by a crash is detected and
+the log is truncated back to the last complete one.
+
+Writes are group-committed. Records go to the OS with one write() per save, so a crash
+of the process loses nothing. fsync runs on a background thread at most once per
+commit window (SESSION_LOG_COMMIT_MS) however many saves happened in it, so a power
+failure loses at most the last window.
+
+replay() memory-maps the file and folds the records into sessions. compact() rewrites
+the log as one START record per live session and can run in a worker thread while
+records keep being appended; records written meanwhile are copied over before the new
+file replaces the old one. Compaction folds compact sessions into their
+SeededSessionState without regenerating their questions, and copies and fsyncs the
+appended records outside the lock that save() takes, holding it only for the last few
+bytes and the file swap.
+"""
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from uuid import UUID
+from app.models.practice import PracticeSession, Question
+from app.services.seeded_session_store import SeededSessionState, dump_session_json, from_micros, load_session_json, to_micros
+
+logger = logging.getLogger(__name__)
+
+# Rebuilds a full session (questions included) from a compact state
+SessionRebuilder = Callable[[SeededSessionState], PracticeSession]
+# session id -> (session, compact); compact sessions stay SeededSessionState when folded without a rebuilder
+ReplayedSessions = Dict[UUID, Tuple[Union[PracticeSession, SeededSessionState], bool]]
+
+DEFAULT_COMMIT_WINDOW_SECONDS = 0.005
+# Compaction copies appended records outside the lock until at most this much is left
+_COMPACTION_LOCKED_TAIL_BYTES = 64 * 1024
+
+START, QUESTION, ANSWER, STATE, DELETE = 1, 2, 3, 4, 5
+
+# payload length, CRC32 of everything after this field, record type, session id
+_HEADER = struct.Struct("<IIB16s")
+# position, flags, user answer, time spent, answered_at (microseconds)
+_ANSWER = struct.Struct("<IBqdq")
+# score, current question index, end_time (microseconds, -1 for none)
+_STATE = struct.Struct("<iiq")
+
+_HAS_USER_ANSWER = 1
+_IS_CORRECT_SET = 2
+_IS_CORRECT = 4
+_HAS_TIME_SPENT = 8
+_HAS_ANSWERED_AT = 16
+
+
+def _micros(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return to_micros(value)
+
+
+def _record(record_type: int, session_id: UUID, payload: bytes = b"") -> bytes:
+    body = bytes((record_type,)) + session_id.bytes + payload
+    return _HEADER.pack(len(payload), zlib.crc32(body), record_type, session_id.bytes) + payload
+
+
+def _is_answered(question: Question) -> bool:
+    return question.user_answer is not None or question.is_correct is not None or question.answered_at is not None
+
+
+def _answer_payload(position: int, question: Question) -> bytes:
+    flags = 0
+    if question.user_answer is not None:
+        flags |= _HAS_USER_ANSWER
+    if question.is_correct is not None:
+        flags |= _IS_CORRECT_SET | (_IS_CORRECT if question.is_correct else 0)
+    if question.time_spent is not None:
+        flags |= _HAS_TIME_SPENT
+    if question.answered_at is not None:
+        flags |= _HAS_ANSWERED_AT
+    return _ANSWER.pack(
+        position, flags,
+        question.user_answer or 0,
+        question.time_spent or 0.0,
+        _micros(question.answered_at) if question.answered_at else 0
+    )
+
+
+def _apply_answer(session: Union[PracticeSession, SeededSessionState], payload: bytes) -> None:
+    position, flags, user_answer, time_spent, answered_at = _ANSWER.unpack(payload)
+    user_answer = user_answer if flags & _HAS_USER_ANSWER else None
+    is_correct = bool(flags & _IS_CORRECT) if flags & _IS_CORRECT_SET else None
+    time_spent = time_spent if flags & _HAS_TIME_SPENT else None
+    answered_at = from_micros(answered_at) if flags & _HAS_ANSWERED_AT else None
+    if isinstance(session, SeededSessionState):
+        session.set_answer(position, user_answer, is_correct, time_spent, answered_at)
+        return
+    question = session.questions[position]
+    question.user_answer = user_answer
+    question.is_correct = is_correct
+    question.time_spent = time_spent
+    question.answered_at = answered_at
+
+
+def _state(session: PracticeSession) -> Tuple[int, int, int]:
+    end_time = _micros(session.end_time) if session.end_time else -1
+    return session.score, session.current_question_index, end_time
+
+
+def _start_payload(session: PracticeSession, compact: bool) -> bytes:
+    if compact:
+        return b"\x01" + SeededSessionState(session).to_bytes()
+    return b"\x00" + dump_session_json(session)
+
+
+class LoggedState:
+    """What the log already holds for one session, so a save only writes what changed."""
+    __slots__ = ("question_count", "answered", "state")
+
+    def __init__(self, session: PracticeSession):
+        self.question_count = len(session.questions)
+        self.answered = bytearray(_is_answered(q) for q in session.questions)
+        self.state = _state(session)
+
+
+class SessionEventLog:
+    """The log file of one process; see the module docstring for the format."""
+
+    def __init__(self, path: str, commit_window: float = DEFAULT_COMMIT_WINDOW_SECONDS):
+        self.path = path
+        self.commit_window = commit_window
+        self._lock = threading.Lock()  # guards _fd, _size and file swaps
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        self._retired_fds: List[int] = []  # replaced by compaction, closed after the next sync
+        self._dirty = threading.Event()
+        self._closed = False
+        self._syncer: Optional[threading.Thread] = None
+        self.records_written = 0
+        self.syncs = 0
+
+    # --- writing ---
+
+    def log_start(self, session: PracticeSession, compact: bool) -> LoggedState:
+        self._append(_record(START, session.id, _start_payload(session, compact)))
+        return LoggedState(session)
+
+    def log_save(self, session: PracticeSession, logged: LoggedState, answered: Optional[Iterable[int]] = None) -> None:
+        """
+        Writes the records that bring the logged copy of the session up to date.
+        `answered` are the positions answered since the last save (as for
+        SessionStore.save); when None, every question is checked.
+        """
+        records = []
+        questions = session.questions
+        first_new = logged.question_count
+        for question in questions[first_new:]:
+            records.append(_record(QUESTION, session.id, question.model_dump_json().encode()))
+            logged.answered.append(_is_answered(question))  # the QUESTION record carries its answer
+        logged.question_count = len(questions)
+
+        positions = range(first_new) if answered is None else answered
+        for position in positions:
+            if position < first_new and not logged.answered[position] and _is_answered(questions[position]):
+                records.append(_record(ANSWER, session.id, _answer_payload(position, questions[position])))
+                logged.answered[position] = 1
+
+        state = _state(session)
+        if state != logged.state:
+            records.append(_record(STATE, session.id, _STATE.pack(*state)))
+            logged.state = state
+        if records:
+            self._append(b"".join(records), len(records))
+
+    def log_delete(self, session_id: UUID) -> None:
+        self._append(_record(DELETE, session_id))
+
+    def _append(self, data: bytes, count: int = 1) -> None:
+        with self._lock:
+            os.write(self._fd, data)
+            self._size += len(data)
+        self.records_written += count
+        self._dirty.set()
+
+    # --- group commit ---
+
+    def start(self) -> None:
+        """Starts the background thread that fsyncs once per commit window."""
+        if self._syncer is None:
+            self._syncer = threading.Thread(target=self._sync_loop, name="session-log-sync", daemon=True)
+            self._syncer.start()
+
+    def _sync_loop(self) -> None:
+        while not self._closed:
+            self._dirty.wait()
+            if self._closed:
+                break
+            time.sleep(self.commit_window)  # let the window fill up
+            self.sync()
+
+    def sync(self) -> None:
+        with self._lock:
+            self._dirty.clear()
+            fd, retired, self._retired_fds = self._fd, self._retired_fds, []
+        os.fsync(fd)
+        for old_fd in retired:
+            os.close(old_fd)
+        self.syncs += 1
+
+    def close(self) -> None:
+        self._closed = True
+        self._dirty.set()
+        if self._syncer is not None:
+            self._syncer.join()
+            self._syncer = None
+        self.sync()
+        os.close(self._fd)
+
+    # --- replay ---
+
+    def replay(self, rebuild_session: Optional[SessionRebuilder], end: Optional[int] = None) -> ReplayedSessions:
+        """
+        Rebuilds the sessions recorded in the first `end` bytes of the log (all of it by
+        default). A torn record at the end of the whole log is cut off. With
+        rebuild_session=None compact sessions are returned as their SeededSessionState.
+        """
+        with self._lock:
+            size = self._size if end is None else end
+        sessions: ReplayedSessions = {}
+        if size == 0:
+            return sessions
+        with mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ) as mapped:
+            good_end = _fold(memoryview(mapped)[:size], sessions, rebuild_session)
+        if end is None and good_end < size:
+            logger.warning("Session log %s has a torn record at byte %d; truncating", self.path, good_end)
+            with self._lock:
+                os.ftruncate(self._fd, good_end)
+                self._size = good_end
+        return sessions
+
+    # --- compaction ---
+
+    def compact(self) -> Tuple[int, int]:
+        """
+        Rewrites the log as one START record per live session. Safe to run in a worker
+        thread while records are appended. Returns the log size before and after.
+        """
+        with self._lock:
+            cut = self._size
+        sessions = self.replay(None, end=cut)
+
+        tmp_path = self.path + ".compact"
+        with open(tmp_path, "wb") as snapshot:
+            for value, compact in sessions.values():
+                payload = b"\x01" + value.to_bytes() if compact else _start_payload(value, False)
+                snapshot.write(_record(START, value.id, payload))
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+
+        new_fd = os.open(tmp_path, os.O_RDWR | os.O_APPEND)
+        # Copy and fsync what was appended meanwhile without blocking save(); only the
+        # bytes appended during the last copy are taken under the lock
+        copied = cut
+        while True:
+            with self._lock:
+                size = self._size
+            if size - copied <= _COMPACTION_LOCKED_TAIL_BYTES:
+                break
+            copied += self._copy_tail(new_fd, copied, size)
+            os.fsync(new_fd)
+
+        with self._lock:
+            self._copy_tail(new_fd, copied, self._size)
+            os.replace(tmp_path, self.path)
+            self._retired_fds.append(self._fd)
+            self._fd = new_fd
+            before, self._size = self._size, os.fstat(new_fd).st_size
+        self._dirty.set()  # the next group commit fsyncs the last bytes and closes the retired descriptor
+        return before, self._size
+
+    def _copy_tail(self, new_fd: int, start: int, end: int) -> int:
+        """Appends bytes [start, end) of the current log to `new_fd`; returns how many."""
+        tail = os.pread(self._fd, end - start, start) if end > start else b""
+        os.write(new_fd, tail)
+        return len(tail)
+
+
+def _fold(data: memoryview, sessions: ReplayedSessions, rebuild_session: Optional[SessionRebuilder]) -> int:
+    """Applies the records in `data` to `sessions`; returns where the last complete record ends."""
+    offset = 0
+    header_size = _HEADER.size
+    while offset + header_size <= len(data):
+        length, crc, record_type, raw_id = _HEADER.unpack_from(data, offset)
+        end = offset + header_size + length
+        if end > len(data):
+            break
+        payload = bytes(data[offset + header_size:end])
+        if zlib.crc32(bytes((record_type,)) + raw_id + payload) != crc:
+            break
+        _apply(record_type, UUID(bytes=raw_id), payload, sessions, rebuild_session)
+        offset = end
+    return offset
+
+
+def _apply(record_type: int, session_id: UUID, payload: bytes, sessions: ReplayedSessions, rebuild_session: Optional[SessionRebuilder]) -> None:
+    if record_type == START:
+        compact = payload[0] == 1
+        if compact:
+            session = SeededSessionState.from_bytes(payload[1:])
+            if rebuild_session is not None:
+                session = rebuild_session(session)
+        else:
+            session = load_session_json(payload[1:])
+        sessions[session_id] = (session, compact)
+        return
+    if record_type == DELETE:
+        sessions.pop(session_id, None)
+        return
+
+    entry = sessions.get(session_id)
+    if entry is None:
+        return  # the session's START was compacted away after it was deleted
+    session = entry[0]
+    if record_type == QUESTION:
+        question = Question.model_validate_json(payload)
+        if isinstance(session, SeededSessionState):
+            session.append(question)
+        else:
+            session.questions.append(question)
+    elif record_type == ANSWER:
+        _apply_answer(session, payload)
+    elif record_type == STATE:
+        score, current_question_index, end_time = _STATE.unpack(payload)
+        session.score = score
+        session.current_question_index = current_question_index
+        session.end_time = from_micros(end_time) if end_time >= 0 else None
+    else:
+        raise ValueError(f"Unknown session log record type {record_type}")
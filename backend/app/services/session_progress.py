@@ -0,0 +1,66 @@
+"""
+Incrementally maintained progress of a practice session.
+
+Instead of scanning session.questions on every request, each session keeps how many
+questions are answered, a per-question answered flag and a min-heap of open question
+positions. New questions are picked up lazily when the progress is next read, and
+submit_answer records each answer, so the endpoints' checks cost O(1) and finding the
+next unanswered question costs O(log n) amortized.
+"""
+import heapq
+from typing import List, Optional
+from app.models.practice import PracticeSession, Question
+
+
+def is_answered(question: Question) -> bool:
+    return question.user_answer is not None or question.is_correct is not None
+
+
+class SessionProgress:
+    """Answered count, answered flags and open positions for one session, kept in sync with session.questions."""
+    __slots__ = ("answered_count", "answered", "open_positions")
+
+    def __init__(self):
+        self.answered_count = 0
+        self.answered = bytearray()         # 1 per answered question, by position
+        self.open_positions: List[int] = []  # min-heap; answered positions are dropped lazily
+
+    @property
+    def covered(self) -> int:
+        return len(self.answered)
+
+    def sync(self, questions: List[Question]) -> None:
+        if self.covered > len(questions):  # questions were replaced; start over
+            self.__init__()
+        for position in range(self.covered, len(questions)):
+            if is_answered(questions[position]):
+                self.answered.append(1)
+                self.answered_count += 1
+            else:
+                self.answered.append(0)
+                heapq.heappush(self.open_positions, position)
+
+    def record_answer(self, position: int) -> None:
+        """Marks a question answered; recording the same position twice is a no-op."""
+        if not self.answered[position]:
+            self.answered[position] = 1
+            self.answered_count += 1
+
+    def next_unanswered(self) -> Optional[int]:
+        """Lowest open position, or None if every question so far is answered."""
+        heap = self.open_positions
+        while heap and self.answered[heap[0]]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def all_answered(self) -> bool:
+        return self.answered_count == self.covered
+
+
+def session_progress(session: PracticeSession) -> SessionProgress:
+    """Returns the session's progress, building or catching it up lazily."""
+    progress = session._progress
+    if progress is None:
+        progress = session._progress = SessionProgress()
+    progress.sync(session.questions)
+    return progress
@@ -0,0 +1,695 @@
+"""
+Pluggable storage for practice sessions.
+
+The practice endpoints load a session, mutate it and save it back through a
+SessionStore. Two backends ship with the app:
+
+- InMemorySessionStore keeps sessions in process memory (the default), packed into
+  PackedSession records so each costs a fraction of its pydantic form. The most
+  recently used sessions are also kept as live models, so a request to a hot session
+  neither rebuilds nor repacks it.
+- SQLiteSessionStore persists sessions in an embedded SQLite database in WAL mode.
+  Saves are buffered and written in one transaction per event-loop tick, on an executor
+  thread, so a burst of /answer calls costs a single commit and no request waits for
+  it. With synchronous=NORMAL a commit does not fsync; WAL checkpoints do.
+- SharedSessionStore uses the same database from several worker processes
+  (uvicorn --workers N). Writes go straight to the database and are optimistic: each
+  row carries a version, and a save made from a stale copy raises SessionConflictError
+  instead of overwriting another worker's change.
+
+Sessions started with compact storage are kept as a SeededSessionState by both
+backends and rebuilt into a full PracticeSession on load.
+
+The backend is chosen with the SESSION_STORE environment variable ("memory", "sqlite"
+or "shared"); SESSION_DB_PATH sets the SQLite database file. The in-memory store expires
+sessions idle for SESSION_TTL_SECONDS and keeps at most SESSION_MAX_ENTRIES, evicting
+the least recently used (0 disables either limit), and packs sessions into typed
+arrays unless SESSION_PACKED=0, keeping SESSION_LIVE_ENTRIES of them as live models
+(0 keeps none); sweep_periodically() removes
+expired sessions every SESSION_SWEEP_INTERVAL_SECONDS. With SESSION_LOG_PATH set, the
+in-memory store also records every change in an append-only event log (see
+services.session_log) and is rebuilt from it at startup.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+from uuid import UUID
+from app.models.practice import PracticeSession
+from app.services.metrics import session_evictions_total, session_write_conflicts_total
+from app.services.packed_session import PackedSession
+from app.services.seeded_session_store import SeededSessionState, dump_session_json, load_session_json
+from app.services.session_log import DEFAULT_COMMIT_WINDOW_SECONDS, LoggedState, SessionEventLog
+
+logger = logging.getLogger(__name__)
+
+# Rebuilds a full session (questions included) from a compact state
+SessionRebuilder = Callable[[SeededSessionState], PracticeSession]
+
+DEFAULT_SQLITE_PATH = "practice_sessions.db"
+DEFAULT_SESSION_TTL_SECONDS = 2 * 60 * 60  # idle time before an in-memory session expires
+DEFAULT_MAX_SESSIONS = 50_000  # in-memory sessions kept before the least recently used is evicted
+DEFAULT_LIVE_SESSIONS = 1024  # packed sessions also kept as live models
+DEFAULT_SWEEP_INTERVAL_SECONDS = 60
+
+
+class SessionConflictError(Exception):
+    """
+    A session was saved, deleted or evicted by someone else after it was loaded; reload
+    it (it may be gone) and apply the change again.
+    """
+
+    def __init__(self, session_id: UUID):
+        super().__init__(f"Practice session {session_id} was modified concurrently")
+        self.session_id = session_id
+
+
+class SessionStore(ABC):
+    """Where practice sessions live between requests."""
+
+    def __init__(self, rebuild_session: SessionRebuilder):
+        self._rebuild_session = rebuild_session
+
+    @abstractmethod
+    def add(self, session: PracticeSession, compact: bool = False) -> None:
+        """Stores a new session; compact sessions keep only their seed and answer state."""
+
+    @abstractmethod
+    def get(self, session_id: UUID) -> Optional[PracticeSession]:
+        """Returns the session, or None if it does not exist."""
+
+    @abstractmethod
+    def save(self, session: PracticeSession, answered: Optional[Iterable[int]] = None) -> None:
+        """
+        Writes a mutated session back, keeping the storage mode it was added with.
+        `answered` lists the positions of the questions answered since the session was
+        loaded (questions issued since are found by count), so stores that keep sessions
+        packed only update what changed; None means unknown and rewrites the session.
+        Raises SessionConflictError if the session was removed since it was loaded
+        (expired or evicted from memory) or, for stores shared between processes, if
+        it changed since it was loaded.
+        """
+
+    @abstractmethod
+    def delete(self, session_id: UUID) -> None:
+        ...
+
+    @abstractmethod
+    def version(self, session_id: UUID) -> Optional[int]:
+        """
+        A number that changes whenever the session is saved, for caching things derived
+        from it; None if the session does not exist.
+        """
+
+    @abstractmethod
+    def is_compact(self, session_id: UUID) -> bool:
+        ...
+
+    @abstractmethod
+    def __contains__(self, session_id: UUID) -> bool:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def flush(self) -> None:
+        """Writes out buffered saves; a no-op for stores that write through."""
+
+    def sweep(self) -> int:
+        """Removes expired sessions and returns how many; a no-op for stores without expiry."""
+        return 0
+
+    def close(self) -> None:
+        self.flush()
+
+
+class _Entry:
+    __slots__ = ("value", "compact", "last_access", "logged", "version", "live")
+
+    def __init__(self, value: Union[PracticeSession, PackedSession, SeededSessionState], compact: bool, last_access: float):
+        self.value = value
+        self.compact = compact
+        self.last_access = last_access
+        self.live: Optional[PracticeSession] = None  # the model requests use, while the session is hot
+        self.logged: Optional[LoggedState] = None  # what the event log holds, when there is one
+        self.version = 1
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Sessions in process memory, as a bounded cache. Full sessions are stored as
+    array-backed PackedSession records (or as the live objects with pack_sessions=False)
+    and turned back into pydantic models on load. Entries are kept in an OrderedDict in least-recently-used order, so
+    - every access moves its entry to the end (O(1)),
+    - the max_entries cap evicts from the front (O(1) per eviction),
+    - idle-TTL expiry pops expired entries from the front and stops at the first live
+      one, so a sweep costs O(expired entries), never a scan of the whole cache.
+    ttl_seconds=None or max_entries=None disables that limit.
+
+    The live_sessions most recently used packed or compact sessions also keep the model
+    that was last loaded or saved, and get() returns it as is: a hot session is not
+    rebuilt, and keeps the progress and signature caches attached to it. save() updates
+    the packed record in place from the positions it is given, so the record always
+    holds the saved state and a session that drops out of the live set is rebuilt
+    from it on its next load.
+
+    With an event log attached (attach_event_log), every add, save, delete and eviction
+    is also written to the log.
+    """
+
+    def __init__(
+        self,
+        rebuild_session: SessionRebuilder,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        pack_sessions: bool = True,
+        live_sessions: int = DEFAULT_LIVE_SESSIONS
+    ):
+        super().__init__(rebuild_session)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.pack_sessions = pack_sessions
+        self.live_sessions = live_sessions
+        self._clock = clock
+        self._entries: "OrderedDict[UUID, _Entry]" = OrderedDict()
+        self._live: "OrderedDict[UUID, _Entry]" = OrderedDict()  # entries holding a live model, LRU order
+        self.evictions: Dict[str, int] = {"ttl": 0, "lru": 0}
+        self.event_log: Optional[SessionEventLog] = None
+
+    def add(self, session: PracticeSession, compact: bool = False) -> None:
+        entry = self._insert(session, compact)
+        self._make_live(entry, session)
+        if self.event_log is not None:
+            entry.logged = self.event_log.log_start(session, compact)
+        self._enforce_capacity()
+
+    def _insert(self, session: PracticeSession, compact: bool) -> _Entry:
+        entry = self._entries[session.id] = _Entry(self._pack(session, compact), compact, self._clock())
+        self._entries.move_to_end(session.id)
+        return entry
+
+    def _enforce_capacity(self) -> None:
+        if self.max_entries is not None:
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest("lru")
+
+    def get(self, session_id: UUID) -> Optional[PracticeSession]:
+        entry = self._touch(session_id)
+        if entry is None:
+            return None
+        if entry.live is not None:
+            self._live.move_to_end(session_id)
+            return entry.live
+        if entry.compact:
+            session = self._rebuild_session(entry.value)
+        elif self.pack_sessions:
+            session = entry.value.to_session()
+        else:
+            return entry.value
+        self._make_live(entry, session)
+        return session
+
+    def save(self, session: PracticeSession, answered: Optional[Iterable[int]] = None) -> None:
+        if answered is not None:
+            answered = tuple(answered)  # read by both the record update and the event log
+        entry = self._touch(session.id)
+        if entry is None:
+            # Expired or evicted while the request was running. Adding it back would
+            # restart its version (stale cached summaries) and lose its storage mode, so
+            # the caller reloads instead and finds the session gone
+            raise SessionConflictError(session.id)
+        if entry.compact or self.pack_sessions:
+            entry.value.update(session, answered)
+            self._make_live(entry, session)
+        else:
+            entry.value = session
+        entry.version += 1
+        if self.event_log is not None:
+            self._log_save(entry, session, answered)
+
+    def delete(self, session_id: UUID) -> None:
+        self._live.pop(session_id, None)
+        if self._entries.pop(session_id, None) is not None and self.event_log is not None:
+            self.event_log.log_delete(session_id)
+
+    def version(self, session_id: UUID) -> Optional[int]:
+        entry = self._touch(session_id)
+        return entry.version if entry is not None else None
+
+    def is_compact(self, session_id: UUID) -> bool:
+        entry = self._entries.get(session_id)
+        return entry is not None and entry.compact
+
+    def __contains__(self, session_id: UUID) -> bool:
+        entry = self._entries.get(session_id)
+        return entry is not None and not self._is_expired(entry, self._clock())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def sweep(self) -> int:
+        """Evicts idle sessions from the LRU end; returns how many were removed."""
+        if self.ttl_seconds is None:
+            return 0
+        now = self._clock()
+        removed = 0
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if not self._is_expired(oldest, now):
+                break
+            self._evict_oldest("ttl")
+            removed += 1
+        return removed
+
+    def close(self) -> None:
+        super().close()
+        if self.event_log is not None:
+            self.event_log.close()
+            self.event_log = None
+
+    def attach_event_log(self, event_log: SessionEventLog) -> int:
+        """
+        Restores the sessions recorded in `event_log` and logs every later change to it.
+        Returns how many sessions were restored.
+        """
+        self.event_log = event_log
+        restored = event_log.replay(self._rebuild_session)
+        for session, compact in restored.values():
+            self._insert(session, compact).logged = LoggedState(session)
+        self._enforce_capacity()
+        event_log.start()
+        return len(restored)
+
+    def _log_save(self, entry: _Entry, session: PracticeSession, answered: Optional[Tuple[int, ...]]) -> None:
+        if entry.logged is None:  # stored before the log was attached
+            entry.logged = self.event_log.log_start(session, entry.compact)
+        else:
+            self.event_log.log_save(session, entry.logged, answered)
+
+    def compact_event_log(self) -> None:
+        """Rewrites the event log down to the live sessions; run it in a worker thread."""
+        if self.event_log is None:
+            return
+        try:
+            before, after = self.event_log.compact()
+        except Exception:
+            logger.exception("Compacting session log %s failed", self.event_log.path)
+            return
+        logger.info("Compacted session log %s from %d to %d bytes", self.event_log.path, before, after)
+
+    def _pack(self, session: PracticeSession, compact: bool) -> Union[PracticeSession, PackedSession, SeededSessionState]:
+        if compact:
+            return SeededSessionState(session)
+        return PackedSession(session) if self.pack_sessions else session
+
+    def _make_live(self, entry: _Entry, session: PracticeSession) -> None:
+        """Keeps `session` as the entry's live model, dropping the least recently used past live_sessions."""
+        if self.live_sessions <= 0 or not (entry.compact or self.pack_sessions):
+            return
+        entry.live = session
+        self._live[session.id] = entry
+        self._live.move_to_end(session.id)
+        while len(self._live) > self.live_sessions:
+            _, coldest = self._live.popitem(last=False)
+            coldest.live = None
+
+    def _touch(self, session_id: UUID) -> Optional[_Entry]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        now = self._clock()
+        if self._is_expired(entry, now):
+            del self._entries[session_id]
+            self._count_eviction(session_id, "ttl")
+            return None
+        entry.last_access = now
+        self._entries.move_to_end(session_id)
+        return entry
+
+    def _is_expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl_seconds is not None and now - entry.last_access > self.ttl_seconds
+
+    def _evict_oldest(self, reason: str) -> None:
+        session_id, _ = self._entries.popitem(last=False)
+        self._count_eviction(session_id, reason)
+
+    def _count_eviction(self, session_id: UUID, reason: str) -> None:
+        self._live.pop(session_id, None)
+        self.evictions[reason] += 1
+        session_evictions_total.inc(reason)
+        if self.event_log is not None:
+            self.event_log.log_delete(session_id)
+
+
+# Statements are module constants so sqlite3's statement cache prepares each one once
+_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS practice_sessions (
+    id BLOB PRIMARY KEY,
+    compact INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID
+"""
+_ADD_VERSION_SQL = "ALTER TABLE practice_sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+_UPSERT_SQL = """
+INSERT INTO practice_sessions (id, compact, data, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET compact = excluded.compact, data = excluded.data, updated_at = excluded.updated_at,
+    version = practice_sessions.version + 1
+"""
+_INSERT_SQL = "INSERT INTO practice_sessions (id, compact, data, updated_at, version) VALUES (?, ?, ?, ?, 1)"
+_COMPARE_AND_SET_SQL = """
+UPDATE practice_sessions SET data = ?, updated_at = ?, version = version + 1
+WHERE id = ? AND version = ?
+"""
+_SELECT_SQL = "SELECT compact, data FROM practice_sessions WHERE id = ?"
+_SELECT_VERSIONED_SQL = "SELECT compact, data, version FROM practice_sessions WHERE id = ?"
+_SELECT_MODE_SQL = "SELECT compact FROM practice_sessions WHERE id = ?"
+_SELECT_VERSION_SQL = "SELECT version FROM practice_sessions WHERE id = ?"
+_DELETE_SQL = "DELETE FROM practice_sessions WHERE id = ?"
+_COUNT_SQL = "SELECT COUNT(*) FROM practice_sessions"
+
+
+# A queued row: (compact, data, save sequence number), or None for a queued delete
+_QueuedRow = Optional[Tuple[int, bytes, int]]
+_NOT_QUEUED = object()
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions persisted in SQLite (WAL mode). save() and delete() encode the change right
+    away and queue it; all changes queued during one event-loop tick are handed to an
+    executor thread and written there in a single transaction, on a connection of its
+    own, so the event loop never waits for SQLite's write path. Queued and in-flight
+    rows are served from memory until they are committed, and version() numbers them
+    with a per-store save counter instead of flushing. Outside a running event loop
+    changes are written immediately.
+    """
+
+    def __init__(self, rebuild_session: SessionRebuilder, path: str = DEFAULT_SQLITE_PATH):
+        super().__init__(rebuild_session)
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid = 0
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_pid = 0
+        self._db()
+        self._pending: Dict[UUID, _QueuedRow] = {}
+        self._writing: Dict[UUID, _QueuedRow] = {}  # handed to a write that has not committed (yet)
+        self._write_lock = threading.Lock()  # one write transaction at a time; guards _writing's swaps
+        self._write_in_flight = False
+        self._save_sequence = itertools.count(1)
+        self._flush_scheduled = False
+        self._flush_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.flushes = 0
+        self.rows_written = 0
+
+    def _db(self) -> sqlite3.Connection:
+        """The connection reads use; reopened on demand after close() or in a forked worker."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = self._connect()
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _writer_db(self) -> sqlite3.Connection:
+        """The connection buffered writes are committed on, from executor threads."""
+        if self._writer is None or self._writer_pid != os.getpid():
+            self._writer = self._connect()
+            self._writer_pid = os.getpid()
+        return self._writer
+
+    def _connect(self) -> sqlite3.Connection:
+        # Reads run on the event loop thread and buffered writes on executor threads;
+        # check_same_thread is off since neither connection stays on one thread.
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(_CREATE_TABLE_SQL)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(practice_sessions)")}
+        if "version" not in columns:  # database created before rows were versioned
+            conn.execute(_ADD_VERSION_SQL)
+        return conn
+
+    # --- encoding ---
+
+    @staticmethod
+    def _encode(session: PracticeSession, compact: bool) -> bytes:
+        if compact:
+            return SeededSessionState(session).to_bytes()
+        return dump_session_json(session)
+
+    def _decode(self, compact: int, data: bytes) -> PracticeSession:
+        """Decodes a row; the session remembers the row's mode for save()."""
+        if compact:
+            session = self._rebuild_session(SeededSessionState.from_bytes(data))
+        else:
+            session = load_session_json(data)
+        session._store_compact = bool(compact)
+        return session
+
+    def _mode_of(self, session: PracticeSession) -> bool:
+        if session._store_compact is None:  # not loaded through this store
+            session._store_compact = self.is_compact(session.id)
+        return session._store_compact
+
+    # --- SessionStore ---
+
+    def add(self, session: PracticeSession, compact: bool = False) -> None:
+        session._store_compact = compact
+        self._queue(session.id, (int(compact), self._encode(session, compact), next(self._save_sequence)))
+
+    def get(self, session_id: UUID) -> Optional[PracticeSession]:
+        queued = self._queued_row(session_id)
+        if queued is not _NOT_QUEUED:
+            return self._decode(queued[0], queued[1]) if queued is not None else None
+        row = self._db().execute(_SELECT_SQL, (session_id.bytes,)).fetchone()
+        if row is None:
+            return None
+        return self._decode(row[0], row[1])
+
+    def save(self, session: PracticeSession, answered: Optional[Iterable[int]] = None) -> None:
+        compact = self._mode_of(session)
+        self._queue(session.id, (int(compact), self._encode(session, compact), next(self._save_sequence)))
+
+    def delete(self, session_id: UUID) -> None:
+        self._queue(session_id, None)
+
+    def version(self, session_id: UUID) -> Optional[int]:
+        queued = self._queued_row(session_id)
+        if queued is not _NOT_QUEUED:
+            # Not committed yet: the save's sequence number, negative so it never equals a row version
+            return -queued[2] if queued is not None else None
+        row = self._db().execute(_SELECT_VERSION_SQL, (session_id.bytes,)).fetchone()
+        return row[0] if row else None
+
+    def is_compact(self, session_id: UUID) -> bool:
+        queued = self._queued_row(session_id)
+        if queued is not _NOT_QUEUED:
+            return queued is not None and bool(queued[0])
+        row = self._db().execute(_SELECT_MODE_SQL, (session_id.bytes,)).fetchone()
+        return bool(row and row[0])
+
+    def __contains__(self, session_id: UUID) -> bool:
+        queued = self._queued_row(session_id)
+        if queued is not _NOT_QUEUED:
+            return queued is not None
+        return self._db().execute(_SELECT_MODE_SQL, (session_id.bytes,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        count = self._db().execute(_COUNT_SQL).fetchone()[0]
+        for session_id, queued in {**self._writing, **self._pending}.items():
+            stored = self._db().execute(_SELECT_MODE_SQL, (session_id.bytes,)).fetchone() is not None
+            count += (queued is not None) - stored
+        return count
+
+    def flush(self) -> None:
+        """Writes every queued change now, in the calling thread."""
+        self._flush_scheduled = False
+        with self._write_lock:  # waits for a write in flight
+            rows, self._pending = {**self._writing, **self._pending}, {}
+            self._writing = rows
+            if rows:
+                self._write(rows)
+
+    def close(self) -> None:
+        self.flush()
+        for conn, pid in ((self._conn, self._conn_pid), (self._writer, self._writer_pid)):
+            if conn is not None and pid == os.getpid():
+                conn.close()
+        self._conn = self._writer = None
+
+    def _queued_row(self, session_id: UUID):
+        """The session's queued or in-flight row, None for a queued delete, _NOT_QUEUED if neither."""
+        if session_id in self._pending:
+            return self._pending[session_id]
+        return self._writing.get(session_id, _NOT_QUEUED)
+
+    def _queue(self, session_id: UUID, row: _QueuedRow) -> None:
+        self._pending[session_id] = row
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_scheduled and self._flush_loop is loop:
+            return
+        self._flush_scheduled = True
+        self._flush_loop = loop
+        loop.call_soon(self._start_flush)
+
+    def _start_flush(self) -> None:
+        """Hands the changes queued this tick to an executor thread (runs on the event loop)."""
+        self._flush_scheduled = False
+        if self._write_in_flight or not self._pending:
+            return  # a write in flight schedules the next one when it finishes
+        # Rows of a failed write are retried with the new ones, newer changes winning
+        rows, self._pending = {**self._writing, **self._pending}, {}
+        self._writing = rows
+        self._write_in_flight = True
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(None, self._write_in_background, rows, loop)
+
+    def _write_in_background(self, rows: Dict[UUID, _QueuedRow], loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            with self._write_lock:
+                if self._writing is rows:  # not already written by a flush()
+                    self._write(rows)
+        finally:
+            self._write_in_flight = False
+        if self._pending:
+            try:
+                loop.call_soon_threadsafe(self._start_flush)
+            except RuntimeError:
+                pass  # the loop is closed; close() writes the rest
+
+    def _write(self, rows: Dict[UUID, _QueuedRow]) -> None:
+        """Commits `rows` in one transaction; on failure they stay queued for the next flush."""
+        now = time.time()
+        upserts = [(session_id.bytes, row[0], row[1], now) for session_id, row in rows.items() if row is not None]
+        deletes = [(session_id.bytes,) for session_id, row in rows.items() if row is None]
+        db = self._writer_db()
+        try:
+            db.execute("BEGIN")
+            db.executemany(_UPSERT_SQL, upserts)
+            db.executemany(_DELETE_SQL, deletes)
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            logger.exception("Failed to write %d practice session change(s) to %s", len(rows), self.path)
+            return
+        self._writing = {}
+        self.flushes += 1
+        self.rows_written += len(rows)
+
+
+class SharedSessionStore(SQLiteSessionStore):
+    """
+    SQLite store shared by several worker processes. Nothing is buffered, so every
+    worker sees each save as soon as it returns. A loaded session remembers the row
+    version it was read at, and save() is a compare-and-set on that version: if another
+    worker saved the session in between, nothing is written and SessionConflictError is
+    raised so the caller can reload and re-apply its change.
+
+    Each process opens its own connection. WAL lets every worker read while one writes,
+    busy_timeout makes a writer wait for the write lock instead of failing, and the
+    database is memory-mapped so reads come from the OS page cache all workers share.
+    """
+    BUSY_TIMEOUT_MS = 5000
+    MMAP_SIZE = 256 * 1024 * 1024
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = super()._connect()
+        conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        return conn
+
+    def add(self, session: PracticeSession, compact: bool = False) -> None:
+        self._db().execute(_INSERT_SQL, (session.id.bytes, int(compact), self._encode(session, compact), time.time()))
+        session._store_compact = compact
+        session._store_version = 1
+
+    def delete(self, session_id: UUID) -> None:
+        self._db().execute(_DELETE_SQL, (session_id.bytes,))
+
+    def get(self, session_id: UUID) -> Optional[PracticeSession]:
+        row = self._db().execute(_SELECT_VERSIONED_SQL, (session_id.bytes,)).fetchone()
+        if row is None:
+            return None
+        session = self._decode(row[0], row[1])
+        session._store_version = row[2]
+        return session
+
+    def save(self, session: PracticeSession, answered: Optional[Iterable[int]] = None) -> None:
+        data = self._encode(session, self._mode_of(session))
+        cursor = self._db().execute(_COMPARE_AND_SET_SQL, (data, time.time(), session.id.bytes, session._store_version))
+        if cursor.rowcount == 0:
+            # Saved (or deleted) by another request since this copy was loaded
+            session_write_conflicts_total.inc()
+            raise SessionConflictError(session.id)
+        session._store_version += 1
+
+
+def _optional_number(name: str, default: Optional[float], cast: Callable[[str], float]) -> Optional[float]:
+    """Reads a numeric setting; an empty value or 0 disables the limit."""
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    value = cast(raw) if raw.strip() else 0
+    return value if value > 0 else None
+
+
+def create_session_store(rebuild_session: SessionRebuilder) -> SessionStore:
+    """Builds the store selected by SESSION_STORE ("memory" by default, "sqlite" or "shared")."""
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    if backend == "memory":
+        return InMemorySessionStore(
+            rebuild_session,
+            ttl_seconds=_optional_number("SESSION_TTL_SECONDS", DEFAULT_SESSION_TTL_SECONDS, float),
+            max_entries=_optional_number("SESSION_MAX_ENTRIES", DEFAULT_MAX_SESSIONS, int),
+            pack_sessions=os.getenv("SESSION_PACKED", "1") != "0",
+            live_sessions=int(os.getenv("SESSION_LIVE_ENTRIES", DEFAULT_LIVE_SESSIONS))
+        )
+    if backend == "sqlite":
+        return SQLiteSessionStore(rebuild_session, os.getenv("SESSION_DB_PATH", DEFAULT_SQLITE_PATH))
+    if backend == "shared":
+        return SharedSessionStore(rebuild_session, os.getenv("SESSION_DB_PATH", DEFAULT_SQLITE_PATH))
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
+
+
+def attach_event_log_from_env(store: SessionStore) -> Optional[SessionEventLog]:
+    """
+    Opens the event log at SESSION_LOG_PATH (if set) and restores the in-memory store
+    from it. SESSION_LOG_COMMIT_MS sets the group-commit window.
+    """
+    path = os.getenv("SESSION_LOG_PATH")
+    if not path:
+        return None
+    if not isinstance(store, InMemorySessionStore):
+        logger.warning("SESSION_LOG_PATH is only used with the in-memory session store; ignoring it")
+        return None
+    commit_window = float(os.getenv("SESSION_LOG_COMMIT_MS", DEFAULT_COMMIT_WINDOW_SECONDS * 1000)) / 1000
+    started = time.perf_counter()
+    restored = store.attach_event_log(SessionEventLog(path, commit_window))
+    logger.info("Restored %d practice session(s) from %s in %.2fs", restored, path, time.perf_counter() - started)
+    return store.event_log
+
+
+async def sweep_periodically(store: SessionStore, interval_seconds: float = DEFAULT_SWEEP_INTERVAL_SECONDS) -> None:
+    """Background task (started by the app lifespan) that expires idle sessions."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            removed = store.sweep()
+            if removed:
+                logger.info("Expired %d idle practice session(s)", removed)
+        except Exception:
+            logger.exception("Session sweep failed")
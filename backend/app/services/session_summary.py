@@ -0,0 +1,127 @@
+"""
+Aggregate summary of a practice session and a cache of its encoded form.
+
+The results page polls the summary while the session runs, and a full PracticeSession
+with every Question is most of that traffic. build_session_summary() reduces a session
+to its score, accuracy by operation and question type, time_spent statistics and
+duration. SummaryCache keeps the JSON bytes (with an ETag) per session together with
+the store version they were built from, so a poll re-encodes nothing until the session
+changes, and a client sending If-None-Match gets 304 with no body at all.
+"""
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from app.models.practice import AccuracyStats, PracticeSession, PracticeSessionSummary, Question, TimeSpentStats
+from app.services.difficulty_registry import EncodedResponse, encode_response
+from app.services.metrics import session_summary_cache_total
+
+DEFAULT_MAX_CACHED_SUMMARIES = 10_000
+
+_OPERATION_NAMES = {"+": "addition", "-": "subtraction"}
+
+
+def _operation_name(question: Question) -> str:
+    if question.question_type == "columnar" and question.columnar_operation:
+        operations = {question.columnar_operation}
+    else:
+        operations = set(question.operations)
+    if len(operations) == 1:
+        operation = operations.pop()
+        return _OPERATION_NAMES.get(operation, operation)
+    return "mixed"
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _count(stats: Dict[str, AccuracyStats], key: str, correct: bool) -> None:
+    entry = stats.get(key)
+    if entry is None:
+        entry = stats[key] = AccuracyStats()
+    entry.answered += 1
+    entry.correct += correct
+
+
+def _with_accuracy(stats: AccuracyStats) -> AccuracyStats:
+    stats.accuracy = stats.correct / stats.answered if stats.answered else None
+    return stats
+
+
+def build_session_summary(session: PracticeSession) -> PracticeSessionSummary:
+    """Aggregates of the session's answered questions; does not depend on the current time."""
+    by_operation: Dict[str, AccuracyStats] = {}
+    by_question_type: Dict[str, AccuracyStats] = {}
+    total = AccuracyStats()
+    times: List[float] = []
+    last_answered_at = None
+
+    for question in session.questions:
+        if question.is_correct is None:
+            continue
+        correct = bool(question.is_correct)
+        total.answered += 1
+        total.correct += correct
+        _count(by_operation, _operation_name(question), correct)
+        _count(by_question_type, question.question_type, correct)
+        if question.time_spent is not None:
+            times.append(question.time_spent)
+        if question.answered_at is not None and (last_answered_at is None or question.answered_at > last_answered_at):
+            last_answered_at = question.answered_at
+
+    time_spent = TimeSpentStats()
+    if times:
+        times.sort()
+        time_spent = TimeSpentStats(
+            count=len(times), mean=sum(times) / len(times),
+            p50=_percentile(times, 0.5), p90=_percentile(times, 0.9), max=times[-1]
+        )
+
+    finished_at = session.end_time or last_answered_at
+    return PracticeSessionSummary(
+        session_id=session.id,
+        difficulty_level_id=session.difficulty_level_id,
+        total_questions_planned=session.total_questions_planned,
+        questions_issued=len(session.questions),
+        answered=total.answered,
+        score=session.score,
+        accuracy=_with_accuracy(total).accuracy,
+        accuracy_by_operation={key: _with_accuracy(stats) for key, stats in sorted(by_operation.items())},
+        accuracy_by_question_type={key: _with_accuracy(stats) for key, stats in sorted(by_question_type.items())},
+        time_spent=time_spent,
+        start_time=session.start_time,
+        end_time=session.end_time,
+        duration_seconds=(finished_at - session.start_time).total_seconds() if finished_at else None,
+        completed=session.end_time is not None
+    )
+
+
+class SummaryCache:
+    """Encoded summaries per session, each valid for one store version; LRU-bounded."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_CACHED_SUMMARIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[UUID, Tuple[int, EncodedResponse]]" = OrderedDict()
+
+    def get(self, session_id: UUID, version: int) -> Optional[EncodedResponse]:
+        entry = self._entries.get(session_id)
+        if entry is None or entry[0] != version:
+            session_summary_cache_total.inc("miss")
+            return None
+        self._entries.move_to_end(session_id)
+        session_summary_cache_total.inc("hit")
+        return entry[1]
+
+    def put(self, session_id: UUID, version: int, summary: PracticeSessionSummary) -> EncodedResponse:
+        encoded = encode_response(summary.model_dump_json().encode())
+        self._entries[session_id] = (version, encoded)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return encoded
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,17 +1,19 @@
 import os
 import io
 import logging
-from typing import Dict, Any, AsyncGenerator, Generator
+from typing import Dict, Any, AsyncGenerator, Generator, Optional
 import azure.cognitiveservices.speech as speechsdk
 from app.models.practice import Question
 from app.services.llm_service import LLMService
+from app.services.metrics import llm_fallbacks_total
+from app.services.providers import get_llm_service
 
 logger = logging.getLogger(__name__)
 
 class TTSService:
     """Service for converting text to speech using Azure Cognitive Services"""
 
-    def __init__(self):
+    def __init__(self, llm_service: Optional[LLMService] = None):
         self.speech_key = os.getenv("AZURE_SPEECH_KEY")
         self.speech_region = os.getenv("AZURE_SPEECH_REGION")
         
@@ -33,7 +35,12 @@ class TTSService:
             speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
         )
         
-        self.llm_service = LLMService()
+        self._llm_service = llm_service
+
+    @property
+    def llm_service(self) -> LLMService:
+        """The LLM writing the spoken help: the one passed in, else the shared service."""
+        return self._llm_service if self._llm_service is not None else get_llm_service()
 
     def generate_voice_help(self, question: Question) -> bytes:
         """
@@ -156,11 +163,11 @@ class TTSService:
 6. 最后给出正确答案并鼓励孩子
 
 请直接输出语音讲解内容，不要包含任何格式标记："""
-        print("prompt", prompt)
+        logger.debug(f"Oral help prompt: {prompt}")
         try:
-            response = self.llm_service.client.chat.completions.create(
-                model=self.llm_service.model,
-                messages=[
+            response = self.llm_service.complete(
+                "oral_help",
+                [
                     {"role": "system", "content": "你是一位专业的小学数学老师，擅长用温和耐心的方式教导孩子数学。你的回答将通过语音播放，所以要特别注意口语化表达。"},
                     {"role": "user", "content": prompt}
                 ],
@@ -169,7 +176,7 @@ class TTSService:
             )
             
             content = response.choices[0].message.content.strip()
-            print("content", content)
+            logger.debug(f"Oral help content: {content}")
             # Ensure the content is suitable for TTS
             if len(content) < 20:  # Too short, might be an error
                 return self._generate_fallback_oral_help(question)
@@ -247,9 +254,9 @@ class TTSService:
 请直接输出语音讲解内容，不要包含任何格式标记："""
 
         try:
-            response = self.llm_service.client.chat.completions.create(
-                model=self.llm_service.model,
-                messages=[
+            response = self.llm_service.complete(
+                "oral_help",
+                [
                     {"role": "system", "content": "你是一位专业的小学数学老师，特别擅长教竖式计算。你的回答将通过语音播放，所以要特别注意口语化表达，就像面对面教孩子一样温和耐心。"},
                     {"role": "user", "content": prompt}
                 ],
@@ -271,6 +278,7 @@ class TTSService:
 
     def _generate_fallback_oral_help(self, question: Question) -> str:
         """Generate simple fallback help when LLM is not available"""
+        llm_fallbacks_total.inc("oral_help")
         
         if question.question_type == "columnar":
             operation_map = {
@@ -429,6 +437,3 @@ class TTSService:
                 return f"小朋友，这是一道{op_name}题。题目是{question.question_string}。我来教你怎么算。"
             else:
                 return f"小朋友，我来帮你解决这道计算题。让我们仔细看看。"
-
-# Create a singleton instance
-tts_service = TTSService() 
\ No newline at end of file
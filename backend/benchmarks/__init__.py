@@ -0,0 +1,2 @@
+# Benchmarks for the backend. Run a module directly, e.g.:
+#   python -m benchmarks.question_generation --output results.json
@@ -0,0 +1,49 @@
+"""Shared helpers for the benchmark modules: latency statistics and JSON output."""
+import json
+import math
+import platform
+import statistics
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def latency_summary(samples_seconds: List[float]) -> Dict[str, float]:
+    """Throughput and latency statistics (in microseconds) for per-call timings."""
+    samples = sorted(samples_seconds)
+    total = sum(samples)
+    return {
+        "count": len(samples),
+        "ops_per_sec": len(samples) / total if total > 0 else 0.0,
+        "mean_us": statistics.fmean(samples) * 1e6 if samples else 0.0,
+        "p50_us": percentile(samples, 0.50) * 1e6,
+        "p95_us": percentile(samples, 0.95) * 1e6,
+        "p99_us": percentile(samples, 0.99) * 1e6,
+        "max_us": samples[-1] * 1e6 if samples else 0.0
+    }
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+
+
+def write_results(results: Dict[str, Any], output: Optional[str]) -> None:
+    """Writes results as sorted, indented JSON (diff-friendly) to a file, or stdout when output is None."""
+    text = json.dumps(results, indent=2, sort_keys=True, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
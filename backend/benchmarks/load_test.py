@@ -0,0 +1,285 @@
+"""
+Load test for full practice flows.
+
+Runs many concurrent virtual students against the app, either in-process through
+httpx.ASGITransport or over a local socket served by uvicorn on the same event loop.
+Each student starts a session, answers N questions (GET /question, POST /answer), asks
+for help on some of them (POST /help, POST /voice-help-stream) and fetches the summary.
+llm_service and tts_service are replaced by stand-ins with a configurable latency, so
+the run measures the backend rather than the providers. Reports throughput,
+per-endpoint latency percentiles and event-loop lag for each student count; the largest
+count that keeps p99 latency and loop lag acceptable is what one worker holds.
+
+    python -m benchmarks.load_test --students 10 50 100 --questions 10 --output load.json
+    python -m benchmarks.load_test --transport socket --students 50 --think-time 1
+"""
+import argparse
+import asyncio
+import random
+import socket
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+import httpx
+import uvicorn
+
+from app.services.providers import set_llm_service, set_tts_service
+from benchmarks.common import environment, latency_summary, write_results
+from main import app
+
+DEFAULT_STUDENT_COUNTS = (10, 50, 100)
+DEFAULT_QUESTIONS = 10
+DEFAULT_LEVEL_ID = 6
+DEFAULT_HELP_RATE = 0.1
+DEFAULT_VOICE_RATE = 0.02
+DEFAULT_ERROR_RATE = 0.2
+DEFAULT_LLM_LATENCY = 0.5
+DEFAULT_TTS_LATENCY = 0.2
+DEFAULT_SEED = 20240601
+LAG_INTERVAL = 0.01
+PREFIX = "/api/v1/practice"
+TRANSPORTS = ("asgi", "socket")
+
+
+class StandInLLMService:
+    """Replaces llm_service: blocks its executor thread for `latency` and returns canned help."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_help_response(self, question) -> Dict[str, Any]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return {
+            "help_content": f"Help for {question.question_string}",
+            "thinking_process": "Work it out one step at a time.",
+            "solution_steps": ["Step one", "Step two"]
+        }
+
+
+class StandInTTSService:
+    """Replaces tts_service with `audio_bytes` of silence after `latency` seconds."""
+
+    def __init__(self, latency: float, audio_bytes: int = 32000, chunk_size: int = 16000):
+        self.latency = latency
+        self.audio_bytes = audio_bytes
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def generate_voice_help(self, question) -> bytes:
+        self.calls += 1
+        time.sleep(self.latency)
+        return bytes(self.audio_bytes)
+
+    def generate_voice_help_stream(self, question) -> Iterator[bytes]:
+        # Like TTSService's, this is a generator: the work happens while the endpoint
+        # iterates it, which is on the event loop, and the loop lag report shows it.
+        self.calls += 1
+        time.sleep(self.latency)
+        for offset in range(0, self.audio_bytes, self.chunk_size):
+            yield bytes(min(self.chunk_size, self.audio_bytes - offset))
+
+    generate_voice_help_stream_optimized = generate_voice_help_stream
+
+
+class _Recorder:
+    """Latency samples and failed responses per endpoint name."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[endpoint] += 1
+            return None
+        finally:
+            self.latencies[endpoint].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+            return None
+        return response
+
+
+def answer_payload(session_id: str, question: Dict[str, Any], correct: bool) -> Dict[str, Any]:
+    """An /answer body for a question as returned by /question, right or wrong."""
+    payload = {"session_id": session_id, "question_id": question["id"], "time_spent": 3.0}
+    if question["question_type"] == "columnar":
+        # The operands the puzzle was made from always complete it
+        width = len(question["columnar_result_placeholders"])
+        a, b = question["operands"][:2]
+        total = a + b if question["columnar_operation"] == "+" else a - b
+        payload["user_filled_operands"] = [[int(d) for d in str(n).zfill(width)] for n in (a, b)]
+        payload["user_filled_result"] = [int(d) for d in str(total).zfill(width)]
+        if not correct:
+            payload["user_filled_result"][-1] = (payload["user_filled_result"][-1] + 1) % 10
+    else:
+        payload["user_answer"] = question["correct_answer"] + (0 if correct else 1)
+    return payload
+
+
+async def _student(client: httpx.AsyncClient, recorder: _Recorder, rng: random.Random, config: Dict[str, Any]) -> bool:
+    """One start -> N x (question, answer) -> summary flow; True when it completed."""
+    started = await recorder.request(client, "start", "POST", f"{PREFIX}/start", json={
+        "difficulty_level_id": config["level_id"], "total_questions": config["questions"]
+    })
+    if started is None:
+        return False
+    session_id = started.json()["id"]
+    for _ in range(config["questions"]):
+        response = await recorder.request(client, "question", "GET", f"{PREFIX}/question", params={"session_id": session_id})
+        if response is None:
+            return False
+        question = response.json()
+        help_request = {"session_id": session_id, "question_id": question["id"]}
+        if rng.random() < config["help_rate"]:
+            await recorder.request(client, "help", "POST", f"{PREFIX}/help", json=help_request)
+        if rng.random() < config["voice_rate"]:
+            await recorder.request(client, "voice_help_stream", "POST", f"{PREFIX}/voice-help-stream", json=help_request)
+        if config["think_time"]:
+            await asyncio.sleep(rng.uniform(0, 2 * config["think_time"]))
+        correct = rng.random() >= config["error_rate"]
+        if await recorder.request(client, "answer", "POST", f"{PREFIX}/answer", json=answer_payload(session_id, question, correct)) is None:
+            return False
+    return await recorder.request(client, "summary", "GET", f"{PREFIX}/summary", params={"session_id": session_id}) is not None
+
+
+async def _monitor_loop_lag(samples: List[float]) -> None:
+    """Records how late each short sleep wakes up: time the loop spent unable to run callbacks."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - started - LAG_INTERVAL))
+
+
+@asynccontextmanager
+async def _client(transport: str) -> AsyncIterator[httpx.AsyncClient]:
+    """A client for the app, with the app's lifespan running for as long as it is open."""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(120.0)
+    if transport == "asgi":
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest",
+                                         limits=limits, timeout=timeout) as client:
+                yield client
+        return
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False))
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    try:
+        while not server.started:
+            if serving.done():
+                serving.result()  # surfaces the startup error
+            await asyncio.sleep(0.01)
+        port = sock.getsockname()[1]
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=timeout) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await serving
+        sock.close()
+
+
+async def _run_students(students: int, transport: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    recorder = _Recorder()
+    lag: List[float] = []
+    async with _client(transport) as client:
+        monitor = asyncio.create_task(_monitor_loop_lag(lag))
+        started = time.perf_counter()
+
+        async def student(index: int) -> bool:
+            rng = random.Random(config["seed"] * 1000003 + index)
+            if config["ramp"]:
+                await asyncio.sleep(config["ramp"] * index / students)
+            return await _student(client, recorder, rng, config)
+
+        completed = await asyncio.gather(*(student(i) for i in range(students)))
+        elapsed = time.perf_counter() - started
+        monitor.cancel()
+
+    requests = sum(len(samples) for samples in recorder.latencies.values())
+    return {
+        "students": students,
+        "completed_flows": sum(completed),
+        "elapsed_s": elapsed,
+        "requests": requests,
+        "requests_per_sec": requests / elapsed if elapsed else 0.0,
+        "flows_per_sec": sum(completed) / elapsed if elapsed else 0.0,
+        "errors": dict(recorder.errors),
+        "endpoints": {name: latency_summary(samples) for name, samples in sorted(recorder.latencies.items())},
+        "event_loop_lag": latency_summary(lag)
+    }
+
+
+def run(
+    student_counts: Sequence[int] = DEFAULT_STUDENT_COUNTS,
+    questions: int = DEFAULT_QUESTIONS,
+    transport: str = "asgi",
+    level_id: int = DEFAULT_LEVEL_ID,
+    help_rate: float = DEFAULT_HELP_RATE,
+    voice_rate: float = DEFAULT_VOICE_RATE,
+    error_rate: float = DEFAULT_ERROR_RATE,
+    llm_latency: float = DEFAULT_LLM_LATENCY,
+    tts_latency: float = DEFAULT_TTS_LATENCY,
+    think_time: float = 0.0,
+    ramp: float = 0.0,
+    seed: int = DEFAULT_SEED
+) -> Dict[str, Any]:
+    if transport not in TRANSPORTS:
+        raise ValueError(f"transport must be one of {TRANSPORTS}")
+    config = {
+        "questions": questions, "transport": transport, "level_id": level_id, "help_rate": help_rate,
+        "voice_rate": voice_rate, "error_rate": error_rate, "llm_latency": llm_latency,
+        "tts_latency": tts_latency, "think_time": think_time, "ramp": ramp, "seed": seed
+    }
+    llm, tts = StandInLLMService(llm_latency), StandInTTSService(tts_latency)
+    original_llm, original_tts = set_llm_service(llm), set_tts_service(tts)
+    try:
+        # A fresh event loop per step, as a freshly started worker would have
+        steps = [asyncio.run(_run_students(count, transport, config)) for count in student_counts]
+    finally:
+        set_llm_service(original_llm)
+        set_tts_service(original_tts)
+    return {
+        "benchmark": "load_test",
+        "environment": environment(),
+        "config": dict(config, student_counts=list(student_counts)),
+        "stand_in_calls": {"llm": llm.calls, "tts": tts.calls},
+        "steps": steps
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, nargs="+", default=list(DEFAULT_STUDENT_COUNTS),
+                        help="Concurrent students per step; one step per value")
+    parser.add_argument("--questions", type=int, default=DEFAULT_QUESTIONS)
+    parser.add_argument("--transport", choices=TRANSPORTS, default="asgi",
+                        help="asgi: in-process; socket: uvicorn on a local port")
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL_ID)
+    parser.add_argument("--help-rate", type=float, default=DEFAULT_HELP_RATE, help="Chance of POST /help per question")
+    parser.add_argument("--voice-rate", type=float, default=DEFAULT_VOICE_RATE, help="Chance of POST /voice-help-stream per question")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_ERROR_RATE, help="Chance of a wrong answer")
+    parser.add_argument("--llm-latency", type=float, default=DEFAULT_LLM_LATENCY, help="Seconds per stand-in LLM call")
+    parser.add_argument("--tts-latency", type=float, default=DEFAULT_TTS_LATENCY, help="Seconds per stand-in TTS call")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds a student thinks before answering")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which student starts are spread")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="JSON file to write (stdout when omitted)")
+    args = parser.parse_args()
+    write_results(run(
+        args.students, args.questions, args.transport, args.level, args.help_rate, args.voice_rate,
+        args.error_rate, args.llm_latency, args.tts_latency, args.think_time, args.ramp, args.seed
+    ), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Question generation benchmark.
+
+Runs generate_question_for_session, _generate_single_operand_pair and
+generate_columnar_question for every built-in difficulty level with fixed seeds and
+reports questions/sec, mean/p99 latency, the attempt-count distribution and how often
+the fallback path is taken. Results are written as JSON so runs can be diffed.
+
+    python -m benchmarks.question_generation --iterations 2000 --output before.json
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+from uuid import uuid4
+
+from app.api.endpoints import practice
+from app.api.endpoints.difficulty import difficulty_levels_objects
+from app.models.difficulty import DifficultyLevel
+from app.models.practice import PracticeSession
+from app.services import columnar_practice_service
+from app.services.operand_pair_index import get_operand_pair_index
+from benchmarks.common import environment, latency_summary, write_results
+
+DEFAULT_SEED = 20240601
+DEFAULT_ITERATIONS = 2000
+DEFAULT_SESSION_LENGTH = 10  # the /start default; duplicate checks only see this many questions
+
+
+class _CallRecorder:
+    """Counts calls to a wrapped module function and remembers their results."""
+
+    def __init__(self):
+        self.results: List[Any] = []
+
+    def reset(self) -> None:
+        self.results = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.results)
+
+
+@contextmanager
+def _record_calls(module: Any, name: str) -> Iterator[_CallRecorder]:
+    """Temporarily replaces module.name with a wrapper that records every call."""
+    original = getattr(module, name)
+    recorder = _CallRecorder()
+
+    def wrapper(*args, **kwargs):
+        result = original(*args, **kwargs)
+        recorder.results.append(result)
+        return result
+
+    setattr(module, name, wrapper)
+    try:
+        yield recorder
+    finally:
+        setattr(module, name, original)
+
+
+def _timed(call: Callable[[], Any], samples: List[float]) -> Any:
+    started = time.perf_counter()
+    result = call()
+    samples.append(time.perf_counter() - started)
+    return result
+
+
+def _report(samples: List[float], attempts: Counter, fallbacks: int) -> Dict[str, Any]:
+    report = latency_summary(samples)
+    report["attempts"] = {str(k): attempts[k] for k in sorted(attempts)}
+    report["fallback_rate"] = fallbacks / len(samples) if samples else 0.0
+    return report
+
+
+def bench_session_generator(level: DifficultyLevel, iterations: int, seed: int, session_length: int) -> Dict[str, Any]:
+    """generate_question_for_session over consecutive sessions, so duplicate avoidance is exercised."""
+    rng = random.Random(seed)
+    samples: List[float] = []
+    attempts: Counter = Counter()
+    fallbacks = 0
+    session = None
+    with _record_calls(practice, "_generate_arithmetic_attempt") as attempt_calls, \
+         _record_calls(practice, "_generate_fallback_question") as fallback_calls:
+        for i in range(iterations):
+            if i % session_length == 0:
+                session = PracticeSession(difficulty_level_id=level.id, difficulty_level_details=level, seed=seed + i)
+            attempt_calls.reset()
+            fallback_calls.reset()
+            question = _timed(lambda: practice.generate_question_for_session(session, rng), samples)
+            session.questions.append(question)
+            attempts[attempt_calls.calls] += 1
+            fallbacks += fallback_calls.calls > 0
+    return _report(samples, attempts, fallbacks)
+
+
+def bench_single_operand_pair(level: DifficultyLevel, iterations: int, seed: int) -> Dict[str, Any]:
+    """_generate_single_operand_pair per operation; an invalid step counts as a fallback."""
+    reports = {}
+    for op_type_word in level.operation_types:
+        rng = random.Random(seed)
+        samples: List[float] = []
+        invalid = 0
+        for _ in range(iterations):
+            _, _, _, is_valid = _timed(lambda: practice._generate_single_operand_pair(level, op_type_word, rng=rng), samples)
+            invalid += not is_valid
+        reports[op_type_word] = _report(samples, Counter({1: iterations}), invalid)
+    return reports
+
+
+def bench_columnar_generator(level: DifficultyLevel, iterations: int, seed: int) -> Dict[str, Any]:
+    """
+    generate_columnar_question; attempts are blank layouts checked for a unique solution,
+    and a fallback is a question that had to drop to a single blank.
+    """
+    rng = random.Random(seed)
+    session_id = uuid4()
+    samples: List[float] = []
+    attempts: Counter = Counter()
+    fallbacks = 0
+    with _record_calls(columnar_practice_service, "is_unambiguous") as layout_checks:
+        for _ in range(iterations):
+            layout_checks.reset()
+            _timed(lambda: columnar_practice_service.generate_columnar_question(level, session_id, rng), samples)
+            attempts[layout_checks.calls] += 1
+            fallbacks += layout_checks.calls > 0 and not any(layout_checks.results)
+    return _report(samples, attempts, fallbacks)
+
+
+def run(iterations: int = DEFAULT_ITERATIONS, seed: int = DEFAULT_SEED, session_length: int = DEFAULT_SESSION_LENGTH) -> Dict[str, Any]:
+    levels: Dict[str, Any] = {}
+    for level in difficulty_levels_objects:
+        get_operand_pair_index(level)  # table construction is a one-off cost; keep it out of the timings
+        level_results = {
+            "generate_question_for_session": bench_session_generator(level, iterations, seed, session_length),
+            "_generate_single_operand_pair": bench_single_operand_pair(level, iterations, seed)
+        }
+        if level.max_number > 9:
+            level_results["generate_columnar_question"] = bench_columnar_generator(level, iterations, seed)
+        levels[level.code] = level_results
+    return {
+        "benchmark": "question_generation",
+        "environment": environment(),
+        "config": {"iterations": iterations, "seed": seed, "session_length": session_length},
+        "levels": levels
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="questions per generator and level")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--session-length", type=int, default=DEFAULT_SESSION_LENGTH)
+    parser.add_argument("--output", help="JSON file to write (stdout when omitted)")
+    args = parser.parse_args()
+    write_results(run(args.iterations, args.seed, args.session_length), args.output)
+
+
+if __name__ == "__main__":
+    main()
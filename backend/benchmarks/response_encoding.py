@@ -0,0 +1,112 @@
+"""
+Response encoding benchmark.
+
+For the models each practice endpoint returns, compares FastAPI's default path
+(validate against the route's response_model, convert to primitives, json.dumps)
+with PydanticJSONResponse (pydantic-core straight to JSON bytes). Reports the encode
+time per endpoint and checks both paths produce the same bytes.
+
+    python -m benchmarks.response_encoding --iterations 2000 --output encoding.json
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Tuple
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.api.endpoints.practice import _to_manifest_entry
+from app.api.responses import PydanticJSONResponse
+from app.models.practice import PracticeSession, PracticeSessionStart
+from app.services.session_summary import build_session_summary
+from benchmarks.common import environment, latency_summary, write_results
+from benchmarks.session_memory import build_sessions
+from main import app
+
+DEFAULT_ITERATIONS = 2000
+DEFAULT_LEVEL_ID = 6
+DEFAULT_SEED = 20240601
+PREFIX = "/api/v1/practice"
+
+
+def _route(path: str) -> APIRoute:
+    return next(r for r in app.routes if isinstance(r, APIRoute) and r.path == PREFIX + path)
+
+
+def _start_response(session: PracticeSession, manifest: bool) -> PracticeSessionStart:
+    fields = {name: getattr(session, name) for name in PracticeSession.model_fields}
+    if manifest:
+        fields["questions"] = []
+        fields["question_manifest"] = [_to_manifest_entry(q) for q in session.questions]
+    return PracticeSessionStart.model_construct(**fields)
+
+
+def payloads(level_id: int, seed: int) -> List[Tuple[str, str, Any]]:
+    """(name, route path, model) for each endpoint response worth measuring."""
+    short, long = build_sessions(1, 10, level_id, seed)[0], build_sessions(1, 50, level_id, seed)[0]
+    answered = next(q for q in short.questions if q.is_correct is not None)
+    unanswered = next(q for q in short.questions if q.is_correct is None)
+    columnar = [q for q in long.questions if q.question_type == "columnar"]
+    result = [
+        ("question", "/question", unanswered),
+        ("answer", "/answer", answered),
+        ("start", "/start", _start_response(PracticeSession(difficulty_level_id=level_id, difficulty_level_details=short.difficulty_level_details), False)),
+        ("start_with_manifest_50", "/start", _start_response(long, True)),
+        ("summary_10", "/summary", short),
+        ("summary_50", "/summary", long),
+        ("summary_stats_50", "/summary/stats", build_session_summary(long))
+    ]
+    if columnar:
+        result.insert(1, ("question_columnar", "/question", columnar[0]))
+    return result
+
+
+async def _default_encode(route: APIRoute, content: Any) -> bytes:
+    return JSONResponse(await serialize_response(field=route.response_field, response_content=content)).body
+
+
+async def _measure(route: APIRoute, content: Any, iterations: int) -> Dict[str, Any]:
+    default_samples: List[float] = []
+    fast_samples: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        default_body = await _default_encode(route, content)
+        default_samples.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        fast_body = PydanticJSONResponse(content).body
+        fast_samples.append(time.perf_counter() - started)
+    default, fast = latency_summary(default_samples), latency_summary(fast_samples)
+    return {
+        "bytes": len(fast_body),
+        "identical_output": default_body == fast_body,
+        "default": default,
+        "pydantic_json": fast,
+        "speedup": default["mean_us"] / fast["mean_us"] if fast["mean_us"] else None
+    }
+
+
+def run(iterations: int = DEFAULT_ITERATIONS, level_id: int = DEFAULT_LEVEL_ID, seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    async def measure_all() -> Dict[str, Any]:
+        return {name: await _measure(_route(path), content, iterations) for name, path, content in payloads(level_id, seed)}
+
+    return {
+        "benchmark": "response_encoding",
+        "environment": environment(),
+        "config": {"iterations": iterations, "level_id": level_id, "seed": seed},
+        "endpoints": asyncio.run(measure_all())
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL_ID)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="JSON file to write (stdout when omitted)")
+    args = parser.parse_args()
+    write_results(run(args.iterations, args.level, args.seed), args.output)
+
+
+if __name__ == "__main__":
+    main()
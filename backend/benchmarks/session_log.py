@@ -0,0 +1,125 @@
+"""
+Session event log benchmark.
+
+Plays practice sessions through an in-memory store with and without the event log and
+reports the cost per save, how many fsyncs the group commit needed, and how long a
+restart (replay) and a compaction take for the resulting log.
+
+    python -m benchmarks.session_log --sessions 2000 --output log.json
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.api.endpoints.practice import get_difficulty_detail_by_id, _issue_next_question, _rebuild_compact_session
+from app.models.practice import PracticeSession
+from app.services.session_log import DEFAULT_COMMIT_WINDOW_SECONDS, SessionEventLog
+from app.services.session_store import InMemorySessionStore
+from benchmarks.common import environment, latency_summary, write_results
+
+DEFAULT_SESSIONS = 2000
+DEFAULT_QUESTIONS = 10
+DEFAULT_LEVEL_ID = 6
+DEFAULT_SEED = 20240601
+
+
+def _play(store: InMemorySessionStore, sessions: int, questions: int, level_id: int, seed: int) -> List[float]:
+    """Issues and answers every question of each session; returns the latency of each save."""
+    level = get_difficulty_detail_by_id(level_id)
+    rng = random.Random(seed)
+    samples: List[float] = []
+    for i in range(sessions):
+        session = PracticeSession(difficulty_level_id=level_id, difficulty_level_details=level,
+                                  total_questions_planned=questions, seed=seed + i)
+        store.add(session)
+        for _ in range(questions):
+            session.questions.append(_issue_next_question(session))
+            started = time.perf_counter()
+            store.save(session, ())
+            samples.append(time.perf_counter() - started)
+
+            question = session.questions[-1]
+            question.user_answer = question.correct_answer
+            question.is_correct = rng.random() < 0.8
+            question.time_spent = round(rng.uniform(1, 20), 2)
+            question.answered_at = datetime.utcnow()
+            session.score += question.is_correct
+            started = time.perf_counter()
+            store.save(session, (len(session.questions) - 1,))  # as /answer does
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _run_store(path: Optional[str], sessions: int, questions: int, level_id: int, seed: int) -> Dict[str, Any]:
+    store = InMemorySessionStore(_rebuild_compact_session)
+    if path is not None:
+        store.attach_event_log(SessionEventLog(path, DEFAULT_COMMIT_WINDOW_SECONDS))
+    started = time.perf_counter()
+    samples = _play(store, sessions, questions, level_id, seed)
+    elapsed = time.perf_counter() - started
+    report: Dict[str, Any] = {"save": latency_summary(samples), "elapsed_s": elapsed}
+    if store.event_log is not None:
+        log = store.event_log
+        log.sync()
+        report.update(records=log.records_written, fsyncs=log.syncs, log_bytes=os.path.getsize(path))
+    store.close()
+    return report
+
+
+def run(sessions: int = DEFAULT_SESSIONS, questions: int = DEFAULT_QUESTIONS, level_id: int = DEFAULT_LEVEL_ID, seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.log")
+        without_log = _run_store(None, sessions, questions, level_id, seed)
+        with_log = _run_store(path, sessions, questions, level_id, seed)
+
+        store = InMemorySessionStore(_rebuild_compact_session)
+        started = time.perf_counter()
+        restored = store.attach_event_log(SessionEventLog(path))
+        replay_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store.compact_event_log()
+        compaction_s = time.perf_counter() - started
+        compacted_bytes = os.path.getsize(path)
+        store.close()
+
+        store = InMemorySessionStore(_rebuild_compact_session)
+        started = time.perf_counter()
+        store.attach_event_log(SessionEventLog(path))
+        compacted_replay_s = time.perf_counter() - started
+        store.close()
+
+    return {
+        "benchmark": "session_log",
+        "environment": environment(),
+        "config": {"sessions": sessions, "questions": questions, "level_id": level_id, "seed": seed,
+                   "commit_window_s": DEFAULT_COMMIT_WINDOW_SECONDS},
+        "without_log": without_log,
+        "with_log": with_log,
+        "restart": {
+            "sessions_restored": restored,
+            "replay_s": replay_s,
+            "compaction_s": compaction_s,
+            "compacted_bytes": compacted_bytes,
+            "replay_after_compaction_s": compacted_replay_s
+        }
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS)
+    parser.add_argument("--questions", type=int, default=DEFAULT_QUESTIONS, help="questions per session")
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL_ID)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="JSON file to write (stdout when omitted)")
+    args = parser.parse_args()
+    write_results(run(args.sessions, args.questions, args.level, args.seed), args.output)
+
+
+if __name__ == "__main__":
+    main()
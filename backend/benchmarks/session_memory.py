@@ -0,0 +1,158 @@
+"""
+Session memory benchmark.
+
+Fills in-memory session stores with identical sessions and reports the retained bytes
+per session (measured with tracemalloc) for each storage form: live pydantic models,
+PackedSession records and seed-based compact state. Also times what one /answer costs
+the store in each form (get, record the answer, save) as sessions grow, for hot
+sessions (kept live) and cold ones (rebuilt from their records on every get).
+
+    python -m benchmarks.session_memory --sessions 2000 --output memory.json
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from app.api.endpoints.practice import get_difficulty_detail_by_id, _issue_next_question, _rebuild_compact_session
+from app.models.practice import PracticeSession
+from app.services.session_store import InMemorySessionStore
+from benchmarks.common import environment, latency_summary, write_results
+
+DEFAULT_SESSIONS = 2000
+DEFAULT_QUESTION_COUNTS = (10, 100)
+DEFAULT_LATENCY_QUESTION_COUNTS = (10, 200, 1000)
+DEFAULT_REQUESTS = 200
+DEFAULT_LEVEL_ID = 6
+DEFAULT_SEED = 20240601
+
+# Store settings per storage form; the memory figures are for the stored form alone
+MEMORY_MODES = {
+    "pydantic": dict(pack_sessions=False, compact=False),
+    "packed": dict(pack_sessions=True, compact=False),
+    "compact_seeded": dict(pack_sessions=True, compact=True)
+}
+LATENCY_MODES = {
+    "pydantic": dict(pack_sessions=False, compact=False, live_sessions=0),
+    "packed_hot": dict(pack_sessions=True, compact=False, live_sessions=1),
+    "packed_cold": dict(pack_sessions=True, compact=False, live_sessions=0),
+    "compact_seeded_hot": dict(pack_sessions=True, compact=True, live_sessions=1),
+    "compact_seeded_cold": dict(pack_sessions=True, compact=True, live_sessions=0)
+}
+
+
+def build_sessions(count: int, questions: int, level_id: int, seed: int, answered: float = 0.5) -> List[PracticeSession]:
+    """Sessions with every question issued and about the `answered` fraction of them answered."""
+    level = get_difficulty_detail_by_id(level_id)
+    rng = random.Random(seed)
+    sessions = []
+    for i in range(count):
+        session = PracticeSession(difficulty_level_id=level_id, difficulty_level_details=level,
+                                  total_questions_planned=questions, seed=seed + i)
+        for _ in range(questions):
+            question = _issue_next_question(session)
+            if rng.random() < answered:
+                question.user_answer = question.correct_answer if question.correct_answer is not None else 0
+                question.is_correct = rng.random() < 0.8
+                question.time_spent = round(rng.uniform(1, 20), 2)
+            session.questions.append(question)
+        sessions.append(session)
+    return sessions
+
+
+def _retained_bytes(fill: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = fill()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def _fresh_copy(session: PracticeSession) -> PracticeSession:
+    """Re-validated copy with its own questions and strings, sharing the level like a live session."""
+    data = session.model_dump(exclude={"difficulty_level_details"})
+    data["difficulty_level_details"] = session.difficulty_level_details
+    return PracticeSession.model_validate(data)
+
+
+def measure(sessions_count: int, questions: int, level_id: int, seed: int) -> Dict[str, Any]:
+    sessions = build_sessions(sessions_count, questions, level_id, seed)
+    results: Dict[str, Any] = {}
+    for name, mode in MEMORY_MODES.items():
+        def fill():
+            store = InMemorySessionStore(_rebuild_compact_session, pack_sessions=mode["pack_sessions"], live_sessions=0)
+            for session in sessions:
+                # Live models are copied inside the measurement so the bytes they keep are counted
+                store.add(session if mode["pack_sessions"] else _fresh_copy(session), compact=mode["compact"])
+            return store
+        results[name] = {"bytes_per_session": _retained_bytes(fill) / sessions_count}
+
+    baseline = results["pydantic"]["bytes_per_session"]
+    for report in results.values():
+        report["ratio_vs_pydantic"] = baseline / report["bytes_per_session"] if report["bytes_per_session"] else None
+    return results
+
+
+def measure_latency(questions: int, requests: int, level_id: int, seed: int) -> Dict[str, Any]:
+    """Per-request store cost of answering one question of a session that has `questions` issued."""
+    (session,) = build_sessions(1, questions, level_id, seed, answered=0.0)
+    results: Dict[str, Any] = {}
+    for name, mode in LATENCY_MODES.items():
+        store = InMemorySessionStore(_rebuild_compact_session, pack_sessions=mode["pack_sessions"],
+                                     live_sessions=mode["live_sessions"])
+        store.add(_fresh_copy(session), compact=mode["compact"])
+        samples = []
+        for i in range(requests):
+            position = i % questions
+            started = time.perf_counter()
+            loaded = store.get(session.id)
+            question = loaded.questions[position]
+            question.user_answer, question.is_correct = 0, False
+            question.time_spent, question.answered_at = 1.5, datetime.utcnow()
+            store.save(loaded, (position,))
+            samples.append(time.perf_counter() - started)
+        results[name] = latency_summary(samples)
+    return results
+
+
+def run(
+    sessions: int = DEFAULT_SESSIONS,
+    question_counts=DEFAULT_QUESTION_COUNTS,
+    level_id: int = DEFAULT_LEVEL_ID,
+    seed: int = DEFAULT_SEED,
+    latency_question_counts=DEFAULT_LATENCY_QUESTION_COUNTS,
+    requests: int = DEFAULT_REQUESTS
+) -> Dict[str, Any]:
+    return {
+        "benchmark": "session_memory",
+        "environment": environment(),
+        "config": {"sessions": sessions, "question_counts": list(question_counts), "level_id": level_id, "seed": seed,
+                   "latency_question_counts": list(latency_question_counts), "requests": requests},
+        "questions_per_session": {str(q): measure(sessions, q, level_id, seed) for q in question_counts},
+        "answer_latency": {str(q): measure_latency(q, requests, level_id, seed) for q in latency_question_counts}
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS)
+    parser.add_argument("--questions", type=int, nargs="+", default=list(DEFAULT_QUESTION_COUNTS), help="questions per session")
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL_ID)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--latency-questions", type=int, nargs="+", default=list(DEFAULT_LATENCY_QUESTION_COUNTS),
+                        help="questions per session for the answer latency runs")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="answers timed per storage form")
+    parser.add_argument("--output", help="JSON file to write (stdout when omitted)")
+    args = parser.parse_args()
+    write_results(run(args.sessions, args.questions, args.level, args.seed, args.latency_questions, args.requests), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Shared session store benchmark.
+
+Starts 1..N worker processes against one SharedSessionStore database. Each worker
+repeats the /answer cycle (load a session, change it, save it with the optimistic
+version check, reloading on conflict) for a fixed time. Reports updates/sec per worker
+count and the scaling relative to one worker, for sessions private to each worker and
+for a few sessions every worker contends on. Afterwards the scores are summed to check
+that no update was lost.
+
+    python -m benchmarks.shared_store --workers 1 2 4 --duration 3 --output shared.json
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Sequence, Tuple
+from uuid import UUID
+
+from app.api.endpoints.practice import get_difficulty_detail_by_id, _issue_next_question, _rebuild_compact_session
+from app.models.practice import PracticeSession
+from app.services.session_store import SessionConflictError, SharedSessionStore
+from benchmarks.common import environment, write_results
+
+DEFAULT_WORKER_COUNTS = (1, 2, 4)
+DEFAULT_DURATION = 3.0
+DEFAULT_LEVEL_ID = 6
+SESSIONS_PER_WORKER = 8
+CONTENDED_SESSIONS = 2
+START_DELAY = 1.0  # lets every worker finish importing before the clock starts
+
+
+def _worker(path: str, session_ids: Sequence[bytes], start_at: float, duration: float) -> Tuple[int, int]:
+    """Runs load-modify-save cycles until the deadline; returns (updates, conflicts)."""
+    store = SharedSessionStore(_rebuild_compact_session, path)
+    ids = [UUID(bytes=raw) for raw in session_ids]
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.perf_counter() + duration
+    updates = conflicts = 0
+    while time.perf_counter() < deadline:
+        session_id = ids[updates % len(ids)]
+        while True:
+            session = store.get(session_id)
+            session.score += 1
+            try:
+                store.save(session)
+                break
+            except SessionConflictError:
+                conflicts += 1
+        updates += 1
+    store.close()
+    return updates, conflicts
+
+
+def _create_sessions(store: SharedSessionStore, count: int, level_id: int) -> List[UUID]:
+    level = get_difficulty_detail_by_id(level_id)
+    ids = []
+    for _ in range(count):
+        session = PracticeSession(difficulty_level_id=level_id, difficulty_level_details=level)
+        for _ in range(session.total_questions_planned):
+            session.questions.append(_issue_next_question(session))
+        store.add(session)
+        ids.append(session.id)
+    return ids
+
+
+def measure(workers: int, duration: float, contended: bool, level_id: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.db")
+        store = SharedSessionStore(_rebuild_compact_session, path)
+        if contended:
+            shared = _create_sessions(store, CONTENDED_SESSIONS, level_id)
+            assignments = [shared] * workers
+        else:
+            assignments = [_create_sessions(store, SESSIONS_PER_WORKER, level_id) for _ in range(workers)]
+
+        start_at = time.time() + START_DELAY
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_worker, path, [i.bytes for i in ids], start_at, duration) for ids in assignments]
+            results = [future.result() for future in futures]
+
+        updates = sum(r[0] for r in results)
+        session_ids = {i for ids in assignments for i in ids}
+        recorded = sum(store.get(i).score for i in session_ids)
+        store.close()
+    return {
+        "updates": updates,
+        "updates_per_sec": updates / duration,
+        "conflicts": sum(r[1] for r in results),
+        "lost_updates": updates - recorded
+    }
+
+
+def run(worker_counts: Sequence[int] = DEFAULT_WORKER_COUNTS, duration: float = DEFAULT_DURATION, level_id: int = DEFAULT_LEVEL_ID) -> Dict[str, Any]:
+    scenarios: Dict[str, Any] = {}
+    for name, contended in (("private_sessions", False), ("contended_sessions", True)):
+        reports = {str(n): measure(n, duration, contended, level_id) for n in worker_counts}
+        baseline = reports[str(worker_counts[0])]["updates_per_sec"] / worker_counts[0]
+        for n in worker_counts:
+            report = reports[str(n)]
+            report["scaling_vs_one_worker"] = report["updates_per_sec"] / baseline if baseline else None
+        scenarios[name] = reports
+    return {
+        "benchmark": "shared_store",
+        "environment": dict(environment(), cpu_count=os.cpu_count()),
+        "config": {"worker_counts": list(worker_counts), "duration": duration, "level_id": level_id},
+        "scenarios": scenarios
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=list(DEFAULT_WORKER_COUNTS), help="worker process counts to run")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds per run")
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL_ID)
+    parser.add_argument("--output", help="JSON file to write (stdout when omitted)")
+    args = parser.parse_args()
+    write_results(run(args.workers, args.duration, args.level), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Worker startup benchmark.
+
+Starts fresh interpreters the way a new worker would and times importing main, running
+the app's lifespan startup, and building the LLM and TTS services on first use (the work
+moved out of import time). Also reports the slowest modules imported by `import main`
+(python -X importtime) and whether the app starts without any provider credentials.
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import environment, write_results
+
+DEFAULT_RUNS = 5
+DEFAULT_TOP_IMPORTS = 15
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+PROVIDER_ENV_PREFIXES = ("QWEN_", "AZURE_SPEECH_", "OPENAI_")
+
+# Runs in the child interpreter; prints one JSON object of timings in milliseconds
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+import asyncio
+from app.services import providers
+
+async def start_and_stop():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+lifespan_started = asyncio.run(start_and_stop())
+timings = {"import_ms": (imported - started) * 1e3, "lifespan_startup_ms": (lifespan_started - imported) * 1e3}
+for name, get_service in (("llm", providers.get_llm_service), ("tts", providers.get_tts_service)):
+    began = time.perf_counter()
+    try:
+        get_service()
+        timings[name + "_service_ms"] = (time.perf_counter() - began) * 1e3
+    except Exception:
+        timings[name + "_service_ms"] = None
+print(json.dumps(timings))
+"""
+
+
+def _child_env(with_providers: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    if not with_providers:
+        env = {k: v for k, v in env.items() if not k.startswith(PROVIDER_ENV_PREFIXES)}
+    else:
+        # Placeholder credentials: the clients are built, nothing is sent
+        env.setdefault("QWEN_API_KEY", "benchmark")
+        env.setdefault("AZURE_SPEECH_KEY", "benchmark")
+        env.setdefault("AZURE_SPEECH_REGION", "eastus")
+    return env
+
+
+def _run_child(with_providers: bool) -> Dict[str, Any]:
+    result = subprocess.run([sys.executable, "-c", _CHILD], cwd=BACKEND_DIR, env=_child_env(with_providers),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"ok": False, "error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return dict(json.loads(result.stdout.strip().splitlines()[-1]), ok=True)
+
+
+def _median(runs: List[Dict[str, Any]], key: str) -> Any:
+    values = [run[key] for run in runs if run.get(key) is not None]
+    return statistics.median(values) if values else None
+
+
+def slowest_imports(top: int) -> List[Dict[str, Any]]:
+    """Modules with the largest cumulative import time under `import main`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR,
+                            env=_child_env(True), capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package", the header line excluded
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append({"module": name.strip(), "self_ms": int(self_us) / 1e3, "cumulative_ms": int(cumulative_us) / 1e3})
+    return sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:top]
+
+
+def run(runs: int = DEFAULT_RUNS, top_imports: int = DEFAULT_TOP_IMPORTS) -> Dict[str, Any]:
+    configured = [_run_child(True) for _ in range(runs)]
+    unconfigured = _run_child(False)
+    return {
+        "benchmark": "startup",
+        "environment": environment(),
+        "config": {"runs": runs},
+        "configured": {
+            "ok": all(run["ok"] for run in configured),
+            **{key: _median(configured, key) for key in ("import_ms", "lifespan_startup_ms", "llm_service_ms", "tts_service_ms")}
+        },
+        "without_providers": unconfigured,
+        "slowest_imports": slowest_imports(top_imports)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--top-imports", type=int, default=DEFAULT_TOP_IMPORTS)
+    parser.add_argument("--output", help="JSON file to write (stdout when omitted)")
+    args = parser.parse_args()
+    write_results(run(args.runs, args.top_imports), args.output)
+
+
+if __name__ == "__main__":
+    main()
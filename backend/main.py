@@ -1,13 +1,55 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables from the .env file next to this one, before the app modules
+# read their settings (SESSION_STORE, ...); the LLM and TTS services read theirs on first use
+load_dotenv(Path(__file__).resolve().parent / ".env")
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
 from app.api.endpoints import difficulty as difficulty_router
 from app.api.endpoints import practice as practice_router
+from app.api.endpoints import metrics as metrics_router
+from app.api.endpoints.difficulty import difficulty_levels_objects
+from app.api.middleware import RequestMetricsMiddleware
+from app.services.instrumented_executor import InstrumentedThreadPoolExecutor
+from app.services import providers
+from app.services.question_pool import question_pool
+from app.services.session_store import DEFAULT_SWEEP_INTERVAL_SECONDS, attach_event_log_from_env, sweep_periodically
 
-# Load environment variables from .env file
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # run_in_executor / to_thread work (LLM, TTS, log compaction) goes through a pool reported at /metrics
+    asyncio.get_running_loop().set_default_executor(InstrumentedThreadPoolExecutor("default"))
+    # LLM/TTS clients are built on first use; SERVICES_WARMUP=1 builds them now, without delaying startup
+    warmup = None
+    if os.getenv("SERVICES_WARMUP") == "1":
+        warmup = asyncio.create_task(asyncio.to_thread(providers.warm_up))
+    # Restore sessions from the event log (SESSION_LOG_PATH), then shrink the log in the background
+    compaction = None
+    if attach_event_log_from_env(practice_router.session_store):
+        compaction = asyncio.create_task(asyncio.to_thread(practice_router.session_store.compact_event_log))
+    # Keep a pool of ready-made questions per difficulty level for /practice/question; the
+    # pools fill in the background and /question generates inline until they are ready
+    question_pool.start(difficulty_levels_objects)
+    # Expire idle sessions in the background
+    sweeper = asyncio.create_task(sweep_periodically(
+        practice_router.session_store,
+        float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", DEFAULT_SWEEP_INTERVAL_SECONDS))
+    ))
+    yield
+    sweeper.cancel()
+    if compaction is not None:
+        await compaction
+    if warmup is not None:
+        await warmup
+    await question_pool.stop()
+    practice_router.session_store.close()
 
-app = FastAPI(title="PrismJoey Backend")
+app = FastAPI(title="PrismJoey Backend", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -17,9 +59,12 @@ app.add_middleware(
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
 )
+# Per-route latency histograms for /metrics
+app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(difficulty_router.router, prefix="/api/v1/difficulty", tags=["difficulty"])
 app.include_router(practice_router.router, prefix="/api/v1/practice", tags=["practice"])
+app.include_router(metrics_router.router, tags=["metrics"])
 
 @app.get("/")
 async def root():
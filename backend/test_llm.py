@@ -5,6 +5,7 @@ Test script for LLM service integration
 import os
 import sys
 from uuid import uuid4
+import pytest
 from dotenv import load_dotenv
 
 # Add the app directory to Python path
@@ -14,8 +15,12 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 load_dotenv()
 
 from app.models.practice import Question
-from app.services.llm_service import llm_service
+from app.services.providers import get_llm_service
 
+# Under pytest these need a configured provider; main() checks the key itself
+requires_llm_key = pytest.mark.skipif(not os.getenv("QWEN_API_KEY"), reason="QWEN_API_KEY not set")
+
+@requires_llm_key
 def test_arithmetic_question():
     """Test LLM service with an arithmetic question"""
     print("Testing arithmetic question...")
@@ -31,7 +36,7 @@ def test_arithmetic_question():
     )
     
     try:
-        response = llm_service.generate_help_response(question)
+        response = get_llm_service().generate_help_response(question)
         print(f"Help Content: {response['help_content']}")
         print(f"Thinking Process: {response['thinking_process']}")
         print(f"Solution Steps: {response['solution_steps']}")
@@ -41,6 +46,7 @@ def test_arithmetic_question():
         print(f"❌ Arithmetic test failed: {e}")
         return False
 
+@requires_llm_key
 def test_columnar_question():
     """Test LLM service with a columnar question"""
     print("\nTesting columnar question...")
@@ -59,7 +65,7 @@ def test_columnar_question():
     )
     
     try:
-        response = llm_service.generate_help_response(question)
+        response = get_llm_service().generate_help_response(question)
         print(f"Help Content: {response['help_content']}")
         print(f"Thinking Process: {response['thinking_process']}")
         print(f"Solution Steps: {response['solution_steps']}")
@@ -13,6 +13,10 @@ from typing import Generator
 # Add the backend directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
+from dotenv import load_dotenv
+
+load_dotenv()
+
 from app.services.tts_service import TTSService
 from app.models.practice import Question
 from uuid import uuid4
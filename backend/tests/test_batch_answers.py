@@ -0,0 +1,92 @@
+from uuid import UUID, uuid4
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.api.endpoints.practice import session_store
+
+BATCH_URL = "/api/v1/practice/answers:batch"
+
+
+def _start(client: TestClient, total: int = 5, level: int = 6) -> str:
+    return client.post("/api/v1/practice/start", json={
+        "difficulty_level_id": level, "total_questions": total, "pregenerate_questions": True
+    }).json()["id"]
+
+
+def _answer(question, correct: bool = True) -> dict:
+    item = {"question_id": str(question.id), "time_spent": 1.5}
+    if question.question_type == "columnar":
+        # The original operands are a valid completion of the puzzle
+        digits = [list(map(int, str(n).zfill(len(question.columnar_result_placeholders)))) for n in question.operands]
+        total = question.operands[0] + question.operands[1] if question.columnar_operation == "+" else question.operands[0] - question.operands[1]
+        result = list(map(int, str(total).zfill(len(question.columnar_result_placeholders))))
+        if not correct:
+            result[-1] = (result[-1] + 1) % 10
+        item.update(user_filled_operands=digits, user_filled_result=result)
+    else:
+        item["user_answer"] = question.correct_answer + (0 if correct else 1)
+    return item
+
+
+def test_batch_applies_every_answer_with_one_request():
+    client = TestClient(app)
+    session_id = _start(client)
+    questions = session_store.get(UUID(session_id)).questions
+    answers = [_answer(q, correct=i != 1) for i, q in enumerate(questions)]
+
+    response = client.post(BATCH_URL, json={"session_id": session_id, "answers": answers})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["applied"] and body["score"] == 4 and body["end_time"] is not None
+    assert [r["status_code"] for r in body["results"]] == [200] * 5
+    assert [r["question"]["is_correct"] for r in body["results"]] == [True, False, True, True, True]
+
+    session = session_store.get(UUID(session_id))
+    assert session.score == 4 and session.end_time is not None
+    assert all(q.time_spent == 1.5 and q.answered_at is not None for q in session.questions)
+
+
+def test_batch_matches_answering_one_by_one():
+    client = TestClient(app)
+    batched, single = _start(client), _start(client)
+    batch_questions = session_store.get(UUID(batched)).questions[:3]
+    client.post(BATCH_URL, json={"session_id": batched, "answers": [_answer(q) for q in batch_questions]})
+    for question in session_store.get(UUID(single)).questions[:3]:
+        client.post("/api/v1/practice/answer", json=dict(_answer(question), session_id=single))
+
+    batched_session, single_session = session_store.get(UUID(batched)), session_store.get(UUID(single))
+    assert batched_session.score == single_session.score == 3
+    assert batched_session.current_question_index == single_session.current_question_index == 3
+    assert batched_session.end_time is None
+
+
+def test_batch_with_a_bad_answer_records_nothing():
+    client = TestClient(app)
+    session_id = _start(client, total=4)
+    questions = session_store.get(UUID(session_id)).questions
+    client.post("/api/v1/practice/answer", json=dict(_answer(questions[0]), session_id=session_id))
+
+    answers = [
+        _answer(questions[1]),
+        _answer(questions[0]),                      # already answered
+        {"question_id": str(uuid4())},              # not in the session
+        _answer(questions[2]),
+        _answer(questions[2])                       # twice in one batch
+    ]
+    response = client.post(BATCH_URL, json={"session_id": session_id, "answers": answers})
+    assert response.status_code == 400
+    body = response.json()
+    assert not body["applied"]
+    assert [r["status_code"] for r in body["results"]] == [200, 400, 404, 200, 400]
+    assert all(r["question"] is None for r in body["results"])
+
+    session = session_store.get(UUID(session_id))
+    assert session.score == 1
+    assert [q.is_correct is not None for q in session.questions] == [True, False, False, False]
+
+
+def test_batch_rejects_unknown_sessions_and_empty_batches():
+    client = TestClient(app)
+    assert client.post(BATCH_URL, json={"session_id": str(uuid4()), "answers": [{"question_id": str(uuid4())}]}).status_code == 404
+    assert client.post(BATCH_URL, json={"session_id": _start(client), "answers": []}).status_code == 422
@@ -0,0 +1,75 @@
+import numpy as np
+from uuid import uuid4
+
+from app.api.endpoints.difficulty import difficulty_levels_objects
+from app.api.endpoints.practice import _calculate_answer, _generate_question_string
+from app.services import batch_question_service
+from app.services.batch_question_service import ARITHMETIC, COLUMNAR, generate_questions_batch
+from app.services.columnar_practice_service import MAX_BLANK_ATTEMPTS
+
+
+def test_batch_arithmetic_answers_match_operands():
+    for level in difficulty_levels_objects:
+        batch = generate_questions_batch(level, 2000, rng=7, columnar_ratio=0.0)
+        assert len(batch) == 2000
+        assert (batch.question_type == ARITHMETIC).all()
+        assert ((batch.answers >= 0) & (batch.answers <= level.max_number)).all()
+
+        for question in batch.to_questions(uuid4(), 0, 200):
+            assert question.correct_answer == _calculate_answer(question.operands, question.operations)
+            assert question.question_string == _generate_question_string(question.operands, question.operations)
+
+
+def test_batch_columnar_layout_and_blanks():
+    level = next(l for l in difficulty_levels_objects if l.code == "within_100_two_one_carry_borrow")
+    batch = generate_questions_batch(level, 5000, rng=11, columnar_ratio=1.0)
+    assert (batch.question_type == COLUMNAR).all()
+
+    blank_counts = np.array([bin(int(mask)).count("1") for mask in batch.blank_mask])
+    assert ((blank_counts >= 1) & (blank_counts <= 2)).all()
+
+    for question in batch.to_questions(uuid4(), 0, 300):
+        num1, num2 = question.operands
+        expected = num1 + num2 if question.columnar_operation == "+" else num1 - num2
+        assert 0 <= expected <= level.max_number
+        width = max(len(str(num1)), len(str(num2)), len(str(expected)))
+        assert all(len(row) == width for row in question.columnar_operands)
+        assert len(question.columnar_result_placeholders) == width
+
+        # Non-blank digits agree with the real numbers
+        for row, value in zip(question.columnar_operands + [question.columnar_result_placeholders], [num1, num2, expected]):
+            full_digits = str(value).zfill(width)
+            for digit, full_digit in zip(row, full_digits):
+                assert digit is None or str(digit) == full_digit
+
+
+def test_batch_is_reproducible_with_a_fixed_seed():
+    level = difficulty_levels_objects[2]
+    first = generate_questions_batch(level, 1000, rng=42)
+    second = generate_questions_batch(level, 1000, rng=42)
+    assert np.array_equal(first.operands, second.operands)
+    assert np.array_equal(first.blank_mask, second.blank_mask)
+
+
+def _blank_columns(batch):
+    """The grid columns of each row's blanked digits."""
+    return [[bit % batch.grid_width for bit in range(32) if int(mask) >> bit & 1] for mask in batch.blank_mask]
+
+
+def test_batch_redraws_ambiguous_blanks_like_the_scalar_generator(monkeypatch):
+    level = next(l for l in difficulty_levels_objects if l.code == "within_100_two_one_carry_borrow")
+
+    # Accepting every layout keeps the first draw: two-blank rows in different columns
+    monkeypatch.setattr(batch_question_service, "is_unambiguous", lambda *rows: True)
+    first_draw = _blank_columns(generate_questions_batch(level, 3000, rng=5, columnar_ratio=1.0))
+    different_columns = sum(len(columns) == 2 and columns[0] != columns[1] for columns in first_draw)
+
+    checks = []
+    monkeypatch.setattr(batch_question_service, "is_unambiguous", lambda *rows: checks.append(rows) or False)
+    redrawn = _blank_columns(generate_questions_batch(level, 3000, rng=5, columnar_ratio=1.0))
+
+    # No ambiguous layout survives, and instead of dropping straight to one blank the
+    # rejected rows were redrawn, some of them into two blanks in different columns
+    assert not any(len(columns) == 2 and columns[0] == columns[1] for columns in redrawn)
+    assert sum(len(columns) == 2 for columns in redrawn) > different_columns
+    assert len(checks) <= MAX_BLANK_ATTEMPTS * len(redrawn)
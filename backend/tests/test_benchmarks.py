@@ -0,0 +1,65 @@
+import json
+
+from app.api.endpoints import practice
+from app.api.endpoints.difficulty import difficulty_levels_objects
+from app.services import providers
+from benchmarks import load_test, metrics_overhead, question_generation, response_encoding, shared_store, startup
+from benchmarks.common import write_results
+
+
+def test_question_generation_benchmark_reports_every_level(tmp_path):
+    original_attempt = practice._generate_arithmetic_attempt
+    results = question_generation.run(iterations=30, seed=1, session_length=10)
+    assert practice._generate_arithmetic_attempt is original_attempt  # wrappers are removed again
+
+    assert set(results["levels"]) == {level.code for level in difficulty_levels_objects}
+    for level in difficulty_levels_objects:
+        report = results["levels"][level.code]["generate_question_for_session"]
+        assert report["count"] == 30
+        assert sum(report["attempts"].values()) == 30
+        assert report["p99_us"] >= report["p50_us"] > 0
+        assert 0.0 <= report["fallback_rate"] <= 1.0
+
+    output = tmp_path / "results.json"
+    write_results(results, str(output))
+    assert json.loads(output.read_text(encoding="utf-8"))["config"]["seed"] == 1
+
+
+def test_shared_store_benchmark_loses_no_updates_across_processes():
+    report = shared_store.measure(workers=2, duration=0.3, contended=True, level_id=1)
+    assert report["updates"] > 0
+    assert report["lost_updates"] == 0
+
+
+def test_response_encoding_benchmark_matches_fastapi_output():
+    results = response_encoding.run(iterations=3, seed=1)
+    assert {"question", "answer", "start_with_manifest_50", "summary_50"} <= set(results["endpoints"])
+    for report in results["endpoints"].values():
+        assert report["identical_output"]
+        assert report["pydantic_json"]["count"] == 3
+
+
+def test_metrics_overhead_benchmark_reports_every_metric_type():
+    results = metrics_overhead.run(iterations=100, requests=10)
+    assert set(results["observations"]) == {"counter_inc_ns", "gauge_inc_ns", "histogram_observe_ns", "timer_pair_ns"}
+    assert results["middleware"]["metered_ns"] > 0
+
+
+def test_load_test_runs_full_flows_against_stand_in_services():
+    original = providers._llm_service, providers._tts_service
+    results = load_test.run(student_counts=[3], questions=2, help_rate=1.0, voice_rate=1.0, llm_latency=0, tts_latency=0)
+    assert (providers._llm_service, providers._tts_service) == original
+
+    step = results["steps"][0]
+    assert step["completed_flows"] == 3 and step["errors"] == {}
+    assert {"start", "question", "answer", "help", "voice_help_stream", "summary"} == set(step["endpoints"])
+    assert step["endpoints"]["answer"]["count"] == 6
+    assert results["stand_in_calls"] == {"llm": 6, "tts": 6}
+
+
+def test_startup_benchmark_starts_with_and_without_providers():
+    results = startup.run(runs=1, top_imports=3)
+    assert results["configured"]["ok"] and results["configured"]["import_ms"] > 0
+    assert results["configured"]["llm_service_ms"] is not None
+    assert results["without_providers"]["ok"] and results["without_providers"]["llm_service_ms"] is None
+    assert results["slowest_imports"][0]["module"] == "main"
@@ -0,0 +1,48 @@
+import random
+from uuid import uuid4
+
+from app.api.endpoints.difficulty import difficulty_levels_objects
+from app.services.columnar_practice_service import generate_columnar_question
+from app.services.columnar_solver import is_unambiguous, solve_columnar, solve_columnar_question
+
+
+def test_single_blank_has_one_solution():
+    # 4? + 27 = 73  ->  46 + 27 = 73
+    solutions = solve_columnar((4, None), (2, 7), (7, 3), "+")
+    assert solutions == (((4, 6), (2, 7), (7, 3)),)
+
+
+def test_two_blanks_in_one_column_are_ambiguous():
+    # 1? + 2? = 38: any pair of unit digits summing to 8 fits
+    solutions = solve_columnar((1, None), (2, None), (3, 8), "+")
+    assert len(solutions) > 1
+    for top, bottom, result in solutions:
+        assert int("".join(map(str, top))) + int("".join(map(str, bottom))) == 38
+    assert not is_unambiguous((1, None), (2, None), (3, 8), "+")
+    # 1? + 2? = 48 needs 9 + 9 with a carry, so it is unique
+    assert is_unambiguous((1, None), (2, None), (4, 8), "+")
+
+
+def test_subtraction_with_borrow_and_six_digit_operands():
+    # 503217 - 198649 = 304568, blanks spread across rows and columns
+    top = (5, 0, None, 2, 1, 7)
+    bottom = (1, 9, 8, None, 4, 9)
+    result = (3, 0, 4, 5, None, 8)
+    assert solve_columnar(top, bottom, result, "-") == (
+        ((5, 0, 3, 2, 1, 7), (1, 9, 8, 6, 4, 9), (3, 0, 4, 5, 6, 8)),
+    )
+    # No completion when the final column would have to borrow
+    assert solve_columnar((1, None), (2, 0), (None, 5), "-") == ()
+
+
+def test_generated_columnar_questions_have_a_unique_solution():
+    rng = random.Random(3)
+    levels = [level for level in difficulty_levels_objects if level.max_number > 9]
+    for _ in range(300):
+        level = rng.choice(levels)
+        question = generate_columnar_question(level, uuid4(), rng)
+        solutions = solve_columnar_question(question)
+        assert len(solutions) == 1
+        top, bottom, result = solutions[0]
+        assert int("".join(map(str, top))) == question.operands[0]
+        assert int("".join(map(str, bottom))) == question.operands[1]
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from app.api.endpoints.difficulty import difficulty_levels_objects, difficulty_registry
+from app.api.endpoints.practice import get_difficulty_detail_by_id
+from app.services.difficulty_registry import DifficultyRegistry, etag_matches
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app)
+
+
+def test_levels_body_matches_pydantic_serialization(client: TestClient):
+    response = client.get("/api/v1/difficulty/levels")
+    assert response.status_code == 200
+    assert response.json() == [json.loads(level.model_dump_json()) for level in difficulty_levels_objects]
+    assert response.headers["etag"] == difficulty_registry.levels_response.etag
+
+
+def test_if_none_match_returns_304(client: TestClient):
+    etag = client.get("/api/v1/difficulty/levels").headers["etag"]
+    not_modified = client.get("/api/v1/difficulty/levels", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    stale = client.get("/api/v1/difficulty/levels", headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200
+
+
+def test_single_level_lookup_and_etag(client: TestClient):
+    response = client.get("/api/v1/difficulty/3")
+    assert response.json()["code"] == "within_20_carry_borrow"
+    etag = response.headers["etag"]
+    assert etag != difficulty_registry.levels_response.etag
+    assert client.get("/api/v1/difficulty/3", headers={"If-None-Match": f'"x", W/{etag}'}).status_code == 304
+    assert client.get("/api/v1/difficulty/99").status_code == 404
+
+
+def test_registry_indexes_by_id_and_code():
+    assert get_difficulty_detail_by_id(6).code == "within_100_two_one_carry_borrow"
+    assert difficulty_registry.get_by_code("within_10").id == 1
+    assert get_difficulty_detail_by_id(42) is None
+    assert etag_matches("*", difficulty_registry.levels_response.etag)
+    with pytest.raises(ValueError):
+        DifficultyRegistry([difficulty_levels_objects[0], difficulty_levels_objects[0]])
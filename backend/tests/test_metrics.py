@@ -0,0 +1,147 @@
+import threading
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.api.endpoints.practice import session_store
+from app.services.instrumented_executor import InstrumentedThreadPoolExecutor
+from app.services.metrics import (
+    Counter, Gauge, Histogram, MetricsRegistry, executor_busy_threads, executor_queue_depth,
+    http_request_duration_seconds, llm_calls_total, llm_fallbacks_total, question_generation_attempts,
+    registry, sessions_active, tts_audio_bytes_total, tts_first_chunk_seconds
+)
+from app.services.llm_service import LLMService
+from app.services.providers import set_llm_service, set_tts_service
+
+
+def test_counter_and_histogram_render_prometheus_text():
+    registry = MetricsRegistry()
+    counter = Counter("demo_total", "Demo counter.", ("level",), registry=registry)
+    histogram = Histogram("demo_attempts", "Demo histogram.", ("level",), buckets=(1, 2, 4), registry=registry)
+    counter.inc("within_10")
+    counter.inc("within_10", amount=2)
+    for value in (1, 1, 3, 9):
+        histogram.observe(value, "within_10")
+
+    text = registry.render()
+    assert "# TYPE demo_total counter" in text
+    assert 'demo_total{level="within_10"} 3' in text
+    assert 'demo_attempts_bucket{level="within_10",le="1"} 2' in text
+    assert 'demo_attempts_bucket{level="within_10",le="4"} 3' in text
+    assert 'demo_attempts_bucket{level="within_10",le="+Inf"} 4' in text
+    assert 'demo_attempts_sum{level="within_10"} 14' in text
+    assert 'demo_attempts_count{level="within_10"} 4' in text
+
+
+def test_question_generation_is_exposed_at_metrics_endpoint():
+    client = TestClient(app)
+    session = client.post("/api/v1/practice/start", json={"difficulty_level_id": 1, "total_questions": 5}).json()
+    before = sum(question_generation_attempts.count("within_10", t) for t in ("arithmetic", "columnar"))
+    for _ in range(5):
+        question = client.get("/api/v1/practice/question", params={"session_id": session["id"]}).json()
+        payload = {"session_id": session["id"], "question_id": question["id"], "user_answer": 0,
+                   "user_filled_operands": [[d or 0 for d in row] for row in question.get("columnar_operands") or []],
+                   "user_filled_result": [d or 0 for d in question.get("columnar_result_placeholders") or []]}
+        client.post("/api/v1/practice/answer", json=payload)
+    after = sum(question_generation_attempts.count("within_10", t) for t in ("arithmetic", "columnar"))
+    assert after - before == 5
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'question_generation_attempts_count{level="within_10"' in response.text
+    assert 'operand_table_rejections_total{level="within_10",operation="addition",reason="range"}' in response.text
+
+
+def test_gauge_sets_values_and_reads_callbacks_at_render():
+    registry = MetricsRegistry()
+    gauge = Gauge("demo_gauge", "Demo gauge.", ("pool",), registry=registry)
+    gauge.inc("a", amount=3)
+    gauge.dec("a")
+    items = [1, 2]
+    gauge.set_function(lambda: len(items), "b")
+    items.append(3)
+
+    text = registry.render()
+    assert "# TYPE demo_gauge gauge" in text
+    assert 'demo_gauge{pool="a"} 2' in text
+    assert 'demo_gauge{pool="b"} 3' in text
+
+
+def test_requests_are_timed_per_route_template():
+    client = TestClient(app)
+    session_id = client.post("/api/v1/practice/start", json={"difficulty_level_id": 1, "total_questions": 2}).json()["id"]
+    before = http_request_duration_seconds.count("GET", "/api/v1/practice/question", "200")
+    missing = http_request_duration_seconds.count("GET", "/api/v1/practice/question", "404")
+    client.get("/api/v1/practice/question", params={"session_id": session_id})
+    client.get("/api/v1/practice/question", params={"session_id": str(uuid4())})
+    unmatched = http_request_duration_seconds.count("GET", "unmatched", "404")
+    client.get("/no/such/page")
+
+    assert http_request_duration_seconds.count("GET", "/api/v1/practice/question", "200") == before + 1
+    assert http_request_duration_seconds.count("GET", "/api/v1/practice/question", "404") == missing + 1
+    assert http_request_duration_seconds.count("GET", "unmatched", "404") == unmatched + 1
+    assert sessions_active.value() == len(session_store)
+    assert f"sessions_active {len(session_store)}" in client.get("/metrics").text
+
+
+class _FailingCompletions:
+    def create(self, **kwargs):
+        raise RuntimeError("LLM unavailable")
+
+
+def test_llm_failures_and_fallbacks_are_counted(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setenv("QWEN_API_KEY", "test")
+    service = LLMService()
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=_FailingCompletions()))
+    session = client.post("/api/v1/practice/start", json={"difficulty_level_id": 6, "total_questions": 2}).json()
+    question = client.get("/api/v1/practice/question", params={"session_id": session["id"]}).json()
+    errors, fallbacks = llm_calls_total.value("help", "error"), llm_fallbacks_total.value("help")
+
+    previous = set_llm_service(service)
+    try:
+        response = client.post("/api/v1/practice/help", json={"session_id": session["id"], "question_id": question["id"]})
+    finally:
+        set_llm_service(previous)
+    assert response.status_code == 200 and response.json()["help_content"]
+    assert llm_calls_total.value("help", "error") == errors + 1
+    assert llm_fallbacks_total.value("help") == fallbacks + 1
+
+
+def test_voice_help_stream_reports_first_chunk_and_bytes(monkeypatch):
+    client = TestClient(app)
+    previous = set_tts_service(SimpleNamespace(generate_voice_help_stream=lambda question: iter([b"ab", b"cde"])))
+    session = client.post("/api/v1/practice/start", json={"difficulty_level_id": 6, "total_questions": 2}).json()
+    question = client.get("/api/v1/practice/question", params={"session_id": session["id"]}).json()
+    first_chunks, sent = tts_first_chunk_seconds.count("voice_help_stream"), tts_audio_bytes_total.value("voice_help_stream")
+
+    try:
+        response = client.post("/api/v1/practice/voice-help-stream", json={"session_id": session["id"], "question_id": question["id"]})
+    finally:
+        set_tts_service(previous)
+    assert response.content == b"abcde"
+    assert tts_first_chunk_seconds.count("voice_help_stream") == first_chunks + 1
+    assert tts_audio_bytes_total.value("voice_help_stream") == sent + 5
+
+
+def test_instrumented_executor_reports_queue_depth_and_busy_threads():
+    release = threading.Event()
+    executor = InstrumentedThreadPoolExecutor("test_pool", max_workers=1)
+    try:
+        futures = [executor.submit(release.wait, 5) for _ in range(3)]
+        deadline = time.monotonic() + 5
+        while executor.busy_threads() != 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert executor_busy_threads.value("test_pool") == 1
+        assert executor_queue_depth.value("test_pool") == 2
+        assert 'executor_max_threads{executor="test_pool"} 1' in registry.render()
+        release.set()
+        assert all(f.result(timeout=5) for f in futures)
+        assert executor.busy_threads() == 0 and executor.queue_depth() == 0
+    finally:
+        release.set()
+        executor.shutdown()
@@ -0,0 +1,120 @@
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api.endpoints import practice
+from app.api.endpoints.difficulty import difficulty_levels_objects
+from app.models.practice import PracticeSession
+from app.services.packed_session import PackedSession
+from app.services.session_progress import session_progress
+from app.services.session_store import InMemorySessionStore
+from benchmarks import session_memory
+
+
+def _session(level, questions: int = 20) -> PracticeSession:
+    session = PracticeSession(difficulty_level_id=level.id, difficulty_level_details=level, seed=7)
+    rng = random.Random(level.id)
+    for _ in range(questions):
+        session.questions.append(practice.generate_question_for_session(session, rng))
+    session.questions[0].user_answer = 3
+    session.questions[0].is_correct = False
+    session.questions[0].time_spent = 2.25
+    session.questions[0].answered_at = datetime.now()
+    session.current_question_index = 1
+    return session
+
+
+@pytest.mark.parametrize("level", difficulty_levels_objects, ids=lambda level: level.code)
+def test_packed_session_round_trips_every_level(level):
+    session = _session(level)
+    packed = PackedSession(session)
+    assert packed.overflow is None
+    assert packed.to_session().model_dump_json() == session.model_dump_json()
+    assert packed.question(5) == session.questions[5]
+
+
+def test_unpackable_questions_are_kept_in_overflow():
+    session = _session(difficulty_levels_objects[-1], questions=4)
+    session.questions[1].question_string = "hand-written prompt"
+    session.questions[2].created_at = datetime.now(timezone.utc)
+
+    packed = PackedSession(session)
+    assert sorted(packed.overflow) == [1, 2]
+    assert packed.to_session().model_dump() == session.model_dump()
+
+    # Overflow entries are copies; changing the returned model does not reach the store
+    packed.question(1).question_string = "changed"
+    assert packed.question(1).question_string == "hand-written prompt"
+
+
+def test_update_patches_answers_and_appends_in_place():
+    level = difficulty_levels_objects[-1]
+    session = _session(level, questions=6)
+    packed = PackedSession(session)
+    records = packed.records
+
+    session.questions[3].user_answer, session.questions[3].is_correct = 5, True
+    session.questions[3].answered_at = datetime.now()
+    session.questions.append(practice.generate_question_for_session(session, random.Random(1)))
+    session.score = 1
+    packed.update(session, [3])
+
+    assert packed.records is records and packed.count == 7
+    assert packed.to_session().model_dump_json() == session.model_dump_json()
+    assert bytes(packed.records) == bytes(PackedSession(session).records)
+
+
+def test_update_moves_an_answer_that_no_longer_packs_to_overflow():
+    session = _session(difficulty_levels_objects[0], questions=3)
+    packed = PackedSession(session)
+    session.questions[1].user_answer = 2 ** 40
+    packed.update(session, [1])
+    assert sorted(packed.overflow) == [1]
+    assert packed.to_session().model_dump() == session.model_dump()
+
+
+def test_packed_store_returns_independent_models_for_cold_sessions():
+    store = InMemorySessionStore(practice._rebuild_compact_session, pack_sessions=True, live_sessions=0)
+    session = _session(difficulty_levels_objects[0], questions=5)
+    store.add(session)
+
+    loaded = store.get(session.id)
+    loaded.questions[2].user_answer = 11
+    assert store.get(session.id).questions[2].user_answer is None
+
+    store.save(loaded, [2])
+    assert store.get(session.id).questions[2].user_answer == 11
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_hot_sessions_are_served_live_and_cold_ones_rebuilt(compact):
+    store = InMemorySessionStore(practice._rebuild_compact_session, live_sessions=1)
+    level = difficulty_levels_objects[0]
+    first, second = (PracticeSession(difficulty_level_id=level.id, difficulty_level_details=level) for _ in range(2))
+    for _ in range(5):  # issued from the seed, as compact sessions are rebuilt from it
+        first.questions.append(practice._issue_next_question(first))
+    store.add(first, compact=compact)
+
+    loaded = store.get(first.id)
+    progress = session_progress(loaded)
+    loaded.questions[2].user_answer, loaded.questions[2].is_correct = 11, False
+    store.save(loaded, [2])
+    assert store.get(first.id) is loaded and loaded._progress is progress
+
+    # Another session takes the only live slot; the first is rebuilt from its saved record
+    store.add(second, compact=compact)
+    rebuilt = store.get(first.id)
+    assert rebuilt is not loaded
+    assert rebuilt.model_dump() == loaded.model_dump()
+
+
+def test_session_memory_benchmark_shows_packed_savings():
+    results = session_memory.run(sessions=20, question_counts=(10,), seed=1, latency_question_counts=(200,), requests=20)
+    report = results["questions_per_session"]["10"]
+    assert report["packed"]["bytes_per_session"] < report["pydantic"]["bytes_per_session"] / 4
+
+    latency = results["answer_latency"]["200"]
+    assert latency["packed_hot"]["count"] == 20
+    assert latency["packed_hot"]["p50_us"] < latency["packed_cold"]["p50_us"]
+    assert latency["compact_seeded_hot"]["p50_us"] < latency["compact_seeded_cold"]["p50_us"]
@@ -7,6 +7,8 @@ from typing import List
 from app.models.practice import PracticeSession, Question
 from app.models.difficulty import DifficultyLevel
 from app.api.endpoints.practice import generate_question_for_session, _calculate_answer, _get_operation_symbol, _generate_question_string
+from app.api.endpoints.difficulty import difficulty_levels_objects
+from app.services.operand_pair_index import get_operand_pair_index
 
 # --- Fixtures for Test Data ---
 
@@ -188,6 +190,66 @@ def test_generate_question_string():
         _generate_question_string([7, 2], []) # Mismatched ops and operands
 
 
+def test_operand_pair_index_respects_level_rules():
+    for level in difficulty_levels_objects:
+        index = get_operand_pair_index(level)
+        for op_word in level.operation_types:
+            triples = index.single_step_triples(op_word)
+            assert triples, f"No valid single steps for {level.code} {op_word}"
+            for o1, o2, result in triples:
+                assert 0 <= result <= level.max_number
+                if op_word == "addition":
+                    assert o1 + o2 == result
+                    if not level.allow_carry:
+                        assert (o1 % 10) + (o2 % 10) < 10, f"Carry in {o1} + {o2} for {level.code}"
+                else:
+                    assert o1 - o2 == result
+                    if not level.allow_borrow:
+                        assert (o1 % 10) >= (o2 % 10), f"Borrow in {o1} - {o2} for {level.code}"
+                if level.code == "within_100_tens":
+                    assert o1 % 10 == 0 and o2 % 10 == 0
+                if "within_100_two_one" in level.code:
+                    assert 10 <= o1 <= 99 and 0 <= o2 <= 9
+
+        # Every chainable first step must have at least one follow-up step
+        for (first_op, second_op), first_steps in index.chainable.items():
+            for _, _, result in first_steps:
+                assert index.follow_up_triples(second_op, result)
+
+
+def test_generated_questions_stay_within_bounds_for_builtin_levels():
+    for level in difficulty_levels_objects:
+        session = PracticeSession(
+            difficulty_level_id=level.id,
+            total_questions_planned=50,
+            difficulty_level_details=level
+        )
+        for _ in range(50):
+            question = generate_question_for_session(session)
+            assert 0 <= question.correct_answer <= level.max_number
+            assert question.correct_answer == _calculate_answer(question.operands, question.operations)
+            assert question.question_string == _generate_question_string(question.operands, question.operations)
+            session.questions.append(question)
+
+
+def test_session_wide_uniqueness_then_controlled_repeats():
+    tiny_level = DifficultyLevel(
+        id=99, name="Tiny", code="tiny_add", max_number=3, allow_carry=True, allow_borrow=True,
+        operation_types=["addition"], order=99
+    )
+    space = get_operand_pair_index(tiny_level).question_space
+    assert space == 10  # every a + b with a + b <= 3
+
+    session = PracticeSession(difficulty_level_id=99, total_questions_planned=40, difficulty_level_details=tiny_level)
+    for _ in range(40):
+        session.questions.append(generate_question_for_session(session))
+
+    strings = [q.question_string for q in session.questions]
+    assert len(set(strings[:space])) == space, "No repeats until the question space is used up"
+    for i in range(space, len(strings)):
+        assert strings[i] not in strings[i - 3:i], "Controlled repeats avoid the most recent questions"
+
+
 # Example of how one might mock if needed, e.g., to force multi-step:
 # from unittest.mock import patch
 # @patch('random.random', return_value=0.4) # Ensures multi-step if threshold is 0.5
@@ -207,3 +269,24 @@ def test_generate_question_string():
 # For example:
 # PYTHONPATH=. pytest backend/tests/test_practice_api.py
 # (or simply `pytest` if conftest.py or pytest.ini handles paths)
+
+
+def test_question_position_index_tracks_appends_and_replacements():
+    level = difficulty_levels_objects[3]
+    session = PracticeSession(difficulty_level_id=level.id, difficulty_level_details=level, total_questions_planned=300)
+    for _ in range(250):
+        session.questions.append(generate_question_for_session(session))
+    assert all(session.question_position(q.id) == i for i, q in enumerate(session.questions))
+    assert session.question_position(uuid4()) is None
+
+    session.questions.append(generate_question_for_session(session))
+    assert session.question_position(session.questions[-1].id) == 250
+
+    replacement = generate_question_for_session(session)
+    old_id = session.questions[10].id
+    session.questions[10] = replacement
+    assert session.question_position(replacement.id) == 10
+    assert session.question_position(old_id) is None
+
+    session.questions = session.questions[:5]
+    assert session.question_position(replacement.id) is None
@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from uuid import UUID
+from fastapi.testclient import TestClient
+
+from main import app
+from app.api.endpoints import practice
+from app.api.endpoints.practice import MAX_PREGENERATED_QUESTIONS, get_difficulty_detail_by_id, session_store, _issue_next_question
+from app.models.practice import PracticeSession
+
+# --- Fixtures ---
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app)
+
+# --- Helpers ---
+
+def _answer_payload(session_id: str, question: dict, correct: bool = True) -> dict:
+    payload = {"session_id": session_id, "question_id": question["id"], "time_spent": 2.5}
+    if question["question_type"] == "columnar":
+        payload["user_filled_operands"] = [[d or 0 for d in row] for row in question["columnar_operands"]]
+        payload["user_filled_result"] = [d or 0 for d in question["columnar_result_placeholders"]]
+    else:
+        payload["user_answer"] = question["correct_answer"] + (0 if correct else 1)
+    return payload
+
+
+# --- Pre-generated sessions ---
+
+def test_start_with_pregenerated_questions_returns_manifest(client: TestClient):
+    response = client.post("/api/v1/practice/start", json={
+        "difficulty_level_id": 3,
+        "total_questions": 12,
+        "pregenerate_questions": True
+    })
+    assert response.status_code == 200
+    body = response.json()
+
+    manifest = body["question_manifest"]
+    assert len(manifest) == 12
+    assert body["questions"] == [], "Full questions are not repeated next to the manifest"
+    assert len({entry["question_string"] for entry in manifest}) == 12, "Manifest should not repeat questions"
+    assert all("correct_answer" not in entry for entry in manifest)
+
+    # /question is now a lookup into the manifest, in order
+    session_id = body["id"]
+    for entry in manifest[:3]:
+        question = client.get("/api/v1/practice/question", params={"session_id": session_id}).json()
+        assert question["id"] == entry["id"]
+        assert client.post("/api/v1/practice/answer", json=_answer_payload(session_id, question)).status_code == 200
+
+    session = session_store.get(UUID(session_id))
+    assert len(session.questions) == 12, "No questions are generated after start"
+
+
+def test_start_without_pregeneration_has_no_manifest(client: TestClient):
+    body = client.post("/api/v1/practice/start", json={"difficulty_level_id": 1}).json()
+    assert "question_manifest" not in body
+    assert body["questions"] == []
+
+
+def test_start_never_exposes_the_seed(client: TestClient):
+    for extra in ({}, {"pregenerate_questions": True}, {"compact_storage": True}):
+        body = client.post("/api/v1/practice/start", json={"difficulty_level_id": 6, "total_questions": 2, **extra}).json()
+        assert "seed" not in body
+        assert session_store.get(UUID(body["id"])).seed  # the server still has it
+    schema = client.get("/openapi.json").json()["components"]["schemas"]
+    assert "seed" not in schema["PracticeSession"]["properties"]
+    assert "seed" not in schema["PracticeSessionStart"]["properties"]
+
+
+def test_start_bounds_total_questions(client: TestClient):
+    for total in (0, -1):
+        response = client.post("/api/v1/practice/start", json={"difficulty_level_id": 1, "total_questions": total})
+        assert response.status_code == 422
+
+    pregenerated = {"difficulty_level_id": 1, "pregenerate_questions": True}
+    response = client.post("/api/v1/practice/start", json={**pregenerated, "total_questions": MAX_PREGENERATED_QUESTIONS + 1})
+    assert response.status_code == 422
+    body = client.post("/api/v1/practice/start", json={**pregenerated, "total_questions": MAX_PREGENERATED_QUESTIONS}).json()
+    assert len(body["question_manifest"]) == MAX_PREGENERATED_QUESTIONS
+
+
+def test_long_lazy_sessions_still_start(client: TestClient):
+    body = client.post("/api/v1/practice/start", json={"difficulty_level_id": 1, "total_questions": 1000}).json()
+    assert body["total_questions_planned"] == 1000 and body["questions"] == []
+    question = client.get("/api/v1/practice/question", params={"session_id": body["id"]})
+    assert question.status_code == 200
+
+
+def test_pregeneration_runs_off_the_event_loop(client: TestClient, monkeypatch):
+    on_loop = []
+    original = practice._pregenerate_session_questions
+
+    def recording(session):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:  # no event loop in this thread
+            on_loop.append(False)
+        original(session)
+
+    monkeypatch.setattr(practice, "_pregenerate_session_questions", recording)
+    body = client.post("/api/v1/practice/start", json={
+        "difficulty_level_id": 2, "total_questions": 4, "pregenerate_questions": True
+    }).json()
+    assert len(body["question_manifest"]) == 4
+    assert on_loop == [False]
+
+# --- Compact, seed-based sessions ---
+
+def test_compact_session_regenerates_questions_from_seed(client: TestClient):
+    body = client.post("/api/v1/practice/start", json={
+        "difficulty_level_id": 6,
+        "total_questions": 5,
+        "compact_storage": True
+    }).json()
+    session_id = body["id"]
+    assert UUID(session_id) in session_store
+    assert session_store.is_compact(UUID(session_id))
+
+    issued = []
+    for i in range(5):
+        question = client.get("/api/v1/practice/question", params={"session_id": session_id}).json()
+        # Asking again before answering returns the same, regenerated question
+        again = client.get("/api/v1/practice/question", params={"session_id": session_id}).json()
+        assert again["id"] == question["id"]
+        assert again["question_string"] == question["question_string"]
+        assert again["created_at"] == question["created_at"]
+        issued.append(question)
+        answered = client.post("/api/v1/practice/answer", json=_answer_payload(session_id, question, correct=i % 2 == 0))
+        assert answered.status_code == 200
+
+    summary = client.get("/api/v1/practice/summary", params={"session_id": session_id}).json()
+    assert [q["id"] for q in summary["questions"]] == [q["id"] for q in issued]
+    assert [q["question_string"] for q in summary["questions"]] == [q["question_string"] for q in issued]
+    assert all(q["time_spent"] == 2.5 and q["answered_at"] for q in summary["questions"])
+    assert summary["score"] == sum(1 for q in summary["questions"] if q["is_correct"])
+    assert summary["end_time"] is not None
+
+
+def test_same_seed_generates_same_questions():
+    level = get_difficulty_detail_by_id(3)
+    first = PracticeSession(difficulty_level_id=3, difficulty_level_details=level, seed=1234)
+    second = PracticeSession(difficulty_level_id=3, difficulty_level_details=level, seed=1234)
+    for session in (first, second):
+        for _ in range(8):
+            session.questions.append(_issue_next_question(session))
+    assert [q.question_string for q in first.questions] == [q.question_string for q in second.questions]
+    assert [q.id for q in first.questions] == [q.id for q in second.questions]
@@ -0,0 +1,104 @@
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from main import app
+from app.api.endpoints.practice import session_store, WS_CLOSE_SESSION_NOT_FOUND
+
+
+def _ws_url(session_id: str) -> str:
+    return f"/api/v1/practice/ws/{session_id}"
+
+
+def _answer_frame(question: dict, correct: bool = True) -> dict:
+    frame = {"type": "answer", "question_id": question["id"], "time_spent": 2.0}
+    if question["question_type"] == "columnar":
+        width = len(question["columnar_result_placeholders"])
+        a, b = question["operands"][:2]
+        total = a + b if question["columnar_operation"] == "+" else a - b
+        frame["user_filled_operands"] = [[int(d) for d in str(n).zfill(width)] for n in (a, b)]
+        frame["user_filled_result"] = [int(d) for d in str(total).zfill(width)]
+        if not correct:
+            frame["user_filled_result"][-1] = (frame["user_filled_result"][-1] + 1) % 10
+    else:
+        frame["user_answer"] = question["correct_answer"] + (0 if correct else 1)
+    return frame
+
+
+def _start(client: TestClient, total: int) -> str:
+    return client.post("/api/v1/practice/start", json={"difficulty_level_id": 6, "total_questions": total}).json()["id"]
+
+
+def test_channel_pushes_questions_and_completes_the_session():
+    client = TestClient(app)
+    session_id = _start(client, total=3)
+    with client.websocket_connect(_ws_url(session_id)) as ws:
+        frame = ws.receive_json()
+        seen = []
+        for i in range(3):
+            assert frame["type"] == "question"
+            question = frame["question"]
+            assert question["id"] not in seen
+            seen.append(question["id"])
+
+            ws.send_json(_answer_frame(question, correct=i != 0))
+            result = ws.receive_json()
+            assert result["type"] == "result" and result["question"]["id"] == question["id"]
+            assert result["question"]["is_correct"] == (i != 0)
+            frame = ws.receive_json()
+
+        assert frame["type"] == "completed"
+        assert frame["summary"]["answered"] == 3 and frame["summary"]["score"] == 2
+        with pytest.raises(WebSocketDisconnect):
+            ws.receive_json()
+
+    session = session_store.get(UUID(session_id))
+    assert session.end_time is not None and [str(q.id) for q in session.questions] == seen
+
+
+def test_channel_reports_bad_frames_and_keeps_going():
+    client = TestClient(app)
+    session_id = _start(client, total=2)
+    with client.websocket_connect(_ws_url(session_id)) as ws:
+        question = ws.receive_json()["question"]
+
+        ws.send_text("not json")
+        assert ws.receive_json()["status_code"] == 400
+        ws.send_json({"type": "dance"})
+        assert ws.receive_json()["status_code"] == 400
+        ws.send_json({"type": "answer", "question_id": "nope"})
+        assert ws.receive_json()["status_code"] == 422
+        ws.send_json({"type": "answer", "question_id": str(uuid4()), "user_answer": 1})
+        assert ws.receive_json() == {"type": "error", "status_code": 404, "detail": "Question not found in this session"}
+
+        ws.send_json({"type": "question"})  # asking again returns the same question
+        assert ws.receive_json()["question"]["id"] == question["id"]
+
+        ws.send_json(_answer_frame(question))
+        assert ws.receive_json()["type"] == "result"
+        assert ws.receive_json()["type"] == "question"
+        ws.send_json(_answer_frame(question))  # a double-tapped answer is rejected like /answer does
+        error = ws.receive_json()
+        assert error["type"] == "error" and error["status_code"] == 400
+
+    assert session_store.get(UUID(session_id)).score == 1
+
+
+def test_channel_for_unknown_or_finished_sessions():
+    client = TestClient(app)
+    with client.websocket_connect(_ws_url(str(uuid4()))) as ws:
+        assert ws.receive_json()["status_code"] == 404
+        with pytest.raises(WebSocketDisconnect) as excinfo:
+            ws.receive_json()
+        assert excinfo.value.code == WS_CLOSE_SESSION_NOT_FOUND
+
+    session_id = _start(client, total=1)
+    question = client.get("/api/v1/practice/question", params={"session_id": session_id}).json()
+    answer = _answer_frame(question)
+    answer.pop("type")
+    client.post("/api/v1/practice/answer", json=dict(answer, session_id=session_id))
+    with client.websocket_connect(_ws_url(session_id)) as ws:
+        frame = ws.receive_json()
+        assert frame["type"] == "completed" and frame["summary"]["completed"]
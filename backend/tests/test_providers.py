@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from app.services import providers
+from app.services.providers import get_llm_service, set_llm_service, set_tts_service, warm_up
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def unconfigured(monkeypatch):
+    """No provider credentials, and no services built yet."""
+    for name in ("QWEN_API_KEY", "OPENAI_API_KEY", "AZURE_SPEECH_KEY", "AZURE_SPEECH_REGION"):
+        monkeypatch.delenv(name, raising=False)
+    previous = set_llm_service(None), set_tts_service(None)
+    yield
+    set_llm_service(previous[0])
+    set_tts_service(previous[1])
+
+
+def _help_request(client: TestClient) -> dict:
+    session = client.post("/api/v1/practice/start", json={"difficulty_level_id": 6, "total_questions": 2}).json()
+    question = client.get("/api/v1/practice/question", params={"session_id": session["id"]}).json()
+    return {"session_id": session["id"], "question_id": question["id"]}
+
+
+def test_importing_the_app_builds_no_provider_clients():
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("QWEN_", "AZURE_SPEECH_", "OPENAI_"))}
+    check = (
+        "import sys, main\n"
+        "from app.services import providers\n"
+        "assert providers._llm_service is None and providers._tts_service is None\n"
+        "assert 'openai' not in sys.modules and 'azure.cognitiveservices.speech' not in sys.modules\n"
+    )
+    result = subprocess.run([sys.executable, "-c", check], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_importing_one_service_does_not_import_the_others():
+    check = (
+        "import sys, app.services.session_progress\n"
+        "loaded = [m for m in ('numpy', 'sqlite3', 'app.services.session_store', 'app.services.providers') if m in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    result = subprocess.run([sys.executable, "-c", check], cwd=BACKEND_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_unconfigured_providers_degrade_per_endpoint(unconfigured):
+    client = TestClient(app)
+    request = _help_request(client)
+
+    help_response = client.post("/api/v1/practice/help", json=request)
+    assert help_response.status_code == 200 and help_response.json()["help_content"]
+    voice_response = client.post("/api/v1/practice/voice-help", json=request)
+    assert voice_response.status_code == 503
+    assert client.post("/api/v1/practice/voice-help-stream", json=request).status_code == 503
+
+    warm_up()  # logs instead of raising
+    assert providers._llm_service is None and providers._tts_service is None
+
+
+def test_services_are_built_once_and_tts_shares_the_llm_service(monkeypatch, unconfigured):
+    monkeypatch.setenv("QWEN_API_KEY", "test")
+    monkeypatch.setenv("AZURE_SPEECH_KEY", "test")
+    monkeypatch.setenv("AZURE_SPEECH_REGION", "eastus")
+    warm_up()
+
+    llm = get_llm_service()
+    assert get_llm_service() is llm
+    assert providers.get_tts_service() is providers._tts_service
+    assert providers.get_tts_service().llm_service is llm
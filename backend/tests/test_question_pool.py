@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.api.endpoints.difficulty import difficulty_levels_objects
+from app.services import question_pool as question_pool_module
+from app.services.question_pool import QuestionPool, question_pool
+from app.services.question_signature import question_signature
+
+
+def test_pool_fills_serves_and_refills_below_low_water():
+    async def scenario():
+        pool = QuestionPool(capacity=64, low_water=16)
+        level = difficulty_levels_objects[2]
+        pool.start([level])
+        try:
+            await pool.wait_ready()
+            assert pool.depth(level.id) == 64
+            session_id = uuid4()
+            seen = set()
+            for _ in range(60):
+                question = pool.take(level.id, session_id, lambda q: question_signature(q) not in seen)
+                if question is None:
+                    continue
+                assert question.session_id == session_id
+                seen.add(question_signature(question))
+            await asyncio.sleep(0.2)  # let the background task top the pool back up
+            stats = pool.stats()[level.id]
+            assert stats["depth"] >= 16
+            assert stats["refilled_total"] > 64
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_pool_rejects_questions_the_session_has_seen():
+    async def scenario():
+        pool = QuestionPool(capacity=8, low_water=1)
+        level = difficulty_levels_objects[0]
+        pool.start([level])
+        try:
+            await pool.wait_ready()
+            assert pool.take(level.id, uuid4(), lambda q: False) is None
+            assert pool.depth(level.id) == 8  # rejected questions stay in the pool
+            assert pool.stats()[level.id]["misses"] == 1
+            assert pool.take(999, uuid4(), lambda q: True) is None
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_question_endpoint_draws_from_the_pool_when_running():
+    with TestClient(app) as client:
+        assert question_pool.running
+        client.portal.call(question_pool.wait_ready)
+        level_id = difficulty_levels_objects[5].id
+        depth_before = question_pool.depth(level_id)
+        session = client.post("/api/v1/practice/start", json={"difficulty_level_id": level_id, "total_questions": 3}).json()
+        question = client.get("/api/v1/practice/question", params={"session_id": session["id"]}).json()
+        assert question["session_id"] == session["id"]
+        assert question_pool.depth(level_id) == depth_before - 1
+
+        stats = client.get("/api/v1/practice/pool/stats").json()
+        assert stats["running"] is True and stats["ready"] is True
+        assert stats["levels"][str(level_id)]["capacity"] == question_pool.capacity
+    assert not question_pool.running
+
+
+def test_app_starts_before_the_pool_is_filled(monkeypatch):
+    release = threading.Event()
+    original = question_pool_module._generate_templates
+
+    def slow_templates(level, count):
+        release.wait(10)
+        return original(level, count)
+
+    monkeypatch.setattr(question_pool_module, "_generate_templates", slow_templates)
+    try:
+        with TestClient(app) as client:
+            assert question_pool.running and not question_pool.ready
+            session = client.post("/api/v1/practice/start", json={"difficulty_level_id": 3, "total_questions": 2}).json()
+            question = client.get("/api/v1/practice/question", params={"session_id": session["id"]})
+            assert question.status_code == 200  # generated inline while the pool fills
+            assert client.get("/api/v1/practice/pool/stats").json()["ready"] is False
+
+            release.set()
+            client.portal.call(question_pool.wait_ready)
+            assert question_pool.depth(3) == question_pool.capacity
+    finally:
+        release.set()
@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.endpoints import practice
+from app.api.endpoints.practice import AnswerPayload, get_difficulty_detail_by_id, session_store, _issue_next_question
+from app.models.practice import PracticeSession
+from app.services import session_locks
+from app.services.metrics import session_lock_wait_seconds
+from app.services.session_locks import StripedLocks
+
+
+def _ids_on_stripes(locks: StripedLocks, same: bool):
+    first = uuid4()
+    while True:
+        second = uuid4()
+        if (locks.stripe(first) == locks.stripe(second)) == same:
+            return first, second
+
+
+def test_same_session_waits_and_other_stripes_do_not():
+    locks = StripedLocks(stripes=8)
+    session_a, session_b = _ids_on_stripes(locks, same=False)
+
+    async def scenario():
+        assert locks.lock_for(session_a) is locks.lock_for(UUID(int=session_a.int))
+        holding, release = asyncio.Event(), asyncio.Event()
+
+        async def hold_a():
+            async with locks.hold(session_a):
+                holding.set()
+                await release.wait()
+
+        holder = asyncio.create_task(hold_a())
+        await holding.wait()
+        async with locks.hold(session_b):  # a different stripe is free
+            pass
+
+        waited_before = session_lock_wait_seconds.count()
+        asyncio.get_running_loop().call_later(0.05, release.set)
+        async with locks.hold(session_a):  # suspends until the holder lets go
+            assert release.is_set()
+        assert session_lock_wait_seconds.count() == waited_before + 1
+        await holder
+
+    asyncio.run(scenario())
+
+
+def test_coroutines_on_one_loop_exclude_each_other_across_awaits():
+    locks = StripedLocks(stripes=8)
+    session_id = uuid4()
+    events = []
+
+    async def update(name: str):
+        async with locks.hold(session_id):
+            events.append((name, "enter"))
+            await asyncio.sleep(0.01)  # another coroutine runs here, on the same thread
+            events.append((name, "exit"))
+
+    async def scenario():
+        await asyncio.gather(update("first"), update("second"))
+
+    asyncio.run(scenario())
+    assert events == [("first", "enter"), ("first", "exit"), ("second", "enter"), ("second", "exit")]
+
+
+def test_wait_behind_queued_waiters_is_recorded(monkeypatch):
+    waits = []
+    monkeypatch.setattr(session_locks, "session_lock_wait_seconds", SimpleNamespace(observe=waits.append))
+    locks = StripedLocks(stripes=4)
+    session_id = uuid4()
+
+    async def hold_for(seconds: float):
+        async with locks.hold(session_id):
+            await asyncio.sleep(seconds)
+
+    async def scenario():
+        lock = locks.lock_for(session_id)
+        await lock.acquire()
+        queued = asyncio.create_task(hold_for(0.05))
+        await asyncio.sleep(0)  # now waiting for the lock
+        lock.release()
+        # The lock is free at this instant, but the queued waiter is granted it first
+        await hold_for(0)
+        await queued
+
+    asyncio.run(scenario())
+    assert len(waits) == 2 and waits[-1] >= 0.04
+
+
+def test_locks_follow_the_running_loop():
+    locks = StripedLocks(stripes=4)
+    session_id = uuid4()
+
+    async def hold_once():
+        async with locks.hold(session_id):
+            return locks.lock_for(session_id)
+
+    # A lock bound to a finished loop is not reused by the next one
+    assert asyncio.run(hold_once()) is not asyncio.run(hold_once())
+
+
+def test_concurrent_double_tap_scores_once():
+    level = get_difficulty_detail_by_id(1)
+    session = PracticeSession(difficulty_level_id=1, difficulty_level_details=level, total_questions_planned=3, seed=1)
+    question = _issue_next_question(session)
+    while question.question_type != "arithmetic":
+        session.seed += 1
+        question = _issue_next_question(session)
+    session.questions.append(question)
+    session_store.add(session)
+    payload = AnswerPayload(session_id=session.id, question_id=question.id, user_answer=question.correct_answer)
+
+    async def answer():
+        try:
+            await practice.submit_answer(payload)
+            return "scored"
+        except HTTPException as exc:
+            return exc.status_code, exc.detail
+
+    async def double_tap():
+        # The second request arrives while the first holds the session's lock
+        lock = practice.session_locks.lock_for(session.id)
+        await lock.acquire()
+        taps = asyncio.gather(answer(), answer())
+        await asyncio.sleep(0.01)
+        lock.release()
+        return await taps
+
+    outcomes = asyncio.run(double_tap())
+    assert sorted(outcomes, key=str) == [(400, "Arithmetic question already answered"), "scored"]
+    assert session_store.get(session.id).score == 1
+    session_store.delete(session.id)
+
+
+def test_striped_locks_need_at_least_one_stripe():
+    with pytest.raises(ValueError):
+        StripedLocks(stripes=0)
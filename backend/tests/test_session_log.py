@@ -0,0 +1,194 @@
+import os
+import time
+from datetime import datetime
+
+from app.api.endpoints import practice
+from app.api.endpoints.practice import get_difficulty_detail_by_id, _issue_next_question, _rebuild_compact_session
+from app.models.practice import PracticeSession
+from app.services import session_log
+from app.services.session_log import LoggedState, SessionEventLog
+from app.services.session_store import InMemorySessionStore
+
+
+def _store(path, commit_window: float = 0.001) -> InMemorySessionStore:
+    store = InMemorySessionStore(_rebuild_compact_session)
+    store.attach_event_log(SessionEventLog(str(path), commit_window))
+    return store
+
+
+def _play(store: InMemorySessionStore, level_id: int = 6, compact: bool = False, answers: int = 2) -> PracticeSession:
+    """Starts a session and drives it like the endpoints do: issue, answer, save with the answered position."""
+    session = PracticeSession(difficulty_level_id=level_id, difficulty_level_details=get_difficulty_detail_by_id(level_id), total_questions_planned=4)
+    store.add(session, compact=compact)
+    for i in range(answers + 1):
+        session = store.get(session.id)
+        session.questions.append(_issue_next_question(session))
+        session.current_question_index = len(session.questions) - 1
+        store.save(session, ())
+        if i < answers:
+            session = store.get(session.id)
+            question = session.questions[-1]
+            question.user_answer = question.correct_answer
+            question.is_correct = True
+            question.time_spent = 1.25
+            question.answered_at = datetime.utcnow()
+            session.score += 1
+            store.save(session, (len(session.questions) - 1,))
+    return store.get(session.id)
+
+
+def _dumps(store: InMemorySessionStore, sessions):
+    return {s.id: store.get(s.id).model_dump() for s in sessions}
+
+
+def test_restart_restores_sessions_from_the_log(tmp_path):
+    path = tmp_path / "sessions.log"
+    store = _store(path)
+    sessions = [_play(store), _play(store, compact=True), _play(store, level_id=1, answers=0)]
+    ended = store.get(sessions[0].id)
+    ended.end_time = datetime.utcnow()
+    store.save(ended)
+    deleted = _play(store)
+    store.delete(deleted.id)
+    expected = _dumps(store, sessions)
+    store.close()
+
+    restarted = _store(path)
+    assert len(restarted) == 3 and deleted.id not in restarted
+    assert _dumps(restarted, sessions) == expected
+    assert restarted.is_compact(sessions[1].id)
+    restarted.close()
+
+
+def test_torn_record_at_the_end_is_cut_off(tmp_path):
+    path = tmp_path / "sessions.log"
+    store = _store(path)
+    session = _play(store)
+    store.close()
+    intact_size = path.stat().st_size
+    with open(path, "ab") as log_file:
+        log_file.write(b"\x40\x00\x00\x00partial")  # header of a record the crash cut short
+
+    restarted = _store(path)
+    restored = restarted.get(session.id)
+    assert restored.model_dump() == session.model_dump() and restored.seed == session.seed
+    assert path.stat().st_size == intact_size
+    _play(restarted)  # appending continues after the last complete record
+    restarted.close()
+    assert len(_store(path)) == 2
+
+
+def test_compaction_keeps_live_sessions_and_concurrent_writes(tmp_path):
+    path = tmp_path / "sessions.log"
+    store = _store(path)
+    kept = [_play(store) for _ in range(3)]
+    for _ in range(5):
+        store.delete(_play(store).id)
+
+    # A request that lands while compaction is rewriting the log
+    log = store.event_log
+    original_replay = log.replay
+    late = []
+
+    def replay_then_write(*args, **kwargs):
+        replayed = original_replay(*args, **kwargs)
+        late.append(_play(store, answers=1))
+        return replayed
+
+    log.replay = replay_then_write
+    size_before = path.stat().st_size
+    store.compact_event_log()
+    log.replay = original_replay
+    assert path.stat().st_size < size_before
+
+    _play(store)  # appends go to the compacted file
+    expected = _dumps(store, kept + late)
+    store.close()
+
+    restarted = _store(path)
+    assert len(restarted) == 5
+    assert _dumps(restarted, kept + late) == expected
+    restarted.close()
+
+
+def test_compaction_neither_regenerates_questions_nor_fsyncs_under_the_lock(tmp_path, monkeypatch):
+    path = tmp_path / "sessions.log"
+    store = _store(path)
+    kept = [_play(store, compact=True), _play(store)]
+    store.delete(_play(store).id)
+    log = store.event_log
+
+    def no_generation(*args, **kwargs):
+        raise AssertionError("compaction regenerated a question")
+
+    fsynced_under_lock = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: fsynced_under_lock.append(log._lock.locked()) or fsync(fd))
+    original_replay = log.replay
+
+    def replay_then_write(*args, **kwargs):
+        replayed = original_replay(*args, **kwargs)
+        for _ in range(60):  # more than the bytes compaction copies under the lock
+            kept.append(_play(store, answers=3))
+        monkeypatch.setattr(practice, "_issue_next_question", no_generation)
+        return replayed
+
+    monkeypatch.setattr(practice, "_issue_next_question", no_generation)
+    monkeypatch.setattr(practice, "_rebuild_questions", no_generation)
+    log.replay = replay_then_write
+    store.compact_event_log()
+    log.replay = original_replay
+    assert len(fsynced_under_lock) >= 2 and not any(fsynced_under_lock)  # the snapshot and the copied tail
+    monkeypatch.undo()
+
+    expected = _dumps(store, kept)
+    store.close()
+    restarted = _store(path)
+    assert _dumps(restarted, kept) == expected
+    restarted.close()
+
+
+def test_saves_only_check_the_answered_positions(tmp_path, monkeypatch):
+    log = SessionEventLog(str(tmp_path / "sessions.log"))
+    session = PracticeSession(difficulty_level_id=6, difficulty_level_details=get_difficulty_detail_by_id(6), total_questions_planned=200)
+    for _ in range(200):
+        session.questions.append(_issue_next_question(session))
+    logged = log.log_start(session, compact=False)
+
+    checked = []
+    is_answered = session_log._is_answered
+    monkeypatch.setattr(session_log, "_is_answered", lambda question: checked.append(question) or is_answered(question))
+    question = session.questions[150]
+    question.user_answer, question.is_correct, question.answered_at = 1, False, datetime.utcnow()
+    written = log.records_written
+    log.log_save(session, logged, [150])
+    assert len(checked) == 1 and log.records_written == written + 1 and logged.answered[150]
+
+    # Without positions every question not logged as answered is checked; nothing is logged twice
+    log.log_save(session, logged)
+    assert len(checked) == 1 + 199 and log.records_written == written + 1
+    log.close()
+
+
+def test_saves_are_group_committed(tmp_path):
+    store = _store(tmp_path / "sessions.log", commit_window=0.05)
+    for _ in range(10):
+        _play(store)
+    log = store.event_log
+    time.sleep(0.2)
+    assert log.records_written >= 60
+    assert 1 <= log.syncs < log.records_written / 10
+    store.close()
+
+
+def test_evicted_sessions_are_not_restored(tmp_path):
+    path = tmp_path / "sessions.log"
+    store = _store(path)
+    store.max_entries = 2
+    sessions = [_play(store) for _ in range(3)]
+    store.close()
+
+    restarted = _store(path)
+    assert sessions[0].id not in restarted
+    assert all(s.id in restarted for s in sessions[1:])
+    restarted.close()
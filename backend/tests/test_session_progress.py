@@ -0,0 +1,44 @@
+from app.api.endpoints.practice import get_difficulty_detail_by_id, _issue_next_question
+from app.models.practice import PracticeSession
+from app.services.session_progress import session_progress
+
+
+def _session(issued: int) -> PracticeSession:
+    level = get_difficulty_detail_by_id(4)
+    session = PracticeSession(difficulty_level_id=level.id, difficulty_level_details=level, total_questions_planned=issued)
+    for _ in range(issued):
+        session.questions.append(_issue_next_question(session))
+    return session
+
+
+def test_progress_tracks_answers_and_next_open_position():
+    session = _session(6)
+    progress = session_progress(session)
+    assert progress.answered_count == 0 and progress.next_unanswered() == 0
+
+    for position in (0, 2, 1):
+        session.questions[position].user_answer = 1
+        progress.record_answer(position)
+    progress.record_answer(2)  # recording twice does not double count
+    assert progress.answered_count == 3
+    assert progress.next_unanswered() == 3
+    assert not progress.all_answered()
+
+    for position in (5, 4, 3):
+        progress.record_answer(position)
+    assert progress.next_unanswered() is None and progress.all_answered()
+
+
+def test_progress_catches_up_with_appended_and_loaded_questions():
+    session = _session(3)
+    session.questions[1].is_correct = True  # answered before the progress existed, e.g. a loaded session
+    progress = session_progress(session)
+    assert progress.answered_count == 1 and progress.next_unanswered() == 0
+
+    session.total_questions_planned = 4
+    session.questions.append(_issue_next_question(session))
+    progress = session_progress(session)
+    assert progress.covered == 4 and progress.answered_count == 1
+
+    session.questions = session.questions[:2]
+    assert session_progress(session).covered == 2
@@ -0,0 +1,303 @@
+import asyncio
+import sqlite3
+import threading
+from uuid import uuid4
+
+import pytest
+
+from fastapi import HTTPException
+
+from app.api.endpoints import practice
+from app.api.endpoints.practice import get_difficulty_detail_by_id, _issue_next_question, _rebuild_compact_session
+from app.models.practice import PracticeSession
+from app.services.seeded_session_store import SeededSessionState
+from app.services.session_store import InMemorySessionStore, SessionConflictError, SharedSessionStore, SQLiteSessionStore
+
+
+def _session_with_answers(level_id: int = 6, issued: int = 4) -> PracticeSession:
+    session = PracticeSession(difficulty_level_id=level_id, difficulty_level_details=get_difficulty_detail_by_id(level_id), total_questions_planned=6)
+    for _ in range(issued):
+        session.questions.append(_issue_next_question(session))
+    session.questions[0].user_answer = 7
+    session.questions[0].is_correct = False
+    session.questions[0].time_spent = 1.5
+    return session
+
+
+@pytest.fixture(params=["memory", "sqlite", "shared"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemorySessionStore(_rebuild_compact_session)
+    else:
+        store_class = SQLiteSessionStore if request.param == "sqlite" else SharedSessionStore
+        sqlite_store = store_class(_rebuild_compact_session, str(tmp_path / "sessions.db"))
+        yield sqlite_store
+        sqlite_store.close()
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_store_round_trips_sessions(store, compact):
+    session = _session_with_answers()
+    store.add(session, compact=compact)
+    assert session.id in store and store.is_compact(session.id) == compact
+
+    loaded = store.get(session.id)
+    assert [q.question_string for q in loaded.questions] == [q.question_string for q in session.questions]
+    assert loaded.questions[0].user_answer == 7 and loaded.questions[0].time_spent == 1.5
+
+    loaded.score = 3
+    loaded.questions[1].user_answer = loaded.questions[1].correct_answer
+    store.save(loaded)
+    reloaded = store.get(session.id)
+    assert reloaded.score == 3
+    assert reloaded.questions[1].user_answer == loaded.questions[1].correct_answer
+
+    store.delete(session.id)
+    assert store.get(session.id) is None and len(store) == 0
+    assert store.get(uuid4()) is None
+
+
+def test_sqlite_store_persists_across_connections(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    session = _session_with_answers()
+    first = SQLiteSessionStore(_rebuild_compact_session, path)
+    first.add(session)
+    first.close()
+
+    second = SQLiteSessionStore(_rebuild_compact_session, path)
+    assert second._db().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    restored = second.get(session.id)
+    assert restored.model_dump() == session.model_dump() and restored.seed == session.seed
+    second.close()
+
+
+def test_sqlite_store_saves_loaded_sessions_in_the_mode_of_their_row(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    session = _session_with_answers()
+    first = SQLiteSessionStore(_rebuild_compact_session, path)
+    first.add(session, compact=True)
+    first.close()
+
+    second = SQLiteSessionStore(_rebuild_compact_session, path)
+    statements = []
+    second._db().set_trace_callback(statements.append)
+    loaded = second.get(session.id)
+    loaded.score = 2
+    second.save(loaded)
+    second.flush()
+    # The mode came from the row get() read; nothing per session is kept in the store
+    assert not any(statement.startswith("SELECT compact FROM") for statement in statements)
+    assert second.is_compact(session.id) and second.get(session.id).score == 2
+    second.close()
+
+
+def test_sqlite_store_groups_saves_per_event_loop_tick(tmp_path):
+    store = SQLiteSessionStore(_rebuild_compact_session, str(tmp_path / "sessions.db"))
+    sessions = [_session_with_answers(issued=1) for _ in range(20)]
+
+    async def burst():
+        for session in sessions:
+            store.add(session)
+        assert store.flushes == 0  # nothing written until the loop gets a turn
+        assert store.get(sessions[0].id).id == sessions[0].id  # pending rows are readable
+        await asyncio.sleep(0)
+
+    asyncio.run(burst())
+    assert store.flushes == 1 and store.rows_written == 20
+    assert len(store) == 20
+    store.close()
+
+
+def test_sqlite_store_commits_off_the_event_loop(tmp_path):
+    store = SQLiteSessionStore(_rebuild_compact_session, str(tmp_path / "sessions.db"))
+    commit_threads = []
+    store._writer_db().set_trace_callback(lambda statement: statement == "COMMIT" and commit_threads.append(threading.get_ident()))
+    kept, deleted = _session_with_answers(issued=1), _session_with_answers(issued=1)
+
+    async def requests():
+        loop_thread = threading.get_ident()
+        store.add(kept)
+        store.add(deleted)
+        version = store.version(kept.id)  # numbered without flushing
+        assert store.flushes == 0 and version is not None
+        while store.flushes == 0:
+            await asyncio.sleep(0.001)
+        assert store.version(kept.id) not in (None, version)
+
+        store.delete(deleted.id)
+        assert deleted.id not in store and store.get(deleted.id) is None and len(store) == 1
+        while store.flushes == 1:
+            await asyncio.sleep(0.001)
+        return loop_thread
+
+    loop_thread = asyncio.run(requests())
+    assert len(commit_threads) == 2 and loop_thread not in commit_threads
+    assert len(store) == 1 and kept.id in store and deleted.id not in store
+    store.close()
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_shared_store_rejects_saves_from_stale_copies(tmp_path, compact):
+    path = str(tmp_path / "sessions.db")
+    worker_a = SharedSessionStore(_rebuild_compact_session, path)
+    worker_b = SharedSessionStore(_rebuild_compact_session, path)
+    session = _session_with_answers()
+    worker_a.add(session, compact=compact)
+
+    copy_a, copy_b = worker_a.get(session.id), worker_b.get(session.id)
+    copy_a.score = 1
+    worker_a.save(copy_a)
+    copy_b.score = 5
+    with pytest.raises(SessionConflictError):
+        worker_b.save(copy_b)
+    assert worker_b.get(session.id).score == 1  # the stale write was not applied
+
+    retry = worker_b.get(session.id)
+    retry.score += 1
+    worker_b.save(retry)
+    assert worker_a.get(session.id).score == 2 and worker_b.is_compact(session.id) == compact
+    worker_a.close()
+    worker_b.close()
+
+
+def test_sqlite_store_adds_version_column_to_existing_databases(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE practice_sessions (id BLOB PRIMARY KEY, compact INTEGER NOT NULL, data BLOB NOT NULL, updated_at REAL NOT NULL) WITHOUT ROWID")
+    conn.close()
+
+    store = SharedSessionStore(_rebuild_compact_session, path)
+    session = _session_with_answers()
+    store.add(session)
+    loaded = store.get(session.id)
+    store.save(loaded)
+    assert store.get(session.id)._store_version == 2
+    store.close()
+
+
+def test_update_session_reruns_handler_on_conflict():
+    calls = []
+
+    def handler():
+        calls.append(1)
+        if len(calls) < 3:
+            raise SessionConflictError(uuid4())
+        return "done"
+
+    assert asyncio.run(practice._update_session(uuid4(), handler)) == "done" and len(calls) == 3
+
+    def always_conflicts():
+        raise SessionConflictError(uuid4())
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(practice._update_session(uuid4(), always_conflicts))
+    assert excinfo.value.status_code == 409
+
+
+def test_seeded_state_bytes_round_trip():
+    session = _session_with_answers()
+    session.end_time = session.start_time
+    state = SeededSessionState.from_bytes(SeededSessionState(session).to_bytes())
+    assert state.seed == session.seed and state.end_time == session.end_time
+    assert list(state.answer_state) == list(SeededSessionState(session).answer_state)
+    assert state.to_session(session.difficulty_level_details, lambda s, n: None).questions == []
+
+
+def test_seeded_state_update_matches_a_fresh_state():
+    session = _session_with_answers(issued=3)
+    state = SeededSessionState(session)
+    session.questions[2].user_answer, session.questions[2].is_correct = 4, True
+    session.questions.append(_issue_next_question(session))
+    session.score = 1
+    state.update(session, [2])
+
+    fresh = SeededSessionState(session)
+    assert state.to_bytes() == fresh.to_bytes()
+
+
+def test_compact_rebuilds_only_generate_new_questions(monkeypatch):
+    session = _session_with_answers(issued=5)
+    state = SeededSessionState(session)
+    expected = _rebuild_compact_session(state)  # also fills the cache
+    generated = []
+    original = practice._issue_next_question
+    monkeypatch.setattr(practice, "_issue_next_question", lambda s: generated.append(1) or original(s))
+
+    for _ in range(3):
+        rebuilt = _rebuild_compact_session(state)
+        assert rebuilt.model_dump() == expected.model_dump()
+    assert generated == []
+
+    # Answering a rebuilt copy must not leak into the cache
+    rebuilt.questions[2].user_answer, rebuilt.questions[2].is_correct = 1, False
+    assert _rebuild_compact_session(state).questions[2].user_answer is None
+
+    # One more issued question: only that one is generated
+    session.questions.append(original(session))
+    rebuilt = _rebuild_compact_session(SeededSessionState(session))
+    assert len(generated) == 1
+    assert [q.id for q in rebuilt.questions] == [q.id for q in session.questions]
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_in_memory_store_expires_idle_sessions():
+    clock = _FakeClock()
+    store = InMemorySessionStore(_rebuild_compact_session, ttl_seconds=60, clock=clock)
+    idle, active = _session_with_answers(issued=1), _session_with_answers(issued=1)
+    store.add(idle)
+    store.add(active, compact=True)
+
+    clock.now = 50
+    assert store.get(active.id) is not None  # touching keeps it alive
+    clock.now = 100
+    assert idle.id not in store
+    assert store.sweep() == 1
+    assert store.get(idle.id) is None and len(store) == 1
+    assert store.get(active.id) is not None
+
+    clock.now = 200
+    assert store.get(active.id) is None  # expired on access, without waiting for a sweep
+    assert store.evictions == {"ttl": 2, "lru": 0}
+
+
+def test_in_memory_store_evicts_least_recently_used_at_capacity():
+    store = InMemorySessionStore(_rebuild_compact_session, max_entries=3)
+    sessions = [_session_with_answers(issued=1) for _ in range(4)]
+    for session in sessions[:3]:
+        store.add(session)
+    store.get(sessions[0].id)  # sessions[1] is now the least recently used
+    store.add(sessions[3])
+
+    assert len(store) == 3
+    assert sessions[1].id not in store
+    assert all(s.id in store for s in (sessions[0], sessions[2], sessions[3]))
+    assert store.evictions["lru"] == 1
+
+
+def test_saving_an_evicted_session_is_rejected(monkeypatch):
+    store = InMemorySessionStore(_rebuild_compact_session, max_entries=1)
+    monkeypatch.setattr(practice, "session_store", store)
+    session = _session_with_answers(issued=1)
+    store.add(session, compact=True)
+
+    def handler():
+        loaded = practice._load_session(session.id)
+        if loaded is None:
+            raise HTTPException(status_code=404, detail="Practice session not found")
+        store.add(_session_with_answers(issued=1))  # evicts it while the request holds a copy
+        loaded.score += 1
+        store.save(loaded)
+
+    # The save is rejected instead of re-adding the session as a new, non-compact entry
+    # at version 1; the retry reloads and finds it gone
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(practice._update_session(session.id, handler))
+    assert excinfo.value.status_code == 404
+    assert session.id not in store and store.version(session.id) is None
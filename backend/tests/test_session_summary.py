@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.models.practice import PracticeSession, Question
+from app.services.metrics import session_summary_cache_total
+from app.services.session_summary import SummaryCache, build_session_summary
+
+
+def _question(session: PracticeSession, operations, is_correct=None, time_spent=None, answered_at=None, question_type="arithmetic") -> Question:
+    return Question(
+        session_id=session.id, operands=[1] * (len(operations) + 1), operations=operations,
+        question_string="", difficulty_level_id=session.difficulty_level_id, question_type=question_type,
+        columnar_operation=operations[0] if question_type == "columnar" else None,
+        is_correct=is_correct, time_spent=time_spent, answered_at=answered_at
+    )
+
+
+def test_summary_aggregates_answered_questions():
+    start = datetime(2024, 6, 1, 9, 0, 0)
+    session = PracticeSession(difficulty_level_id=6, total_questions_planned=6, score=3, start_time=start)
+    session.questions = [
+        _question(session, ["+"], True, 2.0, start + timedelta(seconds=10)),
+        _question(session, ["+"], False, 4.0, start + timedelta(seconds=20)),
+        _question(session, ["-"], True, 6.0, start + timedelta(seconds=45)),
+        _question(session, ["+", "-"], True, None, start + timedelta(seconds=30)),
+        _question(session, ["-"], True, 8.0, start + timedelta(seconds=40), question_type="columnar"),
+        _question(session, ["+"])  # issued, not answered yet
+    ]
+    session.score = 4
+
+    summary = build_session_summary(session)
+    assert (summary.questions_issued, summary.answered, summary.score) == (6, 5, 4)
+    assert summary.accuracy == 0.8
+    assert summary.accuracy_by_operation["addition"].model_dump() == {"answered": 2, "correct": 1, "accuracy": 0.5}
+    assert summary.accuracy_by_operation["subtraction"].accuracy == 1.0
+    assert summary.accuracy_by_operation["mixed"].answered == 1
+    assert summary.accuracy_by_question_type["columnar"].answered == 1
+    assert summary.time_spent.model_dump() == {"count": 4, "mean": 5.0, "p50": 4.0, "p90": 8.0, "max": 8.0}
+    assert summary.duration_seconds == 45.0 and not summary.completed
+
+    session.end_time = start + timedelta(minutes=2)
+    summary = build_session_summary(session)
+    assert summary.duration_seconds == 120.0 and summary.completed
+
+
+def test_summary_of_a_new_session_has_no_ratios():
+    summary = build_session_summary(PracticeSession(difficulty_level_id=1))
+    assert summary.accuracy is None and summary.duration_seconds is None
+    assert summary.time_spent.count == 0 and summary.accuracy_by_operation == {}
+
+
+def test_summary_cache_is_keyed_by_version_and_bounded():
+    cache = SummaryCache(max_entries=2)
+    sessions = [PracticeSession(difficulty_level_id=1) for _ in range(3)]
+    encoded = cache.put(sessions[0].id, 1, build_session_summary(sessions[0]))
+    assert cache.get(sessions[0].id, 1) is encoded
+    assert cache.get(sessions[0].id, 2) is None
+    for session in sessions[1:]:
+        cache.put(session.id, 1, build_session_summary(session))
+    assert len(cache) == 2 and cache.get(sessions[0].id, 1) is None
+
+
+def test_summary_stats_endpoint_caches_until_the_session_changes():
+    client = TestClient(app)
+    session_id = client.post("/api/v1/practice/start", json={"difficulty_level_id": 1, "total_questions": 3}).json()["id"]
+    url = "/api/v1/practice/summary/stats"
+
+    first = client.get(url, params={"session_id": session_id})
+    assert first.status_code == 200 and first.json()["answered"] == 0
+    etag = first.headers["etag"]
+
+    hits = session_summary_cache_total.value("hit")
+    again = client.get(url, params={"session_id": session_id})
+    assert again.headers["etag"] == etag and again.content == first.content
+    assert session_summary_cache_total.value("hit") == hits + 1
+    not_modified = client.get(url, params={"session_id": session_id}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+
+    question = client.get("/api/v1/practice/question", params={"session_id": session_id}).json()
+    payload = {"session_id": session_id, "question_id": question["id"], "time_spent": 3.5}
+    if question["question_type"] == "columnar":
+        payload["user_filled_operands"] = [[d or 0 for d in row] for row in question["columnar_operands"]]
+        payload["user_filled_result"] = [d or 0 for d in question["columnar_result_placeholders"]]
+    else:
+        payload["user_answer"] = question["correct_answer"]
+    assert client.post("/api/v1/practice/answer", json=payload).status_code == 200
+
+    changed = client.get(url, params={"session_id": session_id}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    body = changed.json()
+    assert body["answered"] == 1 and body["questions_issued"] == 1
+    assert body["time_spent"]["mean"] == 3.5
+    assert "questions" not in body
+
+    assert client.get(url, params={"session_id": str(uuid4())}).status_code == 404